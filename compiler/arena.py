@@ -0,0 +1,271 @@
+import compiler.ast as ast
+import compiler.symbols as symbols
+from array import array
+from compiler.lexer import Token
+
+# How a node field is stored in the arena's operand column.
+#
+# NODE: The index of the child node or -1 for None.
+# NODE_LIST: The position of a run in the operand column holding the number of children followed by
+#            their indices.
+# NODE_PAIRS: Same as NODE_LIST but for a list of (key, value) pairs of nodes.
+# LITERAL: An index into the literal pool.
+# LITERAL_LIST: An index into the literal pool for a tuple holding the list's elements.
+# OPERATOR: The value of the operator's token type.
+# SYMBOL: The symbol id of an identifier. This is also what the node's symbol field reads.
+NODE = 0
+NODE_LIST = 1
+NODE_PAIRS = 2
+LITERAL = 3
+LITERAL_LIST = 4
+OPERATOR = 5
+SYMBOL = 6
+
+# The fields of each type of AST node in the order that their constructors take them. The symbol id
+# that the parser passes after the fields isn't stored separately since it's the same as the SYMBOL
+# field.
+LAYOUTS = {
+    ast.LetStatement: (("name", SYMBOL), ("rhs", NODE)),
+    ast.IfStatement: (
+        ("cond", NODE),
+        ("then_statements", NODE_LIST),
+        ("else_statements", NODE_LIST),
+    ),
+    ast.WhileLoop: (("cond", NODE), ("loop_body", NODE_LIST)),
+    ast.ExprStatement: (("expr", NODE),),
+    ast.BinaryOp: (("lhs", NODE), ("rhs", NODE), ("operator", OPERATOR)),
+    ast.Function: (
+        ("name", SYMBOL),
+        ("args", LITERAL_LIST),
+        ("statements", NODE_LIST),
+        ("return_type", LITERAL),
+    ),
+    ast.Structure: (("name", SYMBOL), ("members", NODE_LIST), ("member_functions", NODE_LIST)),
+    ast.Member: (("name", SYMBOL), ("type", LITERAL), ("default_value", NODE)),
+    ast.ReturnStatement: (("expr", NODE),),
+    ast.Number: (("value", LITERAL),),
+    ast.String: (("value", LITERAL),),
+    ast.Vector: (("elements", NODE_LIST), ("container_type", LITERAL)),
+    ast.Map: (("elements", NODE_PAIRS), ("container_types", LITERAL)),
+    ast.VariableRef: (("name", SYMBOL),),
+    ast.FunctionCall: (("name", SYMBOL), ("args", NODE_LIST)),
+    ast.Constructor: (("struct_name", SYMBOL), ("params", NODE_LIST)),
+    ast.MemberAccess: (("expr", NODE), ("member_name", SYMBOL)),
+    ast.Index: (("expr", NODE), ("index", NODE)),
+}
+
+NODE_TYPES = list(LAYOUTS)
+KINDS = {node_type: kind for kind, node_type in enumerate(NODE_TYPES)}
+
+
+# Stores an AST in a handful of flat columns rather than as a graph of Python objects. Nodes are
+# identified by their index into the columns and each node's fields are stored as ints in the
+# operand column as described by LAYOUTS. Identifiers are stored as symbol ids and anything else
+# that isn't a node, such as numbers, strings and types, goes into a deduplicated literal pool.
+#
+# The arena exposes a constructor for each AST node type so that it can be handed to the parser in
+# place of the ast module. Nodes are handed out as views that subclass the regular AST node classes
+# and read their fields out of the arena on demand, so ASTWalker passes can run over them unchanged.
+class ASTArena:
+    def __init__(self):
+        self.kinds = array("B")
+        # Where each node's fields start in the operand column.
+        self.offsets = array("I")
+        self.operands = array("i")
+        # The literal pool index of each node's type or -1 if it hasn't been type checked.
+        self.ret_types = array("i")
+        self.literals = list()
+        self.literal_ids = dict()
+        # Operators are stored by token type so we only keep one token for each.
+        self.operators = dict()
+        # Annotations that only a handful of nodes have, such as function ids, keyed on the node
+        # index and the field name.
+        self.annotations = dict()
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def new(self, node_type, *fields):
+        operands = list()
+        for (_, field_kind), value in zip(LAYOUTS[node_type], fields):
+            operands.append(self._encode(field_kind, value))
+        node = len(self.kinds)
+        self.kinds.append(KINDS[node_type])
+        self.offsets.append(len(self.operands))
+        self.operands.extend(operands)
+        self.ret_types.append(-1)
+        return self.view(node)
+
+    def view(self, node):
+        if node < 0:
+            return None
+        return VIEW_TYPES[self.kinds[node]](self, node)
+
+    def literal(self, value):
+        literal_id = self.literal_ids.get(value)
+        if literal_id is None:
+            literal_id = len(self.literals)
+            self.literal_ids[value] = literal_id
+            self.literals.append(value)
+        return literal_id
+
+    def nodes(self, position):
+        length = self.operands[position]
+        return [self.view(child) for child in self.operands[position + 1 : position + 1 + length]]
+
+    def node_pairs(self, position):
+        length = self.operands[position]
+        children = self.operands[position + 1 : position + 1 + length * 2]
+        return [
+            (self.view(children[i]), self.view(children[i + 1])) for i in range(0, len(children), 2)
+        ]
+
+    def _encode(self, field_kind, value):
+        if field_kind == NODE:
+            if value is None:
+                return -1
+            return value._node
+        elif field_kind == NODE_LIST:
+            position = len(self.operands)
+            self.operands.append(len(value))
+            self.operands.extend(child._node for child in value)
+            return position
+        elif field_kind == NODE_PAIRS:
+            position = len(self.operands)
+            self.operands.append(len(value))
+            for key, val in value:
+                self.operands.append(key._node)
+                self.operands.append(val._node)
+            return position
+        elif field_kind == LITERAL:
+            return self.literal(value)
+        elif field_kind == LITERAL_LIST:
+            return self.literal(tuple(value))
+        elif field_kind == SYMBOL:
+            return symbols.intern(value)
+        else:
+            assert field_kind == OPERATOR
+            operator = value.type.value
+            if operator not in self.operators:
+                # Don't hold onto the source buffer.
+                self.operators[operator] = Token(value.type, value.value)
+            return operator
+
+
+def _make_constructor(node_type):
+    def constructor(self, *fields):
+        return self.new(node_type, *fields)
+
+    return constructor
+
+
+for _node_type in NODE_TYPES:
+    setattr(ASTArena, _node_type.__name__, _make_constructor(_node_type))
+
+
+# Field getters are specialised on the field kind since they're hit for every field that a pass
+# reads.
+def _field_property(position, field_kind):
+    if field_kind == NODE:
+
+        def get(self):
+            arena = self._arena
+            return arena.view(arena.operands[arena.offsets[self._node] + position])
+
+    elif field_kind == NODE_LIST:
+
+        def get(self):
+            arena = self._arena
+            return arena.nodes(arena.operands[arena.offsets[self._node] + position])
+
+    elif field_kind == NODE_PAIRS:
+
+        def get(self):
+            arena = self._arena
+            return arena.node_pairs(arena.operands[arena.offsets[self._node] + position])
+
+    elif field_kind == LITERAL:
+
+        def get(self):
+            arena = self._arena
+            return arena.literals[arena.operands[arena.offsets[self._node] + position]]
+
+    elif field_kind == LITERAL_LIST:
+
+        def get(self):
+            arena = self._arena
+            return list(arena.literals[arena.operands[arena.offsets[self._node] + position]])
+
+    elif field_kind == OPERATOR:
+
+        def get(self):
+            arena = self._arena
+            return arena.operators[arena.operands[arena.offsets[self._node] + position]]
+
+    else:
+        assert field_kind == SYMBOL
+
+        def get(self):
+            arena = self._arena
+            return symbols.name(arena.operands[arena.offsets[self._node] + position])
+
+    return property(get)
+
+
+def _symbol_property(position):
+    def get(self):
+        arena = self._arena
+        return arena.operands[arena.offsets[self._node] + position]
+
+    return property(get)
+
+
+def _get_ret_type(self):
+    ret_type = self._arena.ret_types[self._node]
+    if ret_type < 0:
+        return None
+    return self._arena.literals[ret_type]
+
+
+def _set_ret_type(self, ret_type):
+    self._arena.ret_types[self._node] = -1 if ret_type is None else self._arena.literal(ret_type)
+
+
+def _annotation_property(name):
+    def get(self):
+        return self._arena.annotations.get((self._node, name))
+
+    def set(self, value):
+        self._arena.annotations[(self._node, name)] = value
+
+    return property(get, set)
+
+
+def _view_init(self, arena, node):
+    self._arena = arena
+    self._node = node
+
+
+# Each view type subclasses the AST node class that it stands in for so that ASTWalker dispatches
+# to the same walker methods and the node's __eq__ and __str__ still work. Fields are read-only
+# properties. Anything that passes annotate the node with is written back to the arena.
+def _make_view_type(node_type):
+    namespace = {"__slots__": ("_arena", "_node"), "__init__": _view_init}
+    fields = list()
+    for position, (name, field_kind) in enumerate(LAYOUTS[node_type]):
+        namespace[name] = _field_property(position, field_kind)
+        fields.append(name)
+        if field_kind == SYMBOL:
+            namespace["symbol"] = _symbol_property(position)
+            fields.append("symbol")
+    for name in node_type.__slots__:
+        if name in fields:
+            continue
+        if name == "ret_type":
+            namespace[name] = property(_get_ret_type, _set_ret_type)
+        else:
+            namespace[name] = _annotation_property(name)
+    return type(node_type.__name__ + "View", (node_type,), namespace)
+
+
+VIEW_TYPES = [_make_view_type(node_type) for node_type in NODE_TYPES]
@@ -1,3 +1,4 @@
+import compiler.symbols as symbols
 from enum import Enum
 
 
@@ -24,10 +25,26 @@ def tuple_to_string(p):
     return s
 
 
+# Nodes that are named by an identifier also hold its symbol id, which is what passes key their
+# tables by. The parser hands us the symbol that the lexer interned.
+def _symbol(name, symbol):
+    if symbol is None:
+        return symbols.intern(name)
+    return symbol
+
+
+# Nodes declare slots for the fields that compiler passes fill in after parsing (return types,
+# function ids, etc) rather than having them bolted onto a per-node __dict__.
 class LetStatement:
-    def __init__(self, name, rhs):
+    __slots__ = ("name", "rhs", "ret_type", "symbol", "dead")
+
+    def __init__(self, name, rhs, symbol=None):
         self.name = name
         self.rhs = rhs
+        self.symbol = _symbol(name, symbol)
+        self.ret_type = None
+        # Whether dead code elimination found that the statement can never run.
+        self.dead = False
 
     def __eq__(self, other):
         if not isinstance(other, LetStatement):
@@ -39,10 +56,15 @@ class LetStatement:
 
 
 class IfStatement:
+    __slots__ = ("cond", "then_statements", "else_statements", "dead", "cond_value")
+
     def __init__(self, cond, then_statements, else_statements):
         self.cond = cond
         self.then_statements = then_statements
         self.else_statements = else_statements
+        self.dead = False
+        # The value of the condition if it's known at compile time.
+        self.cond_value = None
 
     def __eq__(self, other):
         if not isinstance(other, IfStatement):
@@ -60,9 +82,13 @@ class IfStatement:
 
 
 class WhileLoop:
+    __slots__ = ("cond", "loop_body", "dead", "cond_value")
+
     def __init__(self, cond, loop_body):
         self.cond = cond
         self.loop_body = loop_body
+        self.dead = False
+        self.cond_value = None
 
     def __eq__(self, other):
         if not isinstance(other, WhileLoop):
@@ -74,8 +100,11 @@ class WhileLoop:
 
 
 class ExprStatement:
+    __slots__ = ("expr", "dead")
+
     def __init__(self, expr):
         self.expr = expr
+        self.dead = False
 
     def __eq__(self, other):
         if not isinstance(other, ExprStatement):
@@ -87,10 +116,15 @@ class ExprStatement:
 
 
 class BinaryOp:
+    __slots__ = ("lhs", "rhs", "operator", "ret_type", "constant")
+
     def __init__(self, lhs, rhs, operator):
         self.lhs = lhs
         self.rhs = rhs
         self.operator = operator
+        self.ret_type = None
+        # The value of the op if it's been constant folded.
+        self.constant = None
 
     def __eq__(self, other):
         if not isinstance(other, BinaryOp):
@@ -102,11 +136,33 @@ class BinaryOp:
 
 
 class Function:
-    def __init__(self, name, args, statements, return_type):
+    __slots__ = (
+        "name",
+        "args",
+        "statements",
+        "return_type",
+        "function_id",
+        "offset",
+        "symbol",
+        "dead",
+        "slots",
+        "frame_size",
+    )
+
+    def __init__(self, name, args, statements, return_type, symbol=None):
         self.name = name
+        self.symbol = _symbol(name, symbol)
         self.args = args
         self.statements = statements
         self.return_type = return_type
+        self.function_id = None
+        self.offset = None
+        # Whether tree shaking found that the function is never called.
+        self.dead = False
+        # The frame slot of each variable if slot allocation has been run.
+        self.slots = None
+        # How many variable slots codegen used.
+        self.frame_size = None
 
     def __eq__(self, other):
         if not isinstance(other, Function):
@@ -124,10 +180,25 @@ class Function:
 
 
 class Structure:
-    def __init__(self, name, members, member_functions):
+    __slots__ = (
+        "name",
+        "members",
+        "member_functions",
+        "type_id",
+        "member_index",
+        "symbol",
+        "dead",
+    )
+
+    def __init__(self, name, members, member_functions, symbol=None):
         self.name = name
+        self.symbol = _symbol(name, symbol)
         self.members = members
         self.member_functions = member_functions
+        self.type_id = None
+        self.member_index = None
+        # Whether tree shaking found that the struct is never constructed.
+        self.dead = False
 
     def __eq__(self, other):
         if not isinstance(other, Structure):
@@ -154,18 +225,27 @@ class TypeKind(Enum):
 
 
 class Type:
-    def __init__(self, kind, identifier=None, container_type=None):
-        self.kind = kind
-        self.identifier = identifier
-        # Only used for vectors and maps.
-        self.container_type = container_type
-
-    def __eq__(self, other):
-        return (
-            self.kind == other.kind
-            and self.identifier == other.identifier
-            and self.container_type == other.container_type
-        )
+    # Types are interned so that structurally equal types are always the same object. That makes
+    # type comparisons identity checks and means that annotating a node with a type doesn't
+    # allocate.
+    __slots__ = ("kind", "identifier", "container_type", "symbol")
+
+    _interned = dict()
+
+    def __new__(cls, kind, identifier=None, container_type=None):
+        # Container types are themselves interned so the key hashes and compares by identity.
+        key = (kind, identifier, container_type)
+        t = cls._interned.get(key)
+        if t is None:
+            t = super().__new__(cls)
+            t.kind = kind
+            t.identifier = identifier
+            # The symbol id of a user defined type's name.
+            t.symbol = None if identifier is None else symbols.intern(identifier)
+            # Only used for vectors and maps.
+            t.container_type = container_type
+            cls._interned[key] = t
+        return t
 
     def __str__(self):
         return "(Kind={}, Identifier={}, ContainerType={})".format(
@@ -174,8 +254,11 @@ class Type:
 
 
 class Member:
-    def __init__(self, name, m_type, default_value=None):
+    __slots__ = ("name", "type", "default_value", "symbol")
+
+    def __init__(self, name, m_type, default_value=None, symbol=None):
         self.name = name
+        self.symbol = _symbol(name, symbol)
         self.type = m_type
         self.default_value = default_value
 
@@ -195,8 +278,11 @@ class Member:
 
 
 class ReturnStatement:
+    __slots__ = ("expr", "dead")
+
     def __init__(self, expr):
         self.expr = expr
+        self.dead = False
 
     def __eq__(self, other):
         if not isinstance(other, ReturnStatement):
@@ -208,8 +294,11 @@ class ReturnStatement:
 
 
 class Number:
+    __slots__ = ("value", "ret_type")
+
     def __init__(self, value):
         self.value = value
+        self.ret_type = None
 
     def __eq__(self, other):
         if not isinstance(other, Number):
@@ -221,8 +310,11 @@ class Number:
 
 
 class String:
+    __slots__ = ("value", "ret_type")
+
     def __init__(self, value):
         self.value = value
+        self.ret_type = None
 
     def __eq__(self, other):
         if not isinstance(other, String):
@@ -234,9 +326,12 @@ class String:
 
 
 class Vector:
+    __slots__ = ("elements", "container_type", "ret_type")
+
     def __init__(self, elements, container_type):
         self.elements = elements
         self.container_type = container_type
+        self.ret_type = None
 
     def __eq__(self, other):
         if not isinstance(other, Vector):
@@ -250,9 +345,12 @@ class Vector:
 
 
 class Map:
+    __slots__ = ("elements", "container_types", "ret_type")
+
     def __init__(self, elements, container_types):
         self.elements = elements
         self.container_types = container_types
+        self.ret_type = None
 
     def __eq__(self, other):
         if not isinstance(other, Map):
@@ -266,8 +364,12 @@ class Map:
 
 
 class VariableRef:
-    def __init__(self, name):
+    __slots__ = ("name", "ret_type", "symbol")
+
+    def __init__(self, name, symbol=None):
         self.name = name
+        self.symbol = _symbol(name, symbol)
+        self.ret_type = None
 
     def __eq__(self, other):
         if not isinstance(other, VariableRef):
@@ -279,9 +381,15 @@ class VariableRef:
 
 
 class FunctionCall:
-    def __init__(self, name, args):
+    __slots__ = ("name", "args", "ret_type", "symbol", "inline")
+
+    def __init__(self, name, args, symbol=None):
         self.name = name
+        self.symbol = _symbol(name, symbol)
         self.args = args
+        self.ret_type = None
+        # The function to generate in place of the call if it's been inlined.
+        self.inline = None
 
     def __eq__(self, other):
         if not isinstance(other, FunctionCall):
@@ -293,9 +401,13 @@ class FunctionCall:
 
 
 class Constructor:
-    def __init__(self, struct_name, params):
+    __slots__ = ("struct_name", "params", "ret_type", "symbol")
+
+    def __init__(self, struct_name, params, symbol=None):
         self.struct_name = struct_name
+        self.symbol = _symbol(struct_name, symbol)
         self.params = params
+        self.ret_type = None
 
     def __eq__(self, other):
         if not isinstance(other, Constructor):
@@ -309,9 +421,13 @@ class Constructor:
 
 
 class MemberAccess:
-    def __init__(self, expr, member_name):
+    __slots__ = ("expr", "member_name", "ret_type", "symbol")
+
+    def __init__(self, expr, member_name, symbol=None):
         self.expr = expr
         self.member_name = member_name
+        self.symbol = _symbol(member_name, symbol)
+        self.ret_type = None
 
     def __eq__(self, other):
         if not isinstance(other, MemberAccess):
@@ -323,9 +439,12 @@ class MemberAccess:
 
 
 class Index:
+    __slots__ = ("expr", "index", "ret_type")
+
     def __init__(self, expr, index):
         self.expr = expr
         self.index = index
+        self.ret_type = None
 
     def __eq__(self, other):
         if not isinstance(other, Index):
@@ -336,48 +455,77 @@ class Index:
         return "Index(Expr={0}, Index={1})".format(self.expr, self.index)
 
 
+# The walker method that handles each type of AST node.
+WALKER_METHODS = {
+    Structure: "_walk_structure",
+    LetStatement: "_walk_let_statement",
+    IfStatement: "_walk_if_statement",
+    WhileLoop: "_walk_while_loop",
+    ExprStatement: "_walk_expr_statement",
+    BinaryOp: "_walk_binary_op",
+    Function: "_walk_function",
+    ReturnStatement: "_walk_return_statement",
+    Number: "_walk_number",
+    String: "_walk_string",
+    Vector: "_walk_vector",
+    Map: "_walk_map",
+    Index: "_walk_index",
+    VariableRef: "_walk_variable",
+    Constructor: "_walk_constructor",
+    FunctionCall: "_walk_function_call",
+    MemberAccess: "_walk_member_access",
+}
+
+
 class ASTWalker:
+    # Maps each walker class to a dict of node types to walker methods. Each node type is resolved the
+    # first time a walker of that class sees it so that dispatch is a single dict lookup no matter
+    # which kind of node it is. The handlers are shared between instances since we create a new set
+    # of passes for every program that we compile.
+    _class_handlers = dict()
+
+    def __init__(self):
+        self._handlers = ASTWalker._class_handlers.setdefault(type(self), dict())
+        self.nodes_walked = 0
+
     def walk_ast(self, top_level_exprs):
         for expr in top_level_exprs:
             self._walk(expr)
 
     def _walk(self, expr):
-        if isinstance(expr, Structure):
-            self._walk_structure(expr)
-        elif isinstance(expr, LetStatement):
-            self._walk_let_statement(expr)
-        elif isinstance(expr, IfStatement):
-            self._walk_if_statement(expr)
-        elif isinstance(expr, WhileLoop):
-            self._walk_while_loop(expr)
-        elif isinstance(expr, ExprStatement):
-            self._walk(expr.expr)
-        elif isinstance(expr, BinaryOp):
-            self._walk_binary_op(expr)
-        elif isinstance(expr, Function):
-            self._walk_function(expr)
-        elif isinstance(expr, ReturnStatement):
-            self._walk_return_statement(expr)
-        elif isinstance(expr, Number):
-            self._walk_number(expr)
-        elif isinstance(expr, String):
-            self._walk_string(expr)
-        elif isinstance(expr, Vector):
-            self._walk_vector(expr)
-        elif isinstance(expr, Map):
-            self._walk_map(expr)
-        elif isinstance(expr, Index):
-            self._walk_index(expr)
-        elif isinstance(expr, VariableRef):
-            self._walk_variable(expr)
-        elif isinstance(expr, Constructor):
-            self._walk_constructor(expr)
-        elif isinstance(expr, FunctionCall):
-            self._walk_function_call(expr)
-        elif isinstance(expr, MemberAccess):
-            self._walk_member_access(expr)
-        else:
-            raise RuntimeError("unexpected ast type: Ast=({0})".format(expr))
+        # Walker methods that need to visit child nodes are generators that yield each child in
+        # turn. Rather than recursing into the children, we keep the suspended walker methods on an
+        # explicit stack so that deeply nested expressions can't exhaust the Python call stack.
+        handlers = self._handlers
+        stack = list()
+        node = expr
+        nodes_walked = 0
+        while True:
+            nodes_walked += 1
+            handler = handlers.get(type(node))
+            if handler is None:
+                handler = self._resolve_handler(node)
+            walker = handler(self, node)
+            if walker is not None:
+                stack.append(walker)
+            # Resume the innermost walker method until it yields another child to visit.
+            while stack:
+                node = next(stack[-1], None)
+                if node is not None:
+                    break
+                stack.pop()
+            else:
+                self.nodes_walked += nodes_walked
+                return
+
+    def _resolve_handler(self, expr):
+        # Subclasses of AST nodes are handled by the walker method for the closest base class.
+        for node_type in type(expr).__mro__:
+            if node_type in WALKER_METHODS:
+                handler = getattr(type(self), WALKER_METHODS[node_type])
+                self._handlers[type(expr)] = handler
+                return handler
+        raise RuntimeError("unexpected ast type: Ast=({0})".format(expr))
 
     def _walk_structure(self, expr):
         pass
@@ -388,6 +536,9 @@ class ASTWalker:
     def _walk_if_statement(self, expr):
         pass
 
+    def _walk_expr_statement(self, expr):
+        yield expr.expr
+
     def _walk_while_loop(self, expr):
         pass
 
@@ -426,3 +577,65 @@ class ASTWalker:
 
     def _walk_member_access(self, expr):
         pass
+
+
+# Visits every node in the tree in source order. Passes that only care about a few types of node can
+# override the walker methods for those and leave the rest to walk the children.
+class TreeWalker(ASTWalker):
+    def _walk_structure(self, expr):
+        for m in expr.members:
+            if m.default_value is not None:
+                yield m.default_value
+        for mf in expr.member_functions:
+            yield mf
+
+    def _walk_let_statement(self, expr):
+        yield expr.rhs
+
+    def _walk_if_statement(self, expr):
+        yield expr.cond
+        for statement in expr.then_statements:
+            yield statement
+        for statement in expr.else_statements:
+            yield statement
+
+    def _walk_while_loop(self, expr):
+        yield expr.cond
+        for statement in expr.loop_body:
+            yield statement
+
+    def _walk_binary_op(self, expr):
+        yield expr.lhs
+        yield expr.rhs
+
+    def _walk_function(self, expr):
+        for s in expr.statements:
+            yield s
+
+    def _walk_return_statement(self, expr):
+        if expr.expr is not None:
+            yield expr.expr
+
+    def _walk_vector(self, expr):
+        for e in expr.elements:
+            yield e
+
+    def _walk_map(self, expr):
+        for key, value in expr.elements:
+            yield key
+            yield value
+
+    def _walk_index(self, expr):
+        yield expr.expr
+        yield expr.index
+
+    def _walk_constructor(self, expr):
+        for param in expr.params:
+            yield param
+
+    def _walk_function_call(self, expr):
+        for arg in expr.args:
+            yield arg
+
+    def _walk_member_access(self, expr):
+        yield expr.expr
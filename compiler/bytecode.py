@@ -5,19 +5,17 @@ class ByteCode:
     def __init__(self):
         self.header = bytearray()
         self.buf = bytearray()
+        # The id of each string in the constant pool.
+        self.constants = dict()
 
-    def write_header(self, op, args=list()):
-        self.header.append(op.value)
-        self.header.extend(args)
-
-    def write_op(self, op, args=list()):
-        self.buf.append(op.value)
-        self.buf.extend(args)
-
-    def edit_op(self, offset, op, args=list()):
-        self.buf[offset] = op.value
-        for i in range(1, len(args) + 1):
-            self.buf[offset + i] = args[i - 1]
+    # Adds a string to the constant pool in the header if it isn't already there and returns its id.
+    def string_constant(self, value):
+        const_id = self.constants.get(value)
+        if const_id is None:
+            const_id = len(self.constants)
+            self.constants[value] = const_id
+            ops.emit_string_const(self, const_id, value)
+        return const_id
 
     def current_offset(self):
         return len(self.buf)
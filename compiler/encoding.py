@@ -0,0 +1,70 @@
+# How operands are encoded in the bytecode.
+#
+# U8, U16, U32, U64: A little endian unsigned integer of that many bits.
+# VARINT: An unsigned LEB128 integer, so small values only take up a single byte.
+U8 = 0
+U16 = 1
+U32 = 2
+U64 = 3
+VARINT = 4
+
+FIXED_WIDTHS = {U8: 1, U16: 2, U32: 4, U64: 8}
+
+
+class Operand:
+    __slots__ = ("encoding", "offset", "enumerated")
+
+    def __init__(self, encoding, offset=False, enumerated=False):
+        self.encoding = encoding
+        # Whether the operand is an offset into the bytecode buffer, such as a jump target.
+        self.offset = offset
+        # Whether the operand is a VARINT count followed by that many values.
+        self.enumerated = enumerated
+
+
+def encode(encoding, value, buf):
+    if encoding == VARINT:
+        if value < 0:
+            raise ValueError("cannot encode negative value {} as a varint".format(value))
+        while value > 0x7F:
+            buf.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buf.append(value)
+    else:
+        buf.extend(value.to_bytes(FIXED_WIDTHS[encoding], "little"))
+
+
+# Returns the decoded value and the position after it.
+def decode(encoding, buf, position):
+    if encoding == VARINT:
+        value = 0
+        shift = 0
+        while True:
+            byte = buf[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value, position
+            shift += 7
+    width = FIXED_WIDTHS[encoding]
+    return int.from_bytes(buf[position : position + width], "little"), position + width
+
+
+def encode_operand(operand, value, buf):
+    if operand.enumerated:
+        encode(VARINT, len(value), buf)
+        for element in value:
+            encode(operand.encoding, element, buf)
+    else:
+        encode(operand.encoding, value, buf)
+
+
+def decode_operand(operand, buf, position):
+    if not operand.enumerated:
+        return decode(operand.encoding, buf, position)
+    length, position = decode(VARINT, buf, position)
+    elements = list()
+    for _ in range(length):
+        element, position = decode(operand.encoding, buf, position)
+        elements.append(element)
+    return elements, position
@@ -1,3 +1,7 @@
+import mmap
+import re
+import sys
+import compiler.symbols as symbols
 from enum import Enum
 
 
@@ -44,9 +48,44 @@ class TokenType(Enum):
 
 
 class Token:
-    def __init__(self, token_type, value=str()):
+    # Tokens remember where they came from in the source buffer rather than owning a copy of their
+    # text. Values that the lexer didn't need to look at are sliced out lazily.
+    __slots__ = ("type", "_value", "source", "start", "length", "symbol")
+
+    def __init__(self, token_type, value=str(), source=None, start=0, length=0, symbol=None):
         self.type = token_type
-        self.value = value
+        self._value = value
+        self.source = source
+        self.start = start
+        self.length = length
+        # The symbol id of an identifier.
+        self.symbol = symbol
+
+    @property
+    def end(self):
+        return self.start + self.length
+
+    @property
+    def value(self):
+        if self._value is None:
+            if self.type == TokenType.STRING_LITERAL:
+                # Strip the quotes.
+                self._value = _text(self.source, self.start + 1, self.end - 1)
+            else:
+                self._value = _text(self.source, self.start, self.end)
+        return self._value
+
+    @property
+    def line(self):
+        if self.source is None:
+            return None
+        return _text(self.source, 0, self.start).count("\n") + 1
+
+    @property
+    def column(self):
+        if self.source is None:
+            return None
+        return self.start - _text(self.source, 0, self.start).rfind("\n")
 
     def __str__(self):
         return 'Token(Type={0}, Value="{1}")'.format(self.type, self.value)
@@ -55,6 +94,14 @@ class Token:
         return self.type == other.type and self.value == other.value
 
 
+# Byte buffers, such as a memory mapped source file, are only decoded when we actually need a value.
+def _text(source, start, end):
+    text = source[start:end]
+    if not isinstance(text, str):
+        text = str(text, "utf-8")
+    return text
+
+
 KEYWORDS = {
     "struct": TokenType.STRUCTURE,
     "fn": TokenType.FUNCTION,
@@ -107,20 +154,37 @@ class Lexer:
         self.pos = 0
         self._get_char()
 
+    def tokens(self):
+        while True:
+            tok = self.lex_token()
+            yield tok
+            if tok.type == TokenType.EOF:
+                break
+
     def lex_token(self):
         while True:
             self._trim_whitespace()
             if not self._trim_comments():
                 break
+        start = self._offset()
         if self.cur_char is None:
-            return Token(TokenType.EOF)
+            return Token(TokenType.EOF, str(), self.buffer, start)
         if self.cur_char.isnumeric():
-            return self._lex_number()
+            return self._lex_number(start)
         if self.cur_char.isalpha():
-            return self._lex_identifier()
+            return self._lex_identifier(start)
         if self.cur_char == '"':
-            return self._lex_string()
-        return self._lex_symbol()
+            return self._lex_string(start)
+        return self._lex_symbol(start)
+
+    # The offset of the current character in the buffer.
+    def _offset(self):
+        if self.cur_char is None:
+            return self.pos
+        return self.pos - 1
+
+    def _token(self, token_type, value, start, symbol=None):
+        return Token(token_type, value, self.buffer, start, self._offset() - start, symbol)
 
     def _get_char(self):
         if self.pos >= len(self.buffer):
@@ -148,7 +212,7 @@ class Lexer:
             return True
         return False
 
-    def _lex_number(self):
+    def _lex_number(self, start):
         value = self.cur_char
         while True:
             self._get_char()
@@ -156,9 +220,9 @@ class Lexer:
                 value += self.cur_char
             else:
                 break
-        return Token(TokenType.NUMBER_LITERAL, value)
+        return self._token(TokenType.NUMBER_LITERAL, value, start)
 
-    def _lex_identifier(self):
+    def _lex_identifier(self, start):
         value = self.cur_char
         while True:
             self._get_char()
@@ -167,10 +231,10 @@ class Lexer:
             else:
                 break
         if value in KEYWORDS:
-            return Token(KEYWORDS[value], value)
-        return Token(TokenType.IDENTIFIER, value)
+            return self._token(KEYWORDS[value], sys.intern(value), start)
+        return self._token(TokenType.IDENTIFIER, sys.intern(value), start, symbols.intern(value))
 
-    def _lex_string(self):
+    def _lex_string(self, start):
         value = str()
         while True:
             self._get_char()
@@ -181,9 +245,9 @@ class Lexer:
         if self.cur_char is None:
             raise LexerError("encountered string with no closing quote")
         self._get_char()
-        return Token(TokenType.STRING_LITERAL, value)
+        return self._token(TokenType.STRING_LITERAL, value, start)
 
-    def _lex_symbol(self):
+    def _lex_symbol(self, start):
         # This technique only works for two char compound symbols.
         single = self.cur_char
         self._get_char()
@@ -192,8 +256,99 @@ class Lexer:
             compound = single + self.cur_char
         if compound in SYMBOLS:
             self._get_char()
-            return Token(SYMBOLS[compound], compound)
+            return self._token(SYMBOLS[compound], compound, start)
         elif single in SYMBOLS:
-            return Token(SYMBOLS[single], single)
+            return self._token(SYMBOLS[single], single, start)
         else:
             raise LexerError("encountered unknown symbol: {}".format(single))
+
+
+def _build_master_pattern():
+    # Try longer symbols first so that compound symbols like "->" aren't lexed as "-" and ">".
+    symbols = sorted(SYMBOLS, key=len, reverse=True)
+    groups = [
+        ("SYMBOL", "|".join(re.escape(s) for s in symbols)),
+        ("WORD", r"[^\W\d_][^\W_]*"),
+        ("NUMBER", r"\d+"),
+        ("STRING", r'"[^"]*"'),
+        ("END", r"\Z"),
+        ("UNTERMINATED_STRING", r'"'),
+        ("MISMATCH", r"."),
+    ]
+    # Whitespace and comments are consumed as part of the following token so that every match
+    # yields a token.
+    skip = r"(?:\s+|//[^\n]*\n?)*"
+    tokens = "|".join("(?P<{}>{})".format(name, regex) for name, regex in groups)
+    return "{}(?:{})".format(skip, tokens)
+
+
+MASTER_PATTERN = re.compile(_build_master_pattern(), re.DOTALL)
+
+# When compiled for bytes, the character classes only match ASCII and re turns them into 256 entry
+# lookup tables so no Unicode predicates run per character.
+BYTES_MASTER_PATTERN = re.compile(_build_master_pattern().encode(), re.DOTALL)
+BYTES_SYMBOLS = {symbol.encode(): token_type for symbol, token_type in SYMBOLS.items()}
+
+
+# Map a source file into memory so that it can be lexed in place without reading and decoding it.
+def map_source(path):
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            # Empty files can't be mapped.
+            return bytes()
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+# Produces the same token stream as Lexer but scans the whole buffer with a single regex. The buffer
+# can either be a string or a bytes-like object holding UTF-8 source, in which case identifiers must
+# be ASCII.
+class RegexLexer:
+    def __init__(self, buffer):
+        if not isinstance(buffer, str):
+            buffer = memoryview(buffer)
+        self.buffer = buffer
+        self._tokens = self.tokens()
+
+    def lex_token(self):
+        return next(self._tokens, Token(TokenType.EOF))
+
+    def tokens(self):
+        buffer = self.buffer
+        if isinstance(buffer, str):
+            pattern, symbol_types, decode = MASTER_PATTERN, SYMBOLS, str
+        else:
+            pattern, symbol_types, decode = BYTES_MASTER_PATTERN, BYTES_SYMBOLS, bytes.decode
+        # Words are decoded and looked up once, after that we reuse the token type, value and symbol.
+        words = dict()
+        for match in pattern.finditer(buffer):
+            kind = match.lastgroup
+            start, end = match.span(kind)
+            length = end - start
+            if kind == "SYMBOL":
+                yield Token(symbol_types[match.group(kind)], None, buffer, start, length)
+            elif kind == "WORD":
+                word = match.group(kind)
+                entry = words.get(word)
+                if entry is None:
+                    value = sys.intern(decode(word))
+                    if value in KEYWORDS:
+                        entry = (KEYWORDS[value], value, None)
+                    else:
+                        entry = (TokenType.IDENTIFIER, value, symbols.intern(value))
+                    words[word] = entry
+                token_type, value, symbol = entry
+                yield Token(token_type, value, buffer, start, length, symbol)
+            elif kind == "NUMBER":
+                yield Token(TokenType.NUMBER_LITERAL, None, buffer, start, length)
+            elif kind == "STRING":
+                yield Token(TokenType.STRING_LITERAL, None, buffer, start, length)
+            elif kind == "END":
+                break
+            elif kind == "UNTERMINATED_STRING":
+                raise LexerError("encountered string with no closing quote")
+            else:
+                symbol = match.group(kind)
+                if not isinstance(symbol, str):
+                    symbol = symbol.decode("utf-8", "replace")
+                raise LexerError("encountered unknown symbol: {}".format(symbol))
+        yield Token(TokenType.EOF, str(), buffer, len(buffer))
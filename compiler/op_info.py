@@ -0,0 +1,205 @@
+# Generated by glacierdsl - DO NOT EDIT.
+
+from compiler import encoding
+from compiler.ops import OpCode
+from enum import Enum
+
+# The operands that follow each op, keyed on the op's value.
+OPERANDS = {
+    OpCode.STRUCT_DEF.value: (
+        encoding.Operand(encoding.VARINT),
+        encoding.Operand(encoding.U8, enumerated=True),
+    ),
+    OpCode.FUNCTION_DEF.value: (
+        encoding.Operand(encoding.VARINT),
+        encoding.Operand(encoding.VARINT),
+    ),
+    OpCode.SET_VAR.value: (encoding.Operand(encoding.VARINT),),
+    OpCode.GET_VAR.value: (encoding.Operand(encoding.VARINT),),
+    OpCode.CALL_FUNC.value: (encoding.Operand(encoding.VARINT),),
+    OpCode.RETURN.value: (),
+    OpCode.RETURN_VAL.value: (),
+    OpCode.ADD.value: (),
+    OpCode.INT.value: (encoding.Operand(encoding.VARINT),),
+    OpCode.STRING.value: (encoding.Operand(encoding.U8, enumerated=True),),
+    OpCode.SUBTRACT.value: (),
+    OpCode.MULTIPLY.value: (),
+    OpCode.DIVIDE.value: (),
+    OpCode.FUNCTION_JMP.value: (
+        encoding.Operand(encoding.VARINT),
+        encoding.Operand(encoding.VARINT, offset=True),
+    ),
+    OpCode.HEADER_END.value: (),
+    OpCode.PRINT.value: (),
+    OpCode.EQ.value: (),
+    OpCode.JUMP_IF_TRUE.value: (encoding.Operand(encoding.U32, offset=True),),
+    OpCode.JUMP_IF_FALSE.value: (encoding.Operand(encoding.U32, offset=True),),
+    OpCode.JUMP.value: (encoding.Operand(encoding.U32, offset=True),),
+    OpCode.STRUCT.value: (encoding.Operand(encoding.VARINT),),
+    OpCode.GET_STRUCT_MEMBER.value: (encoding.Operand(encoding.VARINT),),
+    OpCode.SET_STRUCT_MEMBER.value: (encoding.Operand(encoding.VARINT),),
+    OpCode.LT.value: (),
+    OpCode.VEC.value: (encoding.Operand(encoding.VARINT),),
+    OpCode.VEC_ACCESS.value: (),
+    OpCode.MAP.value: (encoding.Operand(encoding.VARINT),),
+    OpCode.MAP_ACCESS.value: (),
+    OpCode.VEC_PUSH.value: (),
+    OpCode.VEC_LEN.value: (),
+    OpCode.VEC_POP.value: (),
+    OpCode.MAP_INSERT.value: (),
+    OpCode.READ_STR.value: (),
+    OpCode.READ_INT.value: (),
+    OpCode.TAIL_CALL.value: (encoding.Operand(encoding.VARINT),),
+    OpCode.STRING_CONST.value: (
+        encoding.Operand(encoding.VARINT),
+        encoding.Operand(encoding.U8, enumerated=True),
+    ),
+    OpCode.LOAD_CONST.value: (encoding.Operand(encoding.VARINT),),
+}
+
+
+# Where execution goes after an op.
+class Flow(Enum):
+    NEXT = 0x0
+    BRANCH = 0x1
+    JUMP = 0x2
+    RETURN = 0x3
+
+
+# Where execution goes after each op, keyed on the op's value.
+FLOW = {
+    OpCode.STRUCT_DEF.value: Flow.NEXT,
+    OpCode.FUNCTION_DEF.value: Flow.NEXT,
+    OpCode.SET_VAR.value: Flow.NEXT,
+    OpCode.GET_VAR.value: Flow.NEXT,
+    OpCode.CALL_FUNC.value: Flow.NEXT,
+    OpCode.RETURN.value: Flow.RETURN,
+    OpCode.RETURN_VAL.value: Flow.RETURN,
+    OpCode.ADD.value: Flow.NEXT,
+    OpCode.INT.value: Flow.NEXT,
+    OpCode.STRING.value: Flow.NEXT,
+    OpCode.SUBTRACT.value: Flow.NEXT,
+    OpCode.MULTIPLY.value: Flow.NEXT,
+    OpCode.DIVIDE.value: Flow.NEXT,
+    OpCode.FUNCTION_JMP.value: Flow.NEXT,
+    OpCode.HEADER_END.value: Flow.NEXT,
+    OpCode.PRINT.value: Flow.NEXT,
+    OpCode.EQ.value: Flow.NEXT,
+    OpCode.JUMP_IF_TRUE.value: Flow.BRANCH,
+    OpCode.JUMP_IF_FALSE.value: Flow.BRANCH,
+    OpCode.JUMP.value: Flow.JUMP,
+    OpCode.STRUCT.value: Flow.NEXT,
+    OpCode.GET_STRUCT_MEMBER.value: Flow.NEXT,
+    OpCode.SET_STRUCT_MEMBER.value: Flow.NEXT,
+    OpCode.LT.value: Flow.NEXT,
+    OpCode.VEC.value: Flow.NEXT,
+    OpCode.VEC_ACCESS.value: Flow.NEXT,
+    OpCode.MAP.value: Flow.NEXT,
+    OpCode.MAP_ACCESS.value: Flow.NEXT,
+    OpCode.VEC_PUSH.value: Flow.NEXT,
+    OpCode.VEC_LEN.value: Flow.NEXT,
+    OpCode.VEC_POP.value: Flow.NEXT,
+    OpCode.MAP_INSERT.value: Flow.NEXT,
+    OpCode.READ_STR.value: Flow.NEXT,
+    OpCode.READ_INT.value: Flow.NEXT,
+    OpCode.TAIL_CALL.value: Flow.RETURN,
+    OpCode.STRING_CONST.value: Flow.NEXT,
+    OpCode.LOAD_CONST.value: Flow.NEXT,
+}
+
+# How many values each op pops off the stack and pushes onto it, keyed on the op's value. A count is
+# either a number, a tuple of the index of the operand holding the count and how many values there are
+# for each one of it, or None when it depends on something that isn't part of the op such as how many
+# args the function being called takes.
+
+POPS = {
+    OpCode.STRUCT_DEF.value: 0,
+    OpCode.FUNCTION_DEF.value: (1, 1),
+    OpCode.SET_VAR.value: 1,
+    OpCode.GET_VAR.value: 0,
+    OpCode.CALL_FUNC.value: None,
+    OpCode.RETURN.value: 0,
+    OpCode.RETURN_VAL.value: 1,
+    OpCode.ADD.value: 2,
+    OpCode.INT.value: 0,
+    OpCode.STRING.value: 0,
+    OpCode.SUBTRACT.value: 2,
+    OpCode.MULTIPLY.value: 2,
+    OpCode.DIVIDE.value: 2,
+    OpCode.FUNCTION_JMP.value: 0,
+    OpCode.HEADER_END.value: 0,
+    OpCode.PRINT.value: 1,
+    OpCode.EQ.value: 2,
+    OpCode.JUMP_IF_TRUE.value: 1,
+    OpCode.JUMP_IF_FALSE.value: 1,
+    OpCode.JUMP.value: 0,
+    OpCode.STRUCT.value: None,
+    OpCode.GET_STRUCT_MEMBER.value: 1,
+    OpCode.SET_STRUCT_MEMBER.value: 2,
+    OpCode.LT.value: 2,
+    OpCode.VEC.value: (0, 1),
+    OpCode.VEC_ACCESS.value: 2,
+    OpCode.MAP.value: (0, 2),
+    OpCode.MAP_ACCESS.value: 2,
+    OpCode.VEC_PUSH.value: 2,
+    OpCode.VEC_LEN.value: 1,
+    OpCode.VEC_POP.value: 1,
+    OpCode.MAP_INSERT.value: 3,
+    OpCode.READ_STR.value: 0,
+    OpCode.READ_INT.value: 0,
+    OpCode.TAIL_CALL.value: None,
+    OpCode.STRING_CONST.value: 0,
+    OpCode.LOAD_CONST.value: 0,
+}
+PUSHES = {
+    OpCode.STRUCT_DEF.value: 0,
+    OpCode.FUNCTION_DEF.value: 0,
+    OpCode.SET_VAR.value: 0,
+    OpCode.GET_VAR.value: 1,
+    OpCode.CALL_FUNC.value: None,
+    OpCode.RETURN.value: 0,
+    OpCode.RETURN_VAL.value: 0,
+    OpCode.ADD.value: 1,
+    OpCode.INT.value: 1,
+    OpCode.STRING.value: 1,
+    OpCode.SUBTRACT.value: 1,
+    OpCode.MULTIPLY.value: 1,
+    OpCode.DIVIDE.value: 1,
+    OpCode.FUNCTION_JMP.value: 0,
+    OpCode.HEADER_END.value: 0,
+    OpCode.PRINT.value: 0,
+    OpCode.EQ.value: 1,
+    OpCode.JUMP_IF_TRUE.value: 0,
+    OpCode.JUMP_IF_FALSE.value: 0,
+    OpCode.JUMP.value: 0,
+    OpCode.STRUCT.value: 1,
+    OpCode.GET_STRUCT_MEMBER.value: 1,
+    OpCode.SET_STRUCT_MEMBER.value: 0,
+    OpCode.LT.value: 1,
+    OpCode.VEC.value: 1,
+    OpCode.VEC_ACCESS.value: 1,
+    OpCode.MAP.value: 1,
+    OpCode.MAP_ACCESS.value: 1,
+    OpCode.VEC_PUSH.value: 0,
+    OpCode.VEC_LEN.value: 1,
+    OpCode.VEC_POP.value: 0,
+    OpCode.MAP_INSERT.value: 0,
+    OpCode.READ_STR.value: 1,
+    OpCode.READ_INT.value: 1,
+    OpCode.TAIL_CALL.value: None,
+    OpCode.STRING_CONST.value: 0,
+    OpCode.LOAD_CONST.value: 1,
+}
+
+
+# How many values an op pops and pushes given its operands. Either count is None when it can't be
+# worked out from the op alone.
+def stack_effect(op, operands):
+    return _count(POPS[op], operands), _count(PUSHES[op], operands)
+
+
+def _count(count, operands):
+    if isinstance(count, tuple):
+        index, scale = count
+        return operands[index] * scale
+    return count
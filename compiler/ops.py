@@ -1,5 +1,7 @@
 # Generated by glacierdsl - DO NOT EDIT.
 
+import struct
+from compiler import encoding
 from enum import Enum
 
 
@@ -38,6 +40,304 @@ class OpCode(Enum):
     MAP_INSERT = 0x1F
     READ_STR = 0x20
     READ_INT = 0x21
+    TAIL_CALL = 0x22
+    STRING_CONST = 0x23
+    LOAD_CONST = 0x24
+
+
+OP_STRUCT_DEF = 0x0
+OP_FUNCTION_DEF = 0x1
+OP_SET_VAR = 0x2
+OP_GET_VAR = 0x3
+OP_CALL_FUNC = 0x4
+OP_RETURN = 0x5
+OP_RETURN_VAL = 0x6
+OP_ADD = 0x7
+OP_INT = 0x8
+OP_STRING = 0x9
+OP_SUBTRACT = 0xA
+OP_MULTIPLY = 0xB
+OP_DIVIDE = 0xC
+OP_FUNCTION_JMP = 0xD
+OP_HEADER_END = 0xE
+OP_PRINT = 0xF
+OP_EQ = 0x10
+OP_JUMP_IF_TRUE = 0x11
+OP_JUMP_IF_FALSE = 0x12
+OP_JUMP = 0x13
+OP_STRUCT = 0x14
+OP_GET_STRUCT_MEMBER = 0x15
+OP_SET_STRUCT_MEMBER = 0x16
+OP_LT = 0x17
+OP_VEC = 0x18
+OP_VEC_ACCESS = 0x19
+OP_MAP = 0x1A
+OP_MAP_ACCESS = 0x1B
+OP_VEC_PUSH = 0x1C
+OP_VEC_LEN = 0x1D
+OP_VEC_POP = 0x1E
+OP_MAP_INSERT = 0x1F
+OP_READ_STR = 0x20
+OP_READ_INT = 0x21
+OP_TAIL_CALL = 0x22
+OP_STRING_CONST = 0x23
+OP_LOAD_CONST = 0x24
+_JUMP_IF_TRUE = struct.Struct("<BI")
+_JUMP_IF_FALSE = struct.Struct("<BI")
+_JUMP = struct.Struct("<BI")
+
+
+def emit_struct_def(bc, type_id, member_id):
+    buf = bc.header
+    buf.append(OP_STRUCT_DEF)
+    if 0 <= type_id < 0x80:
+        buf.append(type_id)
+    else:
+        encoding.encode(encoding.VARINT, type_id, buf)
+    elements = member_id
+    encoding.encode(encoding.VARINT, len(elements), buf)
+    buf.extend(elements)
+
+
+def emit_function_def(bc, function_id, num_args):
+    buf = bc.buf
+    buf.append(OP_FUNCTION_DEF)
+    if 0 <= function_id < 0x80:
+        buf.append(function_id)
+    else:
+        encoding.encode(encoding.VARINT, function_id, buf)
+    if 0 <= num_args < 0x80:
+        buf.append(num_args)
+    else:
+        encoding.encode(encoding.VARINT, num_args, buf)
+
+
+def emit_set_var(bc, variable_id):
+    buf = bc.buf
+    buf.append(OP_SET_VAR)
+    if 0 <= variable_id < 0x80:
+        buf.append(variable_id)
+    else:
+        encoding.encode(encoding.VARINT, variable_id, buf)
+
+
+def emit_get_var(bc, variable_id):
+    buf = bc.buf
+    buf.append(OP_GET_VAR)
+    if 0 <= variable_id < 0x80:
+        buf.append(variable_id)
+    else:
+        encoding.encode(encoding.VARINT, variable_id, buf)
+
+
+def emit_call_func(bc, function_id):
+    buf = bc.buf
+    buf.append(OP_CALL_FUNC)
+    if 0 <= function_id < 0x80:
+        buf.append(function_id)
+    else:
+        encoding.encode(encoding.VARINT, function_id, buf)
+
+
+def emit_return(bc):
+    bc.buf.append(OP_RETURN)
+
+
+def emit_return_val(bc):
+    bc.buf.append(OP_RETURN_VAL)
+
+
+def emit_add(bc):
+    bc.buf.append(OP_ADD)
+
+
+def emit_int(bc, value):
+    buf = bc.buf
+    buf.append(OP_INT)
+    if 0 <= value < 0x80:
+        buf.append(value)
+    else:
+        encoding.encode(encoding.VARINT, value, buf)
+
+
+def emit_string(bc, bytes):
+    buf = bc.buf
+    buf.append(OP_STRING)
+    elements = bytes.encode("utf-8")
+    encoding.encode(encoding.VARINT, len(elements), buf)
+    buf.extend(elements)
+
+
+def emit_subtract(bc):
+    bc.buf.append(OP_SUBTRACT)
+
+
+def emit_multiply(bc):
+    bc.buf.append(OP_MULTIPLY)
+
+
+def emit_divide(bc):
+    bc.buf.append(OP_DIVIDE)
+
+
+def emit_function_jmp(bc, function_id, offset):
+    buf = bc.header
+    buf.append(OP_FUNCTION_JMP)
+    if 0 <= function_id < 0x80:
+        buf.append(function_id)
+    else:
+        encoding.encode(encoding.VARINT, function_id, buf)
+    if 0 <= offset < 0x80:
+        buf.append(offset)
+    else:
+        encoding.encode(encoding.VARINT, offset, buf)
+
+
+def emit_header_end(bc):
+    bc.buf.append(OP_HEADER_END)
+
+
+def emit_print(bc):
+    bc.buf.append(OP_PRINT)
+
+
+def emit_eq(bc):
+    bc.buf.append(OP_EQ)
+
+
+def emit_jump_if_true(bc, offset):
+    bc.buf += _JUMP_IF_TRUE.pack(OP_JUMP_IF_TRUE, offset)
+
+
+def patch_jump_if_true(bc, at, offset):
+    _JUMP_IF_TRUE.pack_into(bc.buf, at, OP_JUMP_IF_TRUE, offset)
+
+
+def emit_jump_if_false(bc, offset):
+    bc.buf += _JUMP_IF_FALSE.pack(OP_JUMP_IF_FALSE, offset)
+
+
+def patch_jump_if_false(bc, at, offset):
+    _JUMP_IF_FALSE.pack_into(bc.buf, at, OP_JUMP_IF_FALSE, offset)
+
+
+def emit_jump(bc, offset):
+    bc.buf += _JUMP.pack(OP_JUMP, offset)
+
+
+def patch_jump(bc, at, offset):
+    _JUMP.pack_into(bc.buf, at, OP_JUMP, offset)
+
+
+def emit_struct(bc, struct_id):
+    buf = bc.buf
+    buf.append(OP_STRUCT)
+    if 0 <= struct_id < 0x80:
+        buf.append(struct_id)
+    else:
+        encoding.encode(encoding.VARINT, struct_id, buf)
+
+
+def emit_get_struct_member(bc, member_index):
+    buf = bc.buf
+    buf.append(OP_GET_STRUCT_MEMBER)
+    if 0 <= member_index < 0x80:
+        buf.append(member_index)
+    else:
+        encoding.encode(encoding.VARINT, member_index, buf)
+
+
+def emit_set_struct_member(bc, member_index):
+    buf = bc.buf
+    buf.append(OP_SET_STRUCT_MEMBER)
+    if 0 <= member_index < 0x80:
+        buf.append(member_index)
+    else:
+        encoding.encode(encoding.VARINT, member_index, buf)
+
+
+def emit_lt(bc):
+    bc.buf.append(OP_LT)
+
+
+def emit_vec(bc, size):
+    buf = bc.buf
+    buf.append(OP_VEC)
+    if 0 <= size < 0x80:
+        buf.append(size)
+    else:
+        encoding.encode(encoding.VARINT, size, buf)
+
+
+def emit_vec_access(bc):
+    bc.buf.append(OP_VEC_ACCESS)
+
+
+def emit_map(bc, size):
+    buf = bc.buf
+    buf.append(OP_MAP)
+    if 0 <= size < 0x80:
+        buf.append(size)
+    else:
+        encoding.encode(encoding.VARINT, size, buf)
+
+
+def emit_map_access(bc):
+    bc.buf.append(OP_MAP_ACCESS)
+
+
+def emit_vec_push(bc):
+    bc.buf.append(OP_VEC_PUSH)
+
+
+def emit_vec_len(bc):
+    bc.buf.append(OP_VEC_LEN)
+
+
+def emit_vec_pop(bc):
+    bc.buf.append(OP_VEC_POP)
+
+
+def emit_map_insert(bc):
+    bc.buf.append(OP_MAP_INSERT)
+
+
+def emit_read_str(bc):
+    bc.buf.append(OP_READ_STR)
+
+
+def emit_read_int(bc):
+    bc.buf.append(OP_READ_INT)
+
+
+def emit_tail_call(bc, function_id):
+    buf = bc.buf
+    buf.append(OP_TAIL_CALL)
+    if 0 <= function_id < 0x80:
+        buf.append(function_id)
+    else:
+        encoding.encode(encoding.VARINT, function_id, buf)
+
+
+def emit_string_const(bc, const_id, bytes):
+    buf = bc.header
+    buf.append(OP_STRING_CONST)
+    if 0 <= const_id < 0x80:
+        buf.append(const_id)
+    else:
+        encoding.encode(encoding.VARINT, const_id, buf)
+    elements = bytes.encode("utf-8")
+    encoding.encode(encoding.VARINT, len(elements), buf)
+    buf.extend(elements)
+
+
+def emit_load_const(bc, const_id):
+    buf = bc.buf
+    buf.append(OP_LOAD_CONST)
+    if 0 <= const_id < 0x80:
+        buf.append(const_id)
+    else:
+        encoding.encode(encoding.VARINT, const_id, buf)
 
 
 class StructDef:
@@ -47,11 +347,7 @@ class StructDef:
         self.member_id = member_id
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.type_id)
-        args.append(len(self.member_id))
-        args.extend(self.member_id)
-        bc.write_header(OpCode.STRUCT_DEF, args)
+        emit_struct_def(bc, self.type_id, self.member_id)
         return self
 
 
@@ -62,24 +358,7 @@ class FunctionDef:
         self.num_args = num_args
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.function_id)
-        args.append(self.num_args)
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.FUNCTION_DEF, args)
-        else:
-            bc.write_op(OpCode.FUNCTION_DEF, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF, 0xFF]
-        bc.write_op(OpCode.FUNCTION_DEF, args)
-        return self
-
-    def assign(self, function_id, num_args):
-        self.function_id = function_id
-        self.num_args = num_args
+        emit_function_def(bc, self.function_id, self.num_args)
         return self
 
 
@@ -89,22 +368,7 @@ class SetVar:
         self.variable_id = variable_id
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.variable_id)
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.SET_VAR, args)
-        else:
-            bc.write_op(OpCode.SET_VAR, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.SET_VAR, args)
-        return self
-
-    def assign(self, variable_id):
-        self.variable_id = variable_id
+        emit_set_var(bc, self.variable_id)
         return self
 
 
@@ -114,22 +378,7 @@ class GetVar:
         self.variable_id = variable_id
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.variable_id)
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.GET_VAR, args)
-        else:
-            bc.write_op(OpCode.GET_VAR, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.GET_VAR, args)
-        return self
-
-    def assign(self, variable_id):
-        self.variable_id = variable_id
+        emit_get_var(bc, self.variable_id)
         return self
 
 
@@ -139,22 +388,7 @@ class CallFunc:
         self.function_id = function_id
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.function_id)
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.CALL_FUNC, args)
-        else:
-            bc.write_op(OpCode.CALL_FUNC, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.CALL_FUNC, args)
-        return self
-
-    def assign(self, function_id):
-        self.function_id = function_id
+        emit_call_func(bc, self.function_id)
         return self
 
 
@@ -163,8 +397,7 @@ class Return:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.RETURN, args)
+        emit_return(bc)
         return self
 
 
@@ -173,8 +406,7 @@ class ReturnVal:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.RETURN_VAL, args)
+        emit_return_val(bc)
         return self
 
 
@@ -183,8 +415,7 @@ class Add:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.ADD, args)
+        emit_add(bc)
         return self
 
 
@@ -194,22 +425,7 @@ class Int:
         self.value = value
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.value)
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.INT, args)
-        else:
-            bc.write_op(OpCode.INT, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.INT, args)
-        return self
-
-    def assign(self, value):
-        self.value = value
+        emit_int(bc, self.value)
         return self
 
 
@@ -219,23 +435,7 @@ class String:
         self.bytes = bytes
 
     def serialise(self, bc):
-        args = list()
-        args.append(len(self.bytes))
-        args.extend(bytes(self.bytes, "utf-8"))
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.STRING, args)
-        else:
-            bc.write_op(OpCode.STRING, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.STRING, args)
-        return self
-
-    def assign(self, bytes):
-        self.bytes = bytes
+        emit_string(bc, self.bytes)
         return self
 
 
@@ -244,8 +444,7 @@ class Subtract:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.SUBTRACT, args)
+        emit_subtract(bc)
         return self
 
 
@@ -254,8 +453,7 @@ class Multiply:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.MULTIPLY, args)
+        emit_multiply(bc)
         return self
 
 
@@ -264,8 +462,7 @@ class Divide:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.DIVIDE, args)
+        emit_divide(bc)
         return self
 
 
@@ -276,10 +473,7 @@ class FunctionJmp:
         self.offset = offset
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.function_id)
-        args.append(self.offset)
-        bc.write_header(OpCode.FUNCTION_JMP, args)
+        emit_function_jmp(bc, self.function_id, self.offset)
         return self
 
 
@@ -288,8 +482,7 @@ class HeaderEnd:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.HEADER_END, args)
+        emit_header_end(bc)
         return self
 
 
@@ -298,8 +491,7 @@ class Print:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.PRINT, args)
+        emit_print(bc)
         return self
 
 
@@ -308,8 +500,7 @@ class Eq:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.EQ, args)
+        emit_eq(bc)
         return self
 
 
@@ -319,18 +510,15 @@ class JumpIfTrue:
         self.offset = offset
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.offset)
         if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.JUMP_IF_TRUE, args)
+            patch_jump_if_true(bc, self._offset, self.offset)
         else:
-            bc.write_op(OpCode.JUMP_IF_TRUE, args)
+            emit_jump_if_true(bc, self.offset)
         return self
 
     def reserve(self, bc):
         self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.JUMP_IF_TRUE, args)
+        emit_jump_if_true(bc, 0)
         return self
 
     def assign(self, offset):
@@ -344,18 +532,15 @@ class JumpIfFalse:
         self.offset = offset
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.offset)
         if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.JUMP_IF_FALSE, args)
+            patch_jump_if_false(bc, self._offset, self.offset)
         else:
-            bc.write_op(OpCode.JUMP_IF_FALSE, args)
+            emit_jump_if_false(bc, self.offset)
         return self
 
     def reserve(self, bc):
         self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.JUMP_IF_FALSE, args)
+        emit_jump_if_false(bc, 0)
         return self
 
     def assign(self, offset):
@@ -369,18 +554,15 @@ class Jump:
         self.offset = offset
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.offset)
         if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.JUMP, args)
+            patch_jump(bc, self._offset, self.offset)
         else:
-            bc.write_op(OpCode.JUMP, args)
+            emit_jump(bc, self.offset)
         return self
 
     def reserve(self, bc):
         self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.JUMP, args)
+        emit_jump(bc, 0)
         return self
 
     def assign(self, offset):
@@ -394,22 +576,7 @@ class Struct:
         self.struct_id = struct_id
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.struct_id)
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.STRUCT, args)
-        else:
-            bc.write_op(OpCode.STRUCT, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.STRUCT, args)
-        return self
-
-    def assign(self, struct_id):
-        self.struct_id = struct_id
+        emit_struct(bc, self.struct_id)
         return self
 
 
@@ -419,22 +586,7 @@ class GetStructMember:
         self.member_index = member_index
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.member_index)
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.GET_STRUCT_MEMBER, args)
-        else:
-            bc.write_op(OpCode.GET_STRUCT_MEMBER, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.GET_STRUCT_MEMBER, args)
-        return self
-
-    def assign(self, member_index):
-        self.member_index = member_index
+        emit_get_struct_member(bc, self.member_index)
         return self
 
 
@@ -444,22 +596,7 @@ class SetStructMember:
         self.member_index = member_index
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.member_index)
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.SET_STRUCT_MEMBER, args)
-        else:
-            bc.write_op(OpCode.SET_STRUCT_MEMBER, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.SET_STRUCT_MEMBER, args)
-        return self
-
-    def assign(self, member_index):
-        self.member_index = member_index
+        emit_set_struct_member(bc, self.member_index)
         return self
 
 
@@ -468,8 +605,7 @@ class Lt:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.LT, args)
+        emit_lt(bc)
         return self
 
 
@@ -479,22 +615,7 @@ class Vec:
         self.size = size
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.size)
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.VEC, args)
-        else:
-            bc.write_op(OpCode.VEC, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.VEC, args)
-        return self
-
-    def assign(self, size):
-        self.size = size
+        emit_vec(bc, self.size)
         return self
 
 
@@ -503,8 +624,7 @@ class VecAccess:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.VEC_ACCESS, args)
+        emit_vec_access(bc)
         return self
 
 
@@ -514,22 +634,7 @@ class Map:
         self.size = size
 
     def serialise(self, bc):
-        args = list()
-        args.append(self.size)
-        if self._offset is not None:
-            bc.edit_op(self._offset, OpCode.MAP, args)
-        else:
-            bc.write_op(OpCode.MAP, args)
-        return self
-
-    def reserve(self, bc):
-        self._offset = bc.current_offset()
-        args = [0xFF]
-        bc.write_op(OpCode.MAP, args)
-        return self
-
-    def assign(self, size):
-        self.size = size
+        emit_map(bc, self.size)
         return self
 
 
@@ -538,8 +643,7 @@ class MapAccess:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.MAP_ACCESS, args)
+        emit_map_access(bc)
         return self
 
 
@@ -548,8 +652,7 @@ class VecPush:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.VEC_PUSH, args)
+        emit_vec_push(bc)
         return self
 
 
@@ -558,8 +661,7 @@ class VecLen:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.VEC_LEN, args)
+        emit_vec_len(bc)
         return self
 
 
@@ -568,8 +670,7 @@ class VecPop:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.VEC_POP, args)
+        emit_vec_pop(bc)
         return self
 
 
@@ -578,8 +679,7 @@ class MapInsert:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.MAP_INSERT, args)
+        emit_map_insert(bc)
         return self
 
 
@@ -588,8 +688,7 @@ class ReadStr:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.READ_STR, args)
+        emit_read_str(bc)
         return self
 
 
@@ -598,6 +697,36 @@ class ReadInt:
         pass
 
     def serialise(self, bc):
-        args = list()
-        bc.write_op(OpCode.READ_INT, args)
+        emit_read_int(bc)
+        return self
+
+
+class TailCall:
+    def __init__(self, function_id=None):
+        self._offset = None
+        self.function_id = function_id
+
+    def serialise(self, bc):
+        emit_tail_call(bc, self.function_id)
+        return self
+
+
+class StringConst:
+    def __init__(self, const_id=None, bytes=None):
+        self._offset = None
+        self.const_id = const_id
+        self.bytes = bytes
+
+    def serialise(self, bc):
+        emit_string_const(bc, self.const_id, self.bytes)
+        return self
+
+
+class LoadConst:
+    def __init__(self, const_id=None):
+        self._offset = None
+        self.const_id = const_id
+
+    def serialise(self, bc):
+        emit_load_const(bc, self.const_id)
         return self
@@ -1,13 +1,31 @@
 import compiler.ast as ast
 from compiler.lexer import TokenType
 
+# How tightly each binary operator binds to its operands.
+BINARY_OPERATORS = {
+    TokenType.ASSIGN: 1,
+    TokenType.EQUALS: 2,
+    TokenType.NOT_EQUALS: 2,
+    TokenType.LESS_THAN: 3,
+    TokenType.LESS_THAN_EQ: 3,
+    TokenType.GREATER_THAN: 3,
+    TokenType.GREATER_THAN_EQ: 3,
+    TokenType.ADD: 4,
+    TokenType.SUBTRACT: 4,
+    TokenType.MULTIPLY: 5,
+    TokenType.DIVIDE: 5,
+}
+
 
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
-        self.pos = 0
-        assert len(self.tokens) > 0
-        self.cur_tok = self.tokens[0]
+    def __init__(self, tokens, nodes=ast):
+        # Tokens can come from any iterable, such as Lexer.tokens(). We only ever look at the current
+        # token so they're pulled in one at a time and dropped as soon as they've been parsed.
+        self.tokens = iter(tokens)
+        # Where AST nodes get constructed. Either the ast module itself or an ASTArena.
+        self.nodes = nodes
+        self.cur_tok = next(self.tokens, None)
+        assert self.cur_tok is not None
 
     def parse_top_level_expr(self):
         # Parse top level expressions.
@@ -19,16 +37,16 @@ class Parser:
         # If we get down here, it should be EOF.
         # If not, then this is malformed.
         if not self._consume_token(TokenType.EOF):
-            raise RuntimeError("unrecognised top level expr: Token=({0})".format(self.cur_tok))
+            raise RuntimeError(
+                "unrecognised top level expr at {0}: Token=({1})".format(
+                    self._location(), self.cur_tok
+                )
+            )
 
         return None
 
     def _next_token(self):
-        self.pos += 1
-        if self.pos < len(self.tokens):
-            self.cur_tok = self.tokens[self.pos]
-        else:
-            self.cur_tok = None
+        self.cur_tok = next(self.tokens, None)
 
     def _consume_token(self, token_type):
         if self.cur_tok is None or self.cur_tok.type != token_type:
@@ -39,11 +57,19 @@ class Parser:
     def _expect_token(self, token_type):
         if not self._consume_token(token_type):
             raise RuntimeError(
-                "unexpected token: Got=({0}), Expected=({1})".format(self.cur_tok.type, token_type)
+                "unexpected token at {0}: Got=({1}), Expected=({2})".format(
+                    self._location(), self.cur_tok.type, token_type
+                )
             )
 
+    def _location(self):
+        # Tokens that weren't produced by a lexer don't know where they are in the source.
+        if self.cur_tok is None or self.cur_tok.source is None:
+            return "unknown location"
+        return "line {0}, column {1}".format(self.cur_tok.line, self.cur_tok.column)
+
     def _parse_function(self, this=None):
-        f_name = self.cur_tok.value
+        f_tok = self.cur_tok
         self._expect_token(TokenType.IDENTIFIER)
         self._expect_token(TokenType.L_BRACKET)
 
@@ -69,10 +95,10 @@ class Parser:
         if this is not None:
             args.insert(0, this)
 
-        return ast.Function(f_name, args, statements, return_type)
+        return self.nodes.Function(f_tok.value, args, statements, return_type, f_tok.symbol)
 
     def _parse_structure(self):
-        s_name = self.cur_tok.value
+        s_tok = self.cur_tok
         self._expect_token(TokenType.IDENTIFIER)
         self._expect_token(TokenType.L_BRACE)
 
@@ -86,22 +112,22 @@ class Parser:
         member_functions = list()
         while self._consume_token(TokenType.FUNCTION):
             member_functions.append(
-                self._parse_function(("this", ast.Type(ast.TypeKind.USER, s_name)))
+                self._parse_function(("this", ast.Type(ast.TypeKind.USER, s_tok.value)))
             )
 
         self._expect_token(TokenType.R_BRACE)
         self._expect_token(TokenType.SEMICOLON)
-        return ast.Structure(s_name, members, member_functions)
+        return self.nodes.Structure(s_tok.value, members, member_functions, s_tok.symbol)
 
     def _parse_member(self):
         m_type = self._parse_type()
-        m_name = self.cur_tok.value
+        m_tok = self.cur_tok
         self._expect_token(TokenType.IDENTIFIER)
         default_value = None
         if self._consume_token(TokenType.ASSIGN):
             default_value = self._parse_primary_expr()
         self._expect_token(TokenType.SEMICOLON)
-        return ast.Member(m_name, m_type, default_value)
+        return self.nodes.Member(m_tok.value, m_type, default_value, m_tok.symbol)
 
     def _parse_type(self):
         if self._consume_token(TokenType.INT):
@@ -139,22 +165,22 @@ class Parser:
             return self._parse_expr_statement()
 
     def _parse_let(self):
-        v_name = self.cur_tok.value
+        v_tok = self.cur_tok
         self._expect_token(TokenType.IDENTIFIER)
         self._expect_token(TokenType.ASSIGN)
         v_expr = self._parse_expr()
         while not self._consume_token(TokenType.SEMICOLON):
             self._next_token()
-        return ast.LetStatement(v_name, v_expr)
+        return self.nodes.LetStatement(v_tok.value, v_expr, v_tok.symbol)
 
     def _parse_return(self):
         if self._consume_token(TokenType.SEMICOLON):
             # Returning void.
-            return ast.ReturnStatement(None)
+            return self.nodes.ReturnStatement(None)
         expr = self._parse_expr()
         while not self._consume_token(TokenType.SEMICOLON):
             self._next_token()
-        return ast.ReturnStatement(expr)
+        return self.nodes.ReturnStatement(expr)
 
     def _parse_if_statement(self):
         self._expect_token(TokenType.L_BRACKET)
@@ -172,7 +198,7 @@ class Parser:
             while not self._consume_token(TokenType.R_BRACE):
                 else_statements.append(self._parse_statement())
 
-        return ast.IfStatement(cond, then_statements, else_statements)
+        return self.nodes.IfStatement(cond, then_statements, else_statements)
 
     def _parse_while_loop(self):
         self._expect_token(TokenType.L_BRACKET)
@@ -185,92 +211,53 @@ class Parser:
         while not self._consume_token(TokenType.R_BRACE):
             loop_body.append(self._parse_statement())
 
-        return ast.WhileLoop(cond, loop_body)
+        return self.nodes.WhileLoop(cond, loop_body)
 
     def _parse_expr_statement(self):
         expr = self._parse_expr()
         while not self._consume_token(TokenType.SEMICOLON):
             self._next_token()
-        return ast.ExprStatement(expr)
-
-    def _parse_expr(self):
-        return self._parse_assignment()
-
-    def _parse_assignment(self):
-        lhs = self._parse_equality()
-        while True:
-            tok = self.cur_tok
-            if self._consume_token(TokenType.ASSIGN):
-                lhs = ast.BinaryOp(lhs, self._parse_equality(), tok)
-            else:
-                return lhs
-
-    def _parse_equality(self):
-        lhs = self._parse_relational()
-        while True:
-            tok = self.cur_tok
-            if self._consume_token(TokenType.EQUALS) or self._consume_token(TokenType.NOT_EQUALS):
-                lhs = ast.BinaryOp(lhs, self._parse_relational(), tok)
-            else:
-                return lhs
-
-    def _parse_relational(self):
-        lhs = self._parse_addition()
-        while True:
-            tok = self.cur_tok
-            if (
-                self._consume_token(TokenType.LESS_THAN)
-                or self._consume_token(TokenType.LESS_THAN_EQ)
-                or self._consume_token(TokenType.GREATER_THAN)
-                or self._consume_token(TokenType.GREATER_THAN_EQ)
-            ):
-                lhs = ast.BinaryOp(lhs, self._parse_addition(), tok)
-            else:
-                return lhs
+        return self.nodes.ExprStatement(expr)
 
-    def _parse_addition(self):
-        lhs = self._parse_multiplication()
-        while True:
-            tok = self.cur_tok
-            if self._consume_token(TokenType.ADD) or self._consume_token(TokenType.SUBTRACT):
-                lhs = ast.BinaryOp(lhs, self._parse_multiplication(), tok)
-            else:
-                return lhs
-
-    def _parse_multiplication(self):
+    def _parse_expr(self, min_binding_power=1):
+        # Precedence climbing over BINARY_OPERATORS. Operators that bind tighter are parsed by the
+        # recursive call, anything else is folded into lhs in the loop.
         lhs = self._parse_postfix()
         while True:
             tok = self.cur_tok
-            if self._consume_token(TokenType.MULTIPLY) or self._consume_token(TokenType.DIVIDE):
-                lhs = ast.BinaryOp(lhs, self._parse_primary_expr(), tok)
-            else:
+            binding_power = BINARY_OPERATORS.get(tok.type)
+            if binding_power is None or binding_power < min_binding_power:
                 return lhs
+            self._next_token()
+            # All binary operators are left associative.
+            rhs = self._parse_expr(binding_power + 1)
+            lhs = self.nodes.BinaryOp(lhs, rhs, tok)
 
     def _parse_postfix(self):
         expr = self._parse_primary_expr()
         while True:
             if self._consume_token(TokenType.DOT):
-                member_name = self.cur_tok.value
+                member_tok = self.cur_tok
                 self._expect_token(TokenType.IDENTIFIER)
                 if self._consume_token(TokenType.L_BRACKET):
-                    expr = self._parse_function_call(member_name, expr)
+                    expr = self._parse_function_call(member_tok, expr)
                 else:
-                    expr = ast.MemberAccess(expr, member_name)
+                    expr = self.nodes.MemberAccess(expr, member_tok.value, member_tok.symbol)
             if self._consume_token(TokenType.L_PAREN):
                 index = self._parse_expr()
                 self._expect_token(TokenType.R_PAREN)
-                expr = ast.Index(expr, index)
+                expr = self.nodes.Index(expr, index)
             else:
                 break
         return expr
 
     def _parse_primary_expr(self):
-        value = self.cur_tok.value
+        tok = self.cur_tok
         expr = None
         if self._consume_token(TokenType.NUMBER_LITERAL):
-            expr = ast.Number(int(value))
+            expr = self.nodes.Number(int(tok.value))
         elif self._consume_token(TokenType.STRING_LITERAL):
-            expr = ast.String(value)
+            expr = self.nodes.String(tok.value)
         elif self._consume_token(TokenType.L_PAREN):
             expr = self._parse_vector()
         elif self._consume_token(TokenType.L_BRACE):
@@ -279,10 +266,14 @@ class Parser:
             expr = self._parse_constructor()
         elif self._consume_token(TokenType.IDENTIFIER):
             if self._consume_token(TokenType.L_BRACKET):
-                return self._parse_function_call(value)
-            return ast.VariableRef(value)
+                return self._parse_function_call(tok)
+            return self.nodes.VariableRef(tok.value, tok.symbol)
         else:
-            raise RuntimeError("unrecognised primary expression: Token=({0})".format(self.cur_tok))
+            raise RuntimeError(
+                "unrecognised primary expression at {0}: Token=({1})".format(
+                    self._location(), self.cur_tok
+                )
+            )
         return expr
 
     def _parse_vector(self):
@@ -295,7 +286,7 @@ class Parser:
         self._expect_token(TokenType.LESS_THAN)
         container_type = self._parse_type()
         self._expect_token(TokenType.GREATER_THAN)
-        return ast.Vector(elements, container_type)
+        return self.nodes.Vector(elements, container_type)
 
     def _parse_map(self):
         elements = list()
@@ -313,20 +304,20 @@ class Parser:
         self._expect_token(TokenType.COMMA)
         value_type = self._parse_type()
         self._expect_token(TokenType.GREATER_THAN)
-        return ast.Map(elements, (key_type, value_type))
+        return self.nodes.Map(elements, (key_type, value_type))
 
     def _parse_constructor(self):
         params = list()
-        struct_name = self.cur_tok.value
+        struct_tok = self.cur_tok
         self._expect_token(TokenType.IDENTIFIER)
         self._expect_token(TokenType.L_BRACKET)
         while not self._consume_token(TokenType.R_BRACKET):
             if params:
                 self._expect_token(TokenType.COMMA)
             params.append(self._parse_expr())
-        return ast.Constructor(struct_name, params)
+        return self.nodes.Constructor(struct_tok.value, params, struct_tok.symbol)
 
-    def _parse_function_call(self, name, this=None):
+    def _parse_function_call(self, name_tok, this=None):
         args = list()
         while not self._consume_token(TokenType.R_BRACKET):
             if args:
@@ -334,4 +325,4 @@ class Parser:
             args.append(self._parse_expr())
         if this is not None:
             args.insert(0, this)
-        return ast.FunctionCall(name, args)
+        return self.nodes.FunctionCall(name_tok.value, args, name_tok.symbol)
@@ -1,33 +1,73 @@
-from .. import ast, lexer, ops
+from .. import ast, lexer, ops, symbols
+from .struct_defs import get_member
+
+# How many variables the VM has room for in each frame. This has to match MAX_FRAME_BINDINGS in
+# vm/Stack.h.
+MAX_FRAME_SIZE = 100
 
 
 class VariableStore:
     def __init__(self):
         self.clear()
 
-    def clear(self):
+    def clear(self, slots=None):
         self.bindings = dict()
-        self.current_id = 0
-
-    def register_variable(self, name):
-        if name in self.bindings:
-            raise RuntimeError("variable {0} declared twice".format(name))
-        new_id = self.current_id
-        self.bindings[name] = new_id
-        self.current_id += 1
+        # The slot that the slot allocator picked for each variable, if it's been run. Anything else
+        # goes after those slots.
+        self.slots = slots
+        self.current_id = 0 if not slots else max(slots.values()) + 1
+        # Variables that inlined function arguments are finished with. These are never handed out to
+        # let statements since a let can be read long after the inlined call that used the id.
+        self.free_ids = list()
+
+    def register_variable(self, symbol):
+        if symbol in self.bindings:
+            raise RuntimeError("variable {0} declared twice".format(symbols.name(symbol)))
+        if self.slots is not None:
+            new_id = self.slots[symbol]
+        else:
+            new_id = self.current_id
+            self.current_id += 1
+        self.bindings[symbol] = new_id
         return new_id
 
-    def get_variable(self, name):
-        if name not in self.bindings:
-            raise RuntimeError("reference to unrecognised variable {0}".format(name))
-        return self.bindings[name]
+    # Binds the arguments of an inlined function over the top of any variables with the same name. The
+    # returned state is passed to unbind_arguments once the inlined body has been generated.
+    def bind_arguments(self, arg_symbols):
+        state = self.bindings
+        self.bindings = dict(state)
+        ids = list()
+        for symbol in arg_symbols:
+            if self.free_ids:
+                new_id = self.free_ids.pop()
+            else:
+                new_id = self.current_id
+                self.current_id += 1
+            self.bindings[symbol] = new_id
+            ids.append(new_id)
+        return state, ids
+
+    def unbind_arguments(self, state, ids):
+        self.bindings = state
+        self.free_ids.extend(ids)
+
+    def get_variable(self, symbol):
+        variable_id = self.bindings.get(symbol)
+        if variable_id is None:
+            raise RuntimeError(
+                "reference to unrecognised variable {0}".format(symbols.name(symbol))
+            )
+        return variable_id
 
 
 class CodeGenerator(ast.ASTWalker):
     def __init__(self, bc, structs, intrinsics):
+        super().__init__()
         self.bc = bc
         self.structs = structs
         self.intrinsics = intrinsics
+        # Set while walking a call whose result is returned straight away.
+        self.tail_call = False
         self.functions = dict()
         self.function_id = 1
         self.variables = VariableStore()
@@ -35,27 +75,57 @@ class CodeGenerator(ast.ASTWalker):
 
     def _walk_structure(self, expr):
         for mf in expr.member_functions:
-            self._walk(mf)
+            yield mf
 
     def _walk_function(self, expr):
-        expr.function_id = self._allocate_function_id(expr.name)
-        self.functions[expr.name] = expr
+        if expr.dead:
+            return
+        expr.function_id = self._allocate_function_id(expr)
+        self.functions[expr.symbol] = expr
         expr.offset = self.bc.current_offset()
+        self.variables.clear(expr.slots)
         for a in expr.args:
-            self.variables.register_variable(a[0])
-        ops.FunctionDef(expr.function_id, len(expr.args)).serialise(self.bc)
-        for s in expr.statements:
-            self._walk(s)
-        self.variables.clear()
+            self.variables.register_variable(symbols.intern(a[0]))
+        ops.emit_function_def(self.bc, expr.function_id, len(expr.args))
+        yield from self._walk_statements(expr.statements)
+        expr.frame_size = self.variables.current_id
+        if expr.frame_size > MAX_FRAME_SIZE:
+            raise RuntimeError(
+                "function {} needs {} variable slots but the VM only has room for {}".format(
+                    expr.name, expr.frame_size, MAX_FRAME_SIZE
+                )
+            )
         # For functions returning void, there's an implicit return at the end of the function.
         assert expr.return_type is not None
         if expr.return_type.kind:
-            ops.Return().serialise(self.bc)
+            ops.emit_return(self.bc)
 
-    def _allocate_function_id(self, name):
-        if name in self.functions:
-            raise RuntimeError("duplicate function def {}".format(name))
-        if name == "main":
+    def _walk_statements(self, statements):
+        # Skip anything that dead code elimination found can never run.
+        for statement in statements:
+            if not statement.dead:
+                yield statement
+            else:
+                self._register_dead_lets(statement)
+
+    # Lets are scoped to the whole function so a variable declared in code that never runs can still be
+    # assigned and read elsewhere. Those variables are registered without emitting anything.
+    def _register_dead_lets(self, statement):
+        pending = [statement]
+        while pending:
+            statement = pending.pop()
+            if isinstance(statement, ast.LetStatement):
+                self.variables.register_variable(statement.symbol)
+            elif isinstance(statement, ast.IfStatement):
+                pending.extend(reversed(statement.else_statements))
+                pending.extend(reversed(statement.then_statements))
+            elif isinstance(statement, ast.WhileLoop):
+                pending.extend(reversed(statement.loop_body))
+
+    def _allocate_function_id(self, expr):
+        if expr.symbol in self.functions:
+            raise RuntimeError("duplicate function def {}".format(expr.name))
+        if expr.name == "main":
             return 0
         else:
             new_id = self.function_id
@@ -64,130 +134,154 @@ class CodeGenerator(ast.ASTWalker):
 
     def _walk_return_statement(self, expr):
         if expr.expr is None:
-            ops.Return().serialise(self.bc)
+            ops.emit_return(self.bc)
+        elif self._is_tail_call(expr.expr):
+            # The called function can return straight to our caller so let it reuse our frame.
+            self.tail_call = True
+            yield expr.expr
         else:
-            self._walk(expr.expr)
-            ops.ReturnVal().serialise(self.bc)
+            yield expr.expr
+            ops.emit_return_val(self.bc)
+
+    def _is_tail_call(self, expr):
+        return (
+            isinstance(expr, ast.FunctionCall)
+            and expr.inline is None
+            and not self.intrinsics.is_intrinsic(expr.symbol)
+            and expr.symbol in self.functions
+        )
 
     def _walk_number(self, expr):
-        ops.Int(expr.value).serialise(self.bc)
+        ops.emit_int(self.bc, expr.value)
 
     def _walk_string(self, expr):
-        ops.String(expr.value).serialise(self.bc)
+        # Strings are stored once in the header and loaded from there wherever they're used.
+        ops.emit_load_const(self.bc, self.bc.string_constant(expr.value))
 
     def _walk_vector(self, expr):
         for e in reversed(expr.elements):
-            self._walk(e)
-        ops.Vec(len(expr.elements)).serialise(self.bc)
+            yield e
+        ops.emit_vec(self.bc, len(expr.elements))
 
     def _walk_map(self, expr):
         for (key, value) in expr.elements:
-            self._walk(key)
-            self._walk(value)
-        ops.Map(len(expr.elements)).serialise(self.bc)
+            yield key
+            yield value
+        ops.emit_map(self.bc, len(expr.elements))
 
     def _walk_index(self, expr):
         # Walk the expr.
-        self._walk(expr.expr)
+        yield expr.expr
         # Now push the index to the stack.
-        self._walk(expr.index)
+        yield expr.index
         if expr.expr.ret_type.kind == ast.TypeKind.VECTOR:
-            ops.VecAccess().serialise(self.bc)
+            ops.emit_vec_access(self.bc)
         else:
             assert expr.expr.ret_type.kind == ast.TypeKind.MAP
-            ops.MapAccess().serialise(self.bc)
+            ops.emit_map_access(self.bc)
 
     def _walk_let_statement(self, expr):
-        self._walk(expr.rhs)
-        variable_id = self.variables.register_variable(expr.name)
-        ops.SetVar(variable_id).serialise(self.bc)
+        yield expr.rhs
+        variable_id = self.variables.register_variable(expr.symbol)
+        ops.emit_set_var(self.bc, variable_id)
 
     def _walk_if_statement(self, expr):
-        self._walk(expr.cond)
+        # If we know which branch is taken, there's no need to check.
+        # The other branch is all dead so walking it only registers its lets.
+        if expr.cond_value is not None:
+            yield from self._walk_statements(expr.then_statements)
+            yield from self._walk_statements(expr.else_statements)
+            return
+
+        yield expr.cond
 
         # Jump to "else" branch if the cond was false.
-        skip_then = ops.JumpIfFalse().reserve(self.bc)
+        skip_then = self.bc.current_offset()
+        ops.emit_jump_if_false(self.bc, 0)
 
-        for statement in expr.then_statements:
-            self._walk(statement)
+        yield from self._walk_statements(expr.then_statements)
 
         # Skip the else branch if we're executing "then".
-        skip_else = ops.Jump().reserve(self.bc)
+        skip_else = self.bc.current_offset()
+        ops.emit_jump(self.bc, 0)
 
         # Go back and edit the "else" jump.
         after_then = self.bc.current_offset()
-        skip_then.assign(after_then).serialise(self.bc)
+        ops.patch_jump_if_false(self.bc, skip_then, after_then)
 
-        for statement in expr.else_statements:
-            self._walk(statement)
+        yield from self._walk_statements(expr.else_statements)
 
         after_else = self.bc.current_offset()
-        skip_else.assign(after_else).serialise(self.bc)
+        ops.patch_jump(self.bc, skip_else, after_else)
 
     def _walk_while_loop(self, expr):
         # Every loop iteration is going to jump back up here.
         before_loop = self.bc.current_offset()
 
+        # If the cond is always true, the only way out of the loop is to return.
+        if expr.cond_value:
+            yield from self._walk_statements(expr.loop_body)
+            ops.emit_jump(self.bc, before_loop)
+            return
+
         # Eval the cond.
-        self._walk(expr.cond)
+        yield expr.cond
 
         # Jump out of the loop if the cond is false.
         # Come back and edit this when we know what bytecode offset the loop ends at.
-        skip_loop = ops.JumpIfFalse().reserve(self.bc)
+        skip_loop = self.bc.current_offset()
+        ops.emit_jump_if_false(self.bc, 0)
 
-        for statement in expr.loop_body:
-            self._walk(statement)
+        yield from self._walk_statements(expr.loop_body)
 
         # Jump back to the beginning of the loop and eval the cond again.
-        ops.Jump(before_loop).serialise(self.bc)
+        ops.emit_jump(self.bc, before_loop)
 
         after_loop_body = self.bc.current_offset()
-        skip_loop.assign(after_loop_body).serialise(self.bc)
+        ops.patch_jump_if_false(self.bc, skip_loop, after_loop_body)
 
     def _walk_binary_op(self, expr):
+        if expr.constant is not None:
+            ops.emit_int(self.bc, expr.constant)
+            return
+
         # We implement greater than by reversing the operands for less than.
         if expr.operator.type == lexer.TokenType.GREATER_THAN:
-            self._walk(expr.rhs)
-            self._walk(expr.lhs)
-            ops.Lt().serialise(self.bc)
+            yield expr.rhs
+            yield expr.lhs
+            ops.emit_lt(self.bc)
             return
 
         # If we're assigning to a variable, don't evaluate it.
         if expr.operator.type != lexer.TokenType.ASSIGN:
-            self._walk(expr.lhs)
-        self._walk(expr.rhs)
+            yield expr.lhs
+        yield expr.rhs
         if expr.operator.type == lexer.TokenType.ADD:
-            ops.Add().serialise(self.bc)
+            ops.emit_add(self.bc)
         elif expr.operator.type == lexer.TokenType.SUBTRACT:
-            ops.Subtract().serialise(self.bc)
+            ops.emit_subtract(self.bc)
         elif expr.operator.type == lexer.TokenType.MULTIPLY:
-            ops.Multiply().serialise(self.bc)
+            ops.emit_multiply(self.bc)
         elif expr.operator.type == lexer.TokenType.DIVIDE:
-            ops.Divide().serialise(self.bc)
+            ops.emit_divide(self.bc)
         elif expr.operator.type == lexer.TokenType.EQUALS:
-            ops.Eq().serialise(self.bc)
+            ops.emit_eq(self.bc)
         elif expr.operator.type == lexer.TokenType.LESS_THAN:
-            ops.Lt().serialise(self.bc)
+            ops.emit_lt(self.bc)
         elif expr.operator.type == lexer.TokenType.ASSIGN:
-            self._walk_assignment(expr)
+            yield from self._walk_assignment(expr)
         else:
             raise RuntimeError("invalid token type for binop: {0}".format(expr.operator))
 
     def _walk_assignment(self, expr):
         assert expr.operator.type == lexer.TokenType.ASSIGN
         if isinstance(expr.lhs, ast.VariableRef):
-            ops.SetVar(self.variables.get_variable(expr.lhs.name)).serialise(self.bc)
+            ops.emit_set_var(self.bc, self.variables.get_variable(expr.lhs.symbol))
         elif isinstance(expr.lhs, ast.MemberAccess):
-            self._walk(expr.lhs.expr)
-            # We've already done type deduction so we can do this properly later.
-            for _, s in self.structs.items():
-                i = 0
-                for m in s.members:
-                    if m.name == expr.lhs.member_name:
-                        ops.SetStructMember(i).serialise(self.bc)
-                        return
-                    i += 1
-            raise RuntimeError("couldn't find the right struct")
+            yield expr.lhs.expr
+            # Type checking has already made sure that the member exists.
+            index, _ = get_member(self.structs, expr.lhs.expr.ret_type, expr.lhs.symbol)
+            ops.emit_set_struct_member(self.bc, index)
         else:
             raise RuntimeError(
                 "lhs of an assignment must be either a variable ref or a struct member access: {}".format(
@@ -196,43 +290,55 @@ class CodeGenerator(ast.ASTWalker):
             )
 
     def _walk_variable(self, expr):
-        ops.GetVar(self.variables.get_variable(expr.name)).serialise(self.bc)
+        ops.emit_get_var(self.bc, self.variables.get_variable(expr.symbol))
 
     def _walk_constructor(self, expr):
         # Get the struct id.
-        if expr.struct_name not in self.structs:
+        struct_def = self.structs.get(expr.symbol)
+        if struct_def is None:
             raise RuntimeError("unrecognised struct name {0}".format(expr.struct_name))
-        struct_def = self.structs[expr.struct_name]
         # Codegen each argument to the ctor.
         for i in range(0, len(struct_def.members)):
             if i < len(expr.params):
-                self._walk(expr.params[i])
+                yield expr.params[i]
             else:
                 default_value = struct_def.members[i].default_value
                 assert default_value is not None
-                self._walk(default_value)
-        ops.Struct(struct_def.type_id).serialise(self.bc)
+                yield default_value
+        ops.emit_struct(self.bc, struct_def.type_id)
 
     def _walk_function_call(self, expr):
-        if self.intrinsics.is_intrinsic(expr.name):
-            self.intrinsics.codegen(expr, self)
+        if self.intrinsics.is_intrinsic(expr.symbol):
+            yield from self.intrinsics.codegen(expr, self)
+            return
+        if expr.inline is not None:
+            yield from self._walk_inlined_call(expr)
             return
-        if expr.name not in self.functions:
+        called_func = self.functions.get(expr.symbol)
+        if called_func is None:
             raise RuntimeError("reference to unrecognised function {0}.".format(expr.name))
+        tail_call, self.tail_call = self.tail_call, False
+        for arg in expr.args:
+            yield arg
+        if tail_call:
+            ops.emit_tail_call(self.bc, called_func.function_id)
+        else:
+            ops.emit_call_func(self.bc, called_func.function_id)
+
+    def _walk_inlined_call(self, expr):
+        # Store the arguments in fresh variables and then generate the returned expression in place of
+        # the call, with the arguments renamed to those variables.
+        callee = expr.inline
         for arg in expr.args:
-            self._walk(arg)
-        ops.CallFunc(self.functions[expr.name].function_id).serialise(self.bc)
+            yield arg
+        state, ids = self.variables.bind_arguments([symbols.intern(a[0]) for a in callee.args])
+        for variable_id in reversed(ids):
+            ops.emit_set_var(self.bc, variable_id)
+        yield callee.statements[0].expr
+        self.variables.unbind_arguments(state, ids)
 
     def _walk_member_access(self, expr):
         # Codegen to push the struct to the stack.
-        self._walk(expr.expr)
-        assert isinstance(expr.expr, ast.VariableRef)
-        # Just a temporary hack. I want to check that this works.
-        for _, s in self.structs.items():
-            i = 0
-            for m in s.members:
-                if m.name == expr.member_name:
-                    ops.GetStructMember(i).serialise(self.bc)
-                    return
-                i += 1
-        raise RuntimeError("couldn't find the right struct")
+        yield expr.expr
+        index, _ = get_member(self.structs, expr.expr.ret_type, expr.symbol)
+        ops.emit_get_struct_member(self.bc, index)
@@ -0,0 +1,72 @@
+from .. import ast, lexer
+
+# The VM does integer arithmetic on unsigned 64 bit ints.
+INT_MASK = (1 << 64) - 1
+
+
+def _fold_add(lhs, rhs):
+    return (lhs + rhs) & INT_MASK
+
+
+def _fold_subtract(lhs, rhs):
+    return (lhs - rhs) & INT_MASK
+
+
+def _fold_multiply(lhs, rhs):
+    return (lhs * rhs) & INT_MASK
+
+
+def _fold_divide(lhs, rhs):
+    # Leave division by zero for the VM to deal with.
+    if rhs == 0:
+        return None
+    return lhs // rhs
+
+
+def _fold_equals(lhs, rhs):
+    return 1 if lhs == rhs else 0
+
+
+def _fold_less_than(lhs, rhs):
+    return 1 if lhs < rhs else 0
+
+
+def _fold_greater_than(lhs, rhs):
+    return 1 if lhs > rhs else 0
+
+
+FOLDERS = {
+    lexer.TokenType.ADD: _fold_add,
+    lexer.TokenType.SUBTRACT: _fold_subtract,
+    lexer.TokenType.MULTIPLY: _fold_multiply,
+    lexer.TokenType.DIVIDE: _fold_divide,
+    lexer.TokenType.EQUALS: _fold_equals,
+    lexer.TokenType.LESS_THAN: _fold_less_than,
+    lexer.TokenType.GREATER_THAN: _fold_greater_than,
+}
+
+
+# The value of an expression if it's an integer constant, otherwise None.
+def constant_value(expr):
+    if isinstance(expr, ast.Number):
+        return expr.value
+    if isinstance(expr, ast.BinaryOp):
+        return expr.constant
+    return None
+
+
+# Works out the value of binary ops whose operands are all integer constants ahead of time. Folded
+# ops are annotated with their value and codegen emits that rather than the ops themselves.
+#
+# This runs after type checking so the tree is known to be well formed.
+class ConstantFolder(ast.TreeWalker):
+    def _walk_binary_op(self, expr):
+        yield from super()._walk_binary_op(expr)
+        fold = FOLDERS.get(expr.operator.type)
+        if fold is None:
+            return
+        lhs = constant_value(expr.lhs)
+        rhs = constant_value(expr.rhs)
+        if lhs is None or rhs is None:
+            return
+        expr.constant = fold(lhs, rhs)
@@ -0,0 +1,73 @@
+from .. import ast
+from .constant_fold import constant_value
+
+
+# The value of a condition if it's known at compile time. The VM only accepts 0 or 1 as a condition
+# so anything else is left to fail at runtime.
+def _cond_value(cond):
+    value = constant_value(cond)
+    if value == 0 or value == 1:
+        return value
+    return None
+
+
+# Marks statements that can never run as dead so that codegen skips them. That covers statements
+# after a return, branches of an if statement that a constant condition rules out and loops whose
+# condition is constant false.
+#
+# Statements are visited in order while keeping track of whether the current one is reachable. Since
+# there's no way to break out of a loop, nothing after a loop with a constant true condition is
+# reachable either. Statements are only marked at the top of a dead block since codegen only looks
+# inside for the lets that it still has to register.
+#
+# This runs after constant folding so that conditions like 1 == 1 are known.
+class DeadCodeEliminator(ast.ASTWalker):
+    def __init__(self):
+        super().__init__()
+        self.reachable = True
+
+    def _walk_structure(self, expr):
+        for mf in expr.member_functions:
+            yield mf
+
+    def _walk_function(self, expr):
+        self.reachable = True
+        yield from self._walk_statements(expr.statements)
+
+    def _walk_statements(self, statements):
+        for statement in statements:
+            if self.reachable:
+                yield statement
+            else:
+                statement.dead = True
+
+    def _walk_expr_statement(self, expr):
+        pass
+
+    def _walk_return_statement(self, expr):
+        self.reachable = False
+
+    def _walk_if_statement(self, expr):
+        expr.cond_value = _cond_value(expr.cond)
+        if expr.cond_value is not None:
+            live, dead = expr.then_statements, expr.else_statements
+            if not expr.cond_value:
+                live, dead = dead, live
+            for statement in dead:
+                statement.dead = True
+            yield from self._walk_statements(live)
+            return
+        yield from self._walk_statements(expr.then_statements)
+        then_reachable = self.reachable
+        self.reachable = True
+        yield from self._walk_statements(expr.else_statements)
+        self.reachable = self.reachable or then_reachable
+
+    def _walk_while_loop(self, expr):
+        expr.cond_value = _cond_value(expr.cond)
+        if expr.cond_value == 0:
+            expr.dead = True
+            return
+        yield from self._walk_statements(expr.loop_body)
+        # The loop can only be left by returning if the condition is always true.
+        self.reachable = not expr.cond_value
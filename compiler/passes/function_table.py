@@ -3,12 +3,15 @@ from .. import ast, ops
 
 class FunctionTable(ast.ASTWalker):
     def __init__(self, bc):
+        super().__init__()
         self.bc = bc
 
     def _walk_structure(self, expr):
         for mf in expr.member_functions:
-            self._walk(mf)
+            yield mf
 
     def _walk_function(self, expr):
-        assert hasattr(expr, "function_id") and hasattr(expr, "offset")
+        if expr.dead:
+            return
+        assert expr.function_id is not None and expr.offset is not None
         ops.FunctionJmp(expr.function_id, expr.offset).serialise(self.bc)
@@ -0,0 +1,78 @@
+from .. import ast
+from .codegen import CodeGenerator
+from .type_check import TypeChecker, TypeError
+
+
+# Type checks and generates code in a single walk over the AST rather than walking it once in
+# TypeChecker and then again in CodeGenerator.
+#
+# Each node is handled by running the TypeChecker and CodeGenerator walker methods for it side by
+# side. When the type checker visits a node's children, it visits the same ones in the same order as
+# codegen does, so whenever codegen yields a child, the type checker can be resumed once that child
+# has been visited. The type checker runs up until the first child that it needs before codegen
+# starts so that anything it sets up for the children, such as the argument types of a function, is
+# in place before they're visited.
+#
+# If the type checker doesn't look at a node's children, they only go through codegen, just like
+# they would if the passes were run separately.
+class FusedCodeGenerator(ast.ASTWalker):
+    def __init__(self, bc, structs, intrinsics):
+        super().__init__()
+        self.bc = bc
+        self.structs = structs
+        self.intrinsics = intrinsics
+        self.type_checker = TypeChecker(bc, structs, intrinsics)
+        self.codegen = CodeGenerator(bc, structs, intrinsics)
+
+    def walk_ast(self, top_level_exprs):
+        try:
+            super().walk_ast(top_level_exprs)
+        except TypeError:
+            raise
+        except Exception:
+            # When type checking runs as its own pass, type errors anywhere in the program are
+            # reported ahead of codegen errors. Type check the whole program again so that we report
+            # the same error.
+            TypeChecker(self.bc, self.structs, self.intrinsics).walk_ast(top_level_exprs)
+            raise
+        self.nodes_walked += self.codegen.nodes_walked
+        self.codegen.nodes_walked = 0
+
+    def _resolve_handler(self, expr):
+        if isinstance(expr, ast.Vector):
+            handler = FusedCodeGenerator._walk_vector
+        else:
+            type_check = self.type_checker._resolve_handler(expr)
+            codegen = self.codegen._resolve_handler(expr)
+
+            def handler(self, node):
+                type_check_walker = type_check(self.type_checker, node)
+                codegen_walker = codegen(self.codegen, node)
+                if codegen_walker is None:
+                    assert type_check_walker is None
+                    return None
+                if type_check_walker is None:
+                    return self._codegen_children(codegen_walker)
+                return self._fuse(type_check_walker, codegen_walker)
+
+        self._handlers[type(expr)] = handler
+        return handler
+
+    def _fuse(self, type_check, codegen):
+        pending = next(type_check, None)
+        for child in codegen:
+            yield child
+            if pending is not None:
+                pending = next(type_check, None)
+        assert pending is None
+
+    def _codegen_children(self, codegen):
+        for child in codegen:
+            self.codegen._walk(child)
+
+    def _walk_vector(self, expr):
+        # Codegen visits the elements in reverse order so type checking has to wait until they've all
+        # been visited.
+        yield from self.codegen._walk_vector(expr)
+        for _ in self.type_checker._walk_vector(expr):
+            pass
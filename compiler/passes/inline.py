@@ -0,0 +1,109 @@
+from .. import ast
+from .tree_shake import MAIN
+
+# The most AST nodes that a function body can have for it to be inlined.
+DEFAULT_INLINE_BUDGET = 8
+
+
+class _NodeCounter(ast.TreeWalker):
+    pass
+
+
+# Returns the expression that a function returns if that's all the function does.
+def _returned_expr(function):
+    if len(function.statements) != 1:
+        return None
+    statement = function.statements[0]
+    if not isinstance(statement, ast.ReturnStatement):
+        return None
+    return statement.expr
+
+
+# Finds calls to functions that are small enough to be inlined and annotates them with the function
+# being called so that codegen generates the function's body in place of the call. Only functions
+# that do nothing but return an expression are inlined and functions that can end up calling
+# themselves through other inlined functions never are.
+#
+# Functions that aren't called anywhere else once their calls have been inlined are marked as dead.
+#
+# This runs after tree shaking and dead code elimination so that only code that is going to be
+# emitted is considered.
+class Inliner(ast.TreeWalker):
+    def __init__(self, budget=DEFAULT_INLINE_BUDGET):
+        super().__init__()
+        self.budget = budget
+        self.candidates = dict()
+        # The symbols of the functions that each candidate calls.
+        self.calls = dict()
+        # How many calls to each function are left after inlining.
+        self.remaining_calls = dict()
+        self.current = None
+        self.inlining = False
+        self.counters = {"calls_inlined": 0, "functions_removed": 0}
+
+    def walk_ast(self, top_level_exprs):
+        if self.budget <= 0:
+            return
+        # Find the candidates, drop any that are recursive and then annotate the calls to the rest.
+        super().walk_ast(top_level_exprs)
+        for symbol in self._recursive():
+            del self.candidates[symbol]
+        self.inlining = True
+        super().walk_ast(top_level_exprs)
+        for symbol, function in self.candidates.items():
+            if not self.remaining_calls.get(symbol):
+                function.dead = True
+                self.counters["functions_removed"] += 1
+
+    def _walk_structure(self, expr):
+        if expr.dead:
+            return
+        yield from super()._walk_structure(expr)
+
+    def _walk_function(self, expr):
+        if expr.dead:
+            return
+        self.current = expr.symbol
+        if not self.inlining:
+            self._add_candidate(expr)
+        yield from super()._walk_function(expr)
+
+    def _add_candidate(self, expr):
+        returned_expr = _returned_expr(expr)
+        if expr.symbol == MAIN or returned_expr is None:
+            return
+        counter = _NodeCounter()
+        counter.walk_ast([returned_expr])
+        if counter.nodes_walked <= self.budget:
+            self.candidates[expr.symbol] = expr
+            self.calls[expr.symbol] = set()
+
+    def _walk_function_call(self, expr):
+        if not self.inlining:
+            if self.current in self.calls:
+                self.calls[self.current].add(expr.symbol)
+        else:
+            callee = self.candidates.get(expr.symbol)
+            if callee is not None and len(callee.args) == len(expr.args):
+                expr.inline = callee
+                self.counters["calls_inlined"] += 1
+            else:
+                self.remaining_calls[expr.symbol] = self.remaining_calls.get(expr.symbol, 0) + 1
+        yield from super()._walk_function_call(expr)
+
+    def _recursive(self):
+        # Any candidate that can reach itself through calls to other candidates.
+        recursive = list()
+        for symbol in self.candidates:
+            seen = set()
+            pending = list(self.calls[symbol])
+            while pending:
+                callee = pending.pop()
+                if callee == symbol:
+                    recursive.append(symbol)
+                    break
+                if callee in seen or callee not in self.candidates:
+                    continue
+                seen.add(callee)
+                pending.extend(self.calls[callee])
+        return recursive
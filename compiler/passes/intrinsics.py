@@ -1,5 +1,5 @@
 from compiler.passes.type_check import TypeError
-from .. import ast, ops
+from .. import ast, ops, symbols
 
 
 class IntrinsicFunction:
@@ -13,7 +13,7 @@ def _print_type_check(type_check, expr):
     if len(expr.args) != 1:
         raise TypeError('The "print" builtin takes 1 argument')
     print_arg = expr.args[0]
-    type_check._walk(print_arg)
+    yield print_arg
     if (
         print_arg.ret_type.kind != ast.TypeKind.INT
         and print_arg.ret_type.kind != ast.TypeKind.STRING
@@ -28,8 +28,8 @@ def _print_type_check(type_check, expr):
 def _print_codegen(codegen, expr):
     # Type check should verified this already.
     assert len(expr.args) == 1
-    codegen._walk(expr.args[0])
-    ops.Print().serialise(codegen.bc)
+    yield expr.args[0]
+    ops.emit_print(codegen.bc)
 
 
 def _push_type_check(type_check, expr):
@@ -37,12 +37,12 @@ def _push_type_check(type_check, expr):
         raise TypeError('The "push" builtin takes 2 arguments')
     vec_arg = expr.args[0]
     push_arg = expr.args[1]
-    type_check._walk(vec_arg)
+    yield vec_arg
     if vec_arg.ret_type.kind != ast.TypeKind.VECTOR:
         raise TypeError(
             'The "push" builtin requires the first argument to be the vector to push onto'
         )
-    type_check._walk(push_arg)
+    yield push_arg
     if push_arg.ret_type.kind != vec_arg.ret_type.container_type.kind:
         raise TypeError(
             'Attempted to "push" argument of type {} onto a vector holding {}'.format(
@@ -53,16 +53,16 @@ def _push_type_check(type_check, expr):
 
 def _push_codegen(codegen, expr):
     assert len(expr.args) == 2
-    codegen._walk(expr.args[0])
-    codegen._walk(expr.args[1])
-    ops.VecPush().serialise(codegen.bc)
+    yield expr.args[0]
+    yield expr.args[1]
+    ops.emit_vec_push(codegen.bc)
 
 
 def _len_type_check(type_check, expr):
     if len(expr.args) != 1:
         raise TypeError('The "len" builtin takes 1 argument')
     len_arg = expr.args[0]
-    type_check._walk(len_arg)
+    yield len_arg
     if len_arg.ret_type.kind != ast.TypeKind.VECTOR:
         raise TypeError(
             'The "len" builtin takes a vector argument, got {}'.format(len_arg.ret_type.kind)
@@ -72,15 +72,15 @@ def _len_type_check(type_check, expr):
 
 def _len_codegen(codegen, expr):
     assert len(expr.args) == 1
-    codegen._walk(expr.args[0])
-    ops.VecLen().serialise(codegen.bc)
+    yield expr.args[0]
+    ops.emit_vec_len(codegen.bc)
 
 
 def _pop_type_check(type_check, expr):
     if len(expr.args) != 1:
         raise TypeError('The "pop" builtin takes 1 argument')
     pop_arg = expr.args[0]
-    type_check._walk(pop_arg)
+    yield pop_arg
     if pop_arg.ret_type.kind != ast.TypeKind.VECTOR:
         raise TypeError(
             'The "pop" builtin takes a vector argument, got {}'.format(pop_arg.ret_type.kind)
@@ -89,15 +89,15 @@ def _pop_type_check(type_check, expr):
 
 def _pop_codegen(codegen, expr):
     assert len(expr.args) == 1
-    codegen._walk(expr.args[0])
-    ops.VecPop().serialise(codegen.bc)
+    yield expr.args[0]
+    ops.emit_vec_pop(codegen.bc)
 
 
 def _insert_type_check(type_check, expr):
     if len(expr.args) != 3:
         raise TypeError('The "insert" builtin takes 3 arguments: a map, a key and a value')
     for arg in expr.args:
-        type_check._walk(arg)
+        yield arg
     map_arg = expr.args[0]
     key_arg = expr.args[1]
     value_arg = expr.args[2]
@@ -121,8 +121,8 @@ def _insert_type_check(type_check, expr):
 def _insert_codegen(codegen, expr):
     assert len(expr.args) == 3
     for arg in expr.args:
-        codegen._walk(arg)
-    ops.MapInsert().serialise(codegen.bc)
+        yield arg
+    ops.emit_map_insert(codegen.bc)
 
 
 def _read_str_type_check(type_check, expr):
@@ -133,7 +133,7 @@ def _read_str_type_check(type_check, expr):
 
 def _read_str_codegen(codegen, expr):
     assert len(expr.args) == 0
-    ops.ReadStr().serialise(codegen.bc)
+    ops.emit_read_str(codegen.bc)
 
 
 def _read_int_type_check(type_check, expr):
@@ -144,7 +144,7 @@ def _read_int_type_check(type_check, expr):
 
 def _read_int_codegen(codegen, expr):
     assert len(expr.args) == 0
-    ops.ReadInt().serialise(codegen.bc)
+    ops.emit_read_int(codegen.bc)
 
 
 INTRINSICS = [
@@ -165,15 +165,21 @@ class Intrinsics:
             self._register_intrinsic(i)
 
     def _register_intrinsic(self, i):
-        self.intrinsics[i.name] = i
+        self.intrinsics[symbols.intern(i.name)] = i
 
-    def is_intrinsic(self, name):
-        return name in self.intrinsics
+    def is_intrinsic(self, symbol):
+        return symbol in self.intrinsics
 
+    # Intrinsics yield their arguments to the calling walker in the same way as walker methods do.
+    # Intrinsics without any arguments to walk are regular functions.
     def codegen(self, expr, codegen):
-        assert self.is_intrinsic(expr.name)
-        self.intrinsics[expr.name].codegen(codegen, expr)
+        assert self.is_intrinsic(expr.symbol)
+        walker = self.intrinsics[expr.symbol].codegen(codegen, expr)
+        if walker is not None:
+            yield from walker
 
     def type_check(self, expr, type_check):
-        assert self.is_intrinsic(expr.name)
-        self.intrinsics[expr.name].type_check(type_check, expr)
+        assert self.is_intrinsic(expr.symbol)
+        walker = self.intrinsics[expr.symbol].type_check(type_check, expr)
+        if walker is not None:
+            yield from walker
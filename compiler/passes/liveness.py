@@ -0,0 +1,122 @@
+import heapq
+from .. import ast, symbols
+
+
+class _Variable:
+    __slots__ = ("symbol", "start", "end", "block", "uses", "escapes")
+
+    def __init__(self, symbol, position, block):
+        self.symbol = symbol
+        self.start = position
+        self.end = position
+        # The block that the variable is declared in, as the path of blocks leading to it.
+        self.block = block
+        self.uses = list()
+        # Whether the variable is used outside of the block that declares it.
+        self.escapes = False
+
+
+# Works out which variables in each function are live at the same time and gives variables that
+# never are the same slot in the function's frame. The slot of each variable is annotated on the
+# function for codegen to use.
+#
+# Each variable is live from its let statement up until the last time it's used, in the order that
+# codegen visits them. If it's used inside of a loop that it was declared outside of, it has to stay
+# live until the end of the loop since the loop can come back around to the use. A variable that's
+# used outside of the block that declares it might be read without its let statement having run so
+# it gets a slot to itself for the whole function.
+#
+# Arguments are always given the first slots since that's where the VM puts them.
+class SlotAllocator(ast.TreeWalker):
+    def __init__(self):
+        super().__init__()
+        self.counters = {"variables": 0, "slots": 0}
+        self.variables = dict()
+
+    def _walk_function(self, expr):
+        self.position = 0
+        self.block = (0,)
+        self.next_block = 1
+        self.variables = dict()
+        self.loops = list()
+        for a in expr.args:
+            self._declare(symbols.intern(a[0]))
+        self.args_end = self.position
+        yield from self._walk_block(expr.statements)
+        expr.slots = self._allocate()
+
+    def _walk_block(self, statements):
+        outer = self.block
+        self.block = outer + (self.next_block,)
+        self.next_block += 1
+        for statement in statements:
+            yield statement
+        self.block = outer
+
+    def _declare(self, symbol):
+        self.position += 1
+        self.variables[symbol] = _Variable(symbol, self.position, self.block)
+
+    def _walk_let_statement(self, expr):
+        # The rhs is evaluated before the variable is stored so it can reuse the slot of a variable
+        # that it uses for the last time.
+        yield expr.rhs
+        self._declare(expr.symbol)
+
+    def _walk_variable(self, expr):
+        variable = self.variables.get(expr.symbol)
+        # Codegen reports references to variables that haven't been declared.
+        if variable is None:
+            return
+        self.position += 1
+        variable.uses.append(self.position)
+        variable.end = self.position
+        if self.block[: len(variable.block)] != variable.block:
+            variable.escapes = True
+
+    def _walk_if_statement(self, expr):
+        yield expr.cond
+        yield from self._walk_block(expr.then_statements)
+        yield from self._walk_block(expr.else_statements)
+
+    def _walk_while_loop(self, expr):
+        self.position += 1
+        start = self.position
+        yield expr.cond
+        yield from self._walk_block(expr.loop_body)
+        self.position += 1
+        self.loops.append((start, self.position))
+
+    def _allocate(self):
+        for variable in self.variables.values():
+            if variable.escapes:
+                variable.start = self.args_end
+                variable.end = self.position + 1
+                continue
+            # The VM sets all of the arguments at once.
+            if variable.start <= self.args_end:
+                variable.end = max(variable.end, self.args_end)
+            for start, end in self.loops:
+                if variable.start < start and any(start < use < end for use in variable.uses):
+                    variable.end = max(variable.end, end)
+
+        # Hand out the lowest free slot to each variable in the order that they become live.
+        slots = dict()
+        free = list()
+        live = list()
+        frame_size = 0
+        for variable in sorted(self.variables.values(), key=lambda v: v.start):
+            while live and live[0][0] < variable.start:
+                _, slot = heapq.heappop(live)
+                heapq.heappush(free, slot)
+            if free:
+                slot = heapq.heappop(free)
+            else:
+                slot = frame_size
+                frame_size += 1
+            slots[variable.symbol] = slot
+            heapq.heappush(live, (variable.end, slot))
+
+        self.counters["variables"] += len(self.variables)
+        self.counters["slots"] += frame_size
+        return slots
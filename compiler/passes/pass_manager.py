@@ -0,0 +1,134 @@
+import time
+import tracemalloc
+from .codegen import CodeGenerator
+from .constant_fold import ConstantFolder
+from .dead_code import DeadCodeEliminator
+from .function_table import FunctionTable
+from .fused import FusedCodeGenerator
+from .inline import DEFAULT_INLINE_BUDGET, Inliner
+from .intrinsics import Intrinsics
+from .liveness import SlotAllocator
+from .peephole import PeepholeOptimiser
+from .struct_defs import StructureDefinitions
+from .tree_shake import TreeShaker
+from .type_check import TypeChecker
+
+DEFAULT_OPT_LEVEL = 1
+
+
+# The passes that make up the compiler, in the order that they need to run.
+#
+# At -O0 we care about compiling as fast as possible so type checking and codegen are fused into a
+# single walk over the AST. At -O1 anything that isn't reachable from main is dropped, the AST is
+# optimised in between type checking and codegen and the bytecode is cleaned up afterwards.
+def standard_passes(bc, opt_level=DEFAULT_OPT_LEVEL, inline_budget=DEFAULT_INLINE_BUDGET):
+    structs = dict()
+    intrinsics = Intrinsics()
+    passes = list()
+    if opt_level > 0:
+        passes.append(TreeShaker())
+    passes.append(StructureDefinitions(bc, structs))
+    if opt_level == 0:
+        passes.append(FusedCodeGenerator(bc, structs, intrinsics))
+    else:
+        passes.append(TypeChecker(bc, structs, intrinsics))
+        passes.append(ConstantFolder())
+        passes.append(DeadCodeEliminator())
+        passes.append(Inliner(inline_budget))
+        passes.append(SlotAllocator())
+        passes.append(CodeGenerator(bc, structs, intrinsics))
+    passes.append(FunctionTable(bc))
+    if opt_level > 0:
+        passes.append(PeepholeOptimiser(bc))
+    return passes
+
+
+class PassStats:
+    def __init__(self, name, seconds, allocated_bytes, retained_bytes, nodes, counters):
+        self.name = name
+        self.seconds = seconds
+        # The peak amount of memory allocated while the pass was running.
+        self.allocated_bytes = allocated_bytes
+        # How much of that memory was still around once the pass finished.
+        self.retained_bytes = retained_bytes
+        self.nodes = nodes
+        # Anything else that the pass keeps count of, such as how many ops it removed.
+        self.counters = counters
+
+    def to_json(self):
+        return {
+            "name": self.name,
+            "seconds": self.seconds,
+            "allocated_bytes": self.allocated_bytes,
+            "retained_bytes": self.retained_bytes,
+            "nodes": self.nodes,
+            "counters": self.counters,
+        }
+
+
+class PassManager:
+    def __init__(self, passes, instrument=False):
+        self.passes = passes
+        # Tracing allocations slows everything down quite a lot so we only do it when asked to.
+        self.instrument = instrument
+        self.stats = list()
+
+    def run(self, exprs):
+        for p in self.passes:
+            if self.instrument:
+                self._run_instrumented(p, exprs)
+            else:
+                p.walk_ast(exprs)
+
+    def report(self):
+        lines = [
+            "{:<24}{:>12}{:>16}{:>16}{:>12}".format(
+                "Pass", "Time (s)", "Allocated (B)", "Retained (B)", "Nodes"
+            )
+        ]
+        for s in self.stats:
+            lines.append(
+                "{:<24}{:>12.6f}{:>16}{:>16}{:>12}".format(
+                    s.name, s.seconds, s.allocated_bytes, s.retained_bytes, s.nodes
+                )
+            )
+        lines.append("{:<24}{:>12.6f}".format("Total", self.total_seconds()))
+        for s in self.stats:
+            for name, value in s.counters.items():
+                lines.append("{}: {} = {}".format(s.name, name, value))
+        return "\n".join(lines)
+
+    def to_json(self):
+        return {
+            "passes": [s.to_json() for s in self.stats],
+            "total_seconds": self.total_seconds(),
+        }
+
+    def total_seconds(self):
+        return sum(s.seconds for s in self.stats)
+
+    def _run_instrumented(self, p, exprs):
+        # Leave tracing on if someone else started it.
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            p.walk_ast(exprs)
+        finally:
+            elapsed = time.perf_counter() - start
+            end_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+            self.stats.append(
+                PassStats(
+                    type(p).__name__,
+                    elapsed,
+                    peak_bytes - start_bytes,
+                    end_bytes - start_bytes,
+                    p.nodes_walked,
+                    dict(getattr(p, "counters", dict())),
+                )
+            )
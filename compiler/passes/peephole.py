@@ -0,0 +1,214 @@
+from .. import encoding, op_info
+from ..ops import OpCode
+
+
+class Instruction:
+    __slots__ = ("op", "operands", "size", "target", "removed", "replacement")
+
+    def __init__(self, op, operands, size):
+        self.op = op
+        # The decoded operand values. An offset operand is stored as the instruction that it points at.
+        self.operands = operands
+        # Jump offsets are a fixed width so the size of an instruction in the code never changes. The
+        # function table's offsets aren't but nothing points into the header.
+        self.size = size
+        self.target = None
+        self.removed = False
+        # The instruction that anything pointing at this one should point at once it's removed.
+        self.replacement = None
+
+
+def _decode(buf):
+    instructions = list()
+    offsets = list()
+    position = 0
+    while position < len(buf):
+        start = position
+        op = buf[position]
+        offsets.append(position)
+        position += 1
+        operands = list()
+        for operand in op_info.OPERANDS[op]:
+            value, position = encoding.decode_operand(operand, buf, position)
+            operands.append(value)
+        instructions.append(Instruction(op, operands, position - start))
+    return instructions, offsets
+
+
+# The offset of each instruction, keyed on its id.
+def _layout(instructions):
+    offsets = dict()
+    position = 0
+    for instruction in instructions:
+        offsets[id(instruction)] = position
+        if instruction.op is not None:
+            position += instruction.size
+    return offsets
+
+
+# Offset operands are looked up in the layout of the code that they point into.
+def _encode(instructions, offsets):
+    buf = bytearray()
+    for instruction in instructions:
+        if instruction.op is None:
+            continue
+        buf.append(instruction.op)
+        for operand, value in zip(op_info.OPERANDS[instruction.op], instruction.operands):
+            if operand.offset:
+                value = offsets[id(instruction.target)]
+            encoding.encode_operand(operand, value, buf)
+    return buf
+
+
+def _offset_operand(instruction):
+    for i, operand in enumerate(op_info.OPERANDS[instruction.op]):
+        if operand.offset:
+            return i
+    return None
+
+
+# Cleans up patterns that codegen leaves in the bytecode, such as jumps to jumps and variables that
+# are stored just to be loaded straight back up again.
+#
+# The instructions are decoded using the operand layouts from the DSL so that jump targets can be
+# tracked as instructions rather than offsets. Once we're done, everything is encoded again with the
+# new offsets, including the function table in the header.
+#
+# This runs over the bytecode rather than the AST but it looks like any other pass to the pass
+# manager.
+class PeepholeOptimiser:
+    def __init__(self, bc):
+        self.bc = bc
+        self.nodes_walked = 0
+        self.counters = {"ops_removed": 0, "bytes_saved": 0}
+
+    def walk_ast(self, top_level_exprs):
+        size = len(self.bc.header) + len(self.bc.buf)
+        code, code_offsets = _decode(self.bc.buf)
+        header, _ = _decode(self.bc.header)
+        # Stands in for the end of the buffer so that everything can point at an instruction.
+        end = Instruction(None, list(), 0)
+        code.append(end)
+        code_offsets.append(len(self.bc.buf))
+        by_offset = dict(zip(code_offsets, code))
+        for instruction in code + header:
+            if instruction.op is None:
+                continue
+            i = _offset_operand(instruction)
+            if i is not None:
+                instruction.target = by_offset[instruction.operands[i]]
+
+        while True:
+            removed = 0
+            self._thread_jumps(code)
+            removed += self._remove_jumps_to_next(code)
+            removed += self._remove_load_store_pairs(code)
+            removed += self._remove_store_load_pairs(code)
+            if not removed:
+                break
+            self.counters["ops_removed"] += removed
+            code = self._compact(code, header)
+
+        offsets = _layout(code)
+        self.bc.buf[:] = _encode(code, offsets)
+        self.bc.header[:] = _encode(header, offsets)
+        self.counters["bytes_saved"] += size - len(self.bc.header) - len(self.bc.buf)
+
+    def _thread_jumps(self, code):
+        # Rather than jumping to an unconditional jump, go straight to where that one goes.
+        for instruction in code:
+            if instruction.target is None:
+                continue
+            seen = set()
+            target = instruction.target
+            while op_info.FLOW.get(target.op) == op_info.Flow.JUMP and id(target) not in seen:
+                seen.add(id(target))
+                target = target.target
+            instruction.target = target
+
+    def _remove_jumps_to_next(self, code):
+        removed = 0
+        for instruction, next_instruction in zip(code, code[1:]):
+            if (
+                op_info.FLOW[instruction.op] == op_info.Flow.JUMP
+                and instruction.target is next_instruction
+            ):
+                instruction.removed = True
+                removed += 1
+        return removed
+
+    def _remove_load_store_pairs(self, code):
+        # Loading a variable and then storing it straight back doesn't do anything.
+        removed = 0
+        targets = self._targets(code)
+        i = 0
+        while i < len(code) - 1:
+            load, store = code[i], code[i + 1]
+            if (
+                load.op == OpCode.GET_VAR.value
+                and store.op == OpCode.SET_VAR.value
+                and load.operands == store.operands
+                and not (load.removed or store.removed)
+                and id(store) not in targets
+            ):
+                load.removed = store.removed = True
+                removed += 2
+                i += 2
+            else:
+                i += 1
+        return removed
+
+    def _remove_store_load_pairs(self, code):
+        # A variable that is only ever read straight after it's stored doesn't need to be stored at
+        # all, we can just leave the value on the stack.
+        removed = 0
+        targets = self._targets(code)
+        loads = self._count_loads(code)
+        function = -1
+        i = 0
+        while i < len(code) - 1:
+            store, load = code[i], code[i + 1]
+            if store.op == OpCode.FUNCTION_DEF.value:
+                function += 1
+            if (
+                store.op == OpCode.SET_VAR.value
+                and load.op == OpCode.GET_VAR.value
+                and store.operands == load.operands
+                and not (store.removed or load.removed)
+                and id(load) not in targets
+                and loads[(function, load.operands[0])] == 1
+            ):
+                store.removed = load.removed = True
+                removed += 2
+                i += 2
+            else:
+                i += 1
+        return removed
+
+    def _targets(self, code):
+        return set(id(instruction.target) for instruction in code if instruction.target is not None)
+
+    def _count_loads(self, code):
+        # Variable ids are only unique within a function.
+        loads = dict()
+        function = -1
+        for instruction in code:
+            if instruction.op == OpCode.FUNCTION_DEF.value:
+                function += 1
+            elif instruction.op == OpCode.GET_VAR.value:
+                key = (function, instruction.operands[0])
+                loads[key] = loads.get(key, 0) + 1
+        return loads
+
+    def _compact(self, code, header):
+        # Anything pointing at a removed instruction should point at whatever comes after it.
+        replacement = None
+        for instruction in reversed(code):
+            if instruction.removed:
+                instruction.replacement = replacement
+            else:
+                replacement = instruction
+        for instruction in code + header:
+            while instruction.target is not None and instruction.target.removed:
+                instruction.target = instruction.target.replacement
+        return [instruction for instruction in code if not instruction.removed]
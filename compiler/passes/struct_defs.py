@@ -12,8 +12,14 @@ def _get_type_id(expr):
         return expr.type_id
 
 
+# Look up the index and type of a member by the static type of the struct that it's accessed on.
+def get_member(structs, struct_type, member_symbol):
+    return structs[struct_type.symbol].member_index.get(member_symbol)
+
+
 class StructureDefinitions(ast.ASTWalker):
     def __init__(self, bc, structs):
+        super().__init__()
         self.structs = structs
         self.bc = bc
 
@@ -21,9 +27,19 @@ class StructureDefinitions(ast.ASTWalker):
         self.current_type_id = 2
 
     def _walk_structure(self, expr):
+        self.structs[expr.symbol] = expr
+
+        # Index members by symbol so that member accesses don't need to search for them.
+        expr.member_index = dict()
+        for i, m in enumerate(expr.members):
+            expr.member_index[m.symbol] = (i, m.type)
+
+        # Structs that are never constructed are still type checked but they don't need a definition.
+        if expr.dead:
+            return
+
         expr.type_id = self.current_type_id
         self.current_type_id += 1
-        self.structs[expr.name] = expr
 
         # The remaining args are the type ids of the members.
         types = list()
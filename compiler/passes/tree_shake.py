@@ -0,0 +1,72 @@
+from .. import ast, symbols
+
+MAIN = symbols.intern("main")
+
+
+# Builds a graph of which functions call which and which structs they construct, then marks
+# everything that can't be reached from main as dead so that it isn't emitted.
+#
+# Calls are resolved by name the same way that codegen resolves them, which also covers member
+# functions. A struct's default values are evaluated whenever it's constructed so anything that they
+# use is reachable from the struct itself.
+#
+# This runs before any other pass so that only structs that are used get a type id. Everything is
+# still type checked.
+class TreeShaker(ast.TreeWalker):
+    def __init__(self):
+        super().__init__()
+        self.functions = dict()
+        self.structs = dict()
+        # The symbols of the functions called and structs constructed by each function or struct.
+        self.calls = dict()
+        self.constructs = dict()
+        self.current = None
+
+    def walk_ast(self, top_level_exprs):
+        super().walk_ast(top_level_exprs)
+        # Without an entry point, there's nothing to shake the tree from.
+        if MAIN not in self.functions:
+            return
+        reachable = set()
+        pending = [self.functions[MAIN]]
+        while pending:
+            node = pending.pop()
+            if id(node) in reachable:
+                continue
+            reachable.add(id(node))
+            for symbol in self.calls[id(node)]:
+                if symbol in self.functions:
+                    pending.append(self.functions[symbol])
+            for symbol in self.constructs[id(node)]:
+                if symbol in self.structs:
+                    pending.append(self.structs[symbol])
+        for node in list(self.functions.values()) + list(self.structs.values()):
+            if id(node) not in reachable:
+                node.dead = True
+
+    def _walk_structure(self, expr):
+        self.structs[expr.symbol] = expr
+        self._enter(expr)
+        for m in expr.members:
+            if m.default_value is not None:
+                yield m.default_value
+        for mf in expr.member_functions:
+            yield mf
+
+    def _walk_function(self, expr):
+        self.functions[expr.symbol] = expr
+        self._enter(expr)
+        yield from super()._walk_function(expr)
+
+    def _enter(self, expr):
+        self.current = id(expr)
+        self.calls[self.current] = set()
+        self.constructs[self.current] = set()
+
+    def _walk_function_call(self, expr):
+        self.calls[self.current].add(expr.symbol)
+        yield from super()._walk_function_call(expr)
+
+    def _walk_constructor(self, expr):
+        self.constructs[self.current].add(expr.symbol)
+        yield from super()._walk_constructor(expr)
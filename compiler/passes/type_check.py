@@ -1,4 +1,5 @@
-from .. import ast
+from .. import ast, lexer, symbols
+from .struct_defs import get_member
 
 
 class TypeError(Exception):
@@ -7,6 +8,7 @@ class TypeError(Exception):
 
 class TypeChecker(ast.ASTWalker):
     def __init__(self, bc, structs, intrinsics):
+        super().__init__()
         self.bc = bc
         self.structs = structs
         self.intrinsics = intrinsics
@@ -15,25 +17,37 @@ class TypeChecker(ast.ASTWalker):
         self.current_function = None
 
     def _walk_let_statement(self, expr):
-        self._walk(expr.rhs)
-        if not hasattr(expr.rhs, "ret_type"):
+        yield expr.rhs
+        if expr.rhs.ret_type is None:
             raise TypeError("rhs of let statement returns void")
-        self.variable_types[expr.name] = expr.rhs.ret_type
+        self.variable_types[expr.symbol] = expr.rhs.ret_type
         expr.ret_type = expr.rhs.ret_type
 
     def _walk_if_statement(self, expr):
-        self._walk(expr.cond)
+        yield expr.cond
         for statement in expr.then_statements:
-            self._walk(statement)
+            yield statement
         for statement in expr.else_statements:
-            self._walk(statement)
+            yield statement
 
     def _walk_while_loop(self, expr):
-        self._walk(expr.cond)
+        yield expr.cond
         for statement in expr.loop_body:
-            self._walk(statement)
+            yield statement
 
     def _walk_binary_op(self, expr):
+        # Operands are visited in the same order that codegen visits them.
+        if expr.operator.type == lexer.TokenType.GREATER_THAN:
+            yield expr.rhs
+            yield expr.lhs
+        elif expr.operator.type == lexer.TokenType.ASSIGN:
+            yield expr.rhs
+            if isinstance(expr.lhs, ast.MemberAccess):
+                yield expr.lhs.expr
+                self._get_member(expr.lhs)
+        else:
+            yield expr.lhs
+            yield expr.rhs
         expr.ret_type = ast.Type(ast.TypeKind.INT)
 
     def _walk_number(self, expr):
@@ -45,8 +59,8 @@ class TypeChecker(ast.ASTWalker):
     def _walk_vector(self, expr):
         expr.ret_type = ast.Type(ast.TypeKind.VECTOR, None, expr.container_type)
         for e in expr.elements:
-            self._walk(e)
-            if e.ret_type != expr.container_type:
+            yield e
+            if e.ret_type is not expr.container_type:
                 raise TypeError(
                     "found element of type {} in array with container type {}".format(
                         e.ret_type.kind, expr.container_type.kind
@@ -56,15 +70,15 @@ class TypeChecker(ast.ASTWalker):
     def _walk_map(self, expr):
         expr.ret_type = ast.Type(ast.TypeKind.MAP, None, expr.container_types)
         for (key, value) in expr.elements:
-            self._walk(key)
-            self._walk(value)
-            if key.ret_type != expr.container_types[0]:
+            yield key
+            yield value
+            if key.ret_type is not expr.container_types[0]:
                 raise TypeError(
                     "found key of type {} in map with key type {}".format(
                         key.ret_type.kind, expr.container_types[0].kind
                     )
                 )
-            if value.ret_type != expr.container_types[1]:
+            if value.ret_type is not expr.container_types[1]:
                 raise TypeError(
                     "found value of type {} in map with value type {}".format(
                         value.ret_type.kind, expr.container_types[1].kind
@@ -72,8 +86,8 @@ class TypeChecker(ast.ASTWalker):
                 )
 
     def _walk_index(self, expr):
-        self._walk(expr.expr)
-        self._walk(expr.index)
+        yield expr.expr
+        yield expr.index
         # If it's a map, then choose the value type.
         if isinstance(expr.expr.ret_type.container_type, tuple):
             assert len(expr.expr.ret_type.container_type) == 2
@@ -82,26 +96,42 @@ class TypeChecker(ast.ASTWalker):
             expr.ret_type = expr.expr.ret_type.container_type
 
     def _walk_variable(self, expr):
-        if expr.name not in self.variable_types:
+        ret_type = self.variable_types.get(expr.symbol)
+        if ret_type is None:
             raise TypeError("reference to unrecognised variable {}".format(expr.name))
-        expr.ret_type = self.variable_types[expr.name]
+        expr.ret_type = ret_type
 
     def _walk_constructor(self, expr):
         expr.ret_type = ast.Type(ast.TypeKind.USER, expr.struct_name)
+        # Check this before walking anything since codegen only walks one param for each member.
+        struct_def = self.structs.get(expr.symbol)
+        if struct_def is not None and len(expr.params) > len(struct_def.members):
+            raise TypeError(
+                "constructed struct {} with {} args when it only has {} members".format(
+                    expr.struct_name, len(expr.params), len(struct_def.members)
+                )
+            )
+        for param in expr.params:
+            yield param
+        # Default values for any members that weren't passed in.
+        if struct_def is not None:
+            for member in struct_def.members[len(expr.params) :]:
+                if member.default_value is not None:
+                    yield member.default_value
 
     def _walk_function_call(self, expr):
-        if self.intrinsics.is_intrinsic(expr.name):
-            self.intrinsics.type_check(expr, self)
+        if self.intrinsics.is_intrinsic(expr.symbol):
+            yield from self.intrinsics.type_check(expr, self)
             return
         # Deduce types of each argument.
         for arg in expr.args:
-            self._walk(arg)
+            yield arg
         # Now compare against the function parameter types.
-        assert expr.name in self.functions
-        called_func = self.functions[expr.name]
+        assert expr.symbol in self.functions
+        called_func = self.functions[expr.symbol]
         i = 0
         for arg, param in zip(expr.args, called_func.args):
-            if param[1] != arg.ret_type:
+            if param[1] is not arg.ret_type:
                 raise TypeError(
                     "called function {} with arg {} of type {} when we expected {}".format(
                         expr.name, i, arg.ret_type.kind, param[1].kind
@@ -120,9 +150,9 @@ class TypeChecker(ast.ASTWalker):
                     )
                 )
             return
-        self._walk(expr.expr)
+        yield expr.expr
         assert self.current_function is not None
-        if expr.expr.ret_type != self.current_function.return_type:
+        if expr.expr.ret_type is not self.current_function.return_type:
             raise TypeError(
                 "returning type {} in function of type {}".format(
                     expr.expr.ret_type.kind, self.current_function.return_type.kind
@@ -131,27 +161,36 @@ class TypeChecker(ast.ASTWalker):
 
     def _walk_structure(self, expr):
         for mf in expr.member_functions:
-            self._walk(mf)
+            yield mf
 
     def _walk_function(self, expr):
-        if expr.name in self.functions:
+        if expr.symbol in self.functions:
             raise TypeError("redefinition of function {}".format(expr.name))
         for arg in expr.args:
-            self.variable_types[arg[0]] = arg[1]
-        self.functions[expr.name] = expr
+            self.variable_types[symbols.intern(arg[0])] = arg[1]
+        self.functions[expr.symbol] = expr
         self.current_function = expr
         for s in expr.statements:
-            self._walk(s)
+            yield s
 
     def _walk_member_access(self, expr):
         # Deduce type of expr.
-        self._walk(expr.expr)
-        assert hasattr(expr.expr, "ret_type")
-        assert expr.expr.ret_type.identifier in self.structs
-
-        struct_def = self.structs[expr.expr.ret_type.identifier]
-        for member in struct_def.members:
-            if member.name == expr.member_name:
-                expr.ret_type = member.type
-                return
-        assert False
+        yield expr.expr
+        _, expr.ret_type = self._get_member(expr)
+
+    # Looks up the member that a member access refers to once its struct has been type checked.
+    def _get_member(self, expr):
+        struct_type = expr.expr.ret_type
+        assert struct_type is not None
+        if struct_type.symbol not in self.structs:
+            raise TypeError(
+                "accessed member {} on non-struct type {}".format(
+                    expr.member_name, struct_type.kind
+                )
+            )
+        member = get_member(self.structs, struct_type, expr.symbol)
+        if member is None:
+            raise TypeError(
+                "struct {} has no member {}".format(struct_type.identifier, expr.member_name)
+            )
+        return member
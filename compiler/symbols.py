@@ -0,0 +1,36 @@
+import sys
+
+
+# Maps identifiers to small integer ids. Identifiers are interned as they're lexed so that passes
+# can key their tables by symbol id rather than hashing and comparing names over and over again.
+class SymbolTable:
+    def __init__(self):
+        self.ids = dict()
+        self.names = list()
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        symbol = self.ids.get(name)
+        if symbol is None:
+            symbol = len(self.names)
+            name = sys.intern(name)
+            self.ids[name] = symbol
+            self.names.append(name)
+        return symbol
+
+    def name(self, symbol):
+        return self.names[symbol]
+
+
+# Symbol ids are shared by everything that gets compiled in this process.
+SYMBOLS = SymbolTable()
+
+
+def intern(name):
+    return SYMBOLS.intern(name)
+
+
+def name(symbol):
+    return SYMBOLS.names[symbol]
@@ -1,10 +1,15 @@
+import struct
+from compiler import encoding
+
+
 class MalformedByteCodeError(Exception):
     pass
 
 
 class ByteCodeReader:
     def __init__(self, bc):
-        self.bc = bc
+        # Reading through a view means that slicing out strings doesn't copy the bytecode.
+        self.bc = memoryview(bc)
         self.index = 0
 
     def read_op(self):
@@ -19,3 +24,44 @@ class ByteCodeReader:
         if op is None:
             raise MalformedByteCodeError("unexpected end of bytecode")
         return op
+
+    def expect_value(self, value_encoding):
+        if value_encoding == encoding.VARINT:
+            return self.expect_varint()
+        try:
+            value, index = encoding.decode(value_encoding, self.bc, self.index)
+        except IndexError:
+            raise MalformedByteCodeError("unexpected end of bytecode")
+        if index > len(self.bc):
+            raise MalformedByteCodeError("unexpected end of bytecode")
+        self.index = index
+        return value
+
+    def expect_varint(self):
+        try:
+            # Most varints are a single byte so don't bother with the general decoder for those.
+            value = self.bc[self.index]
+            if value < 0x80:
+                self.index += 1
+                return value
+            value, self.index = encoding.decode(encoding.VARINT, self.bc, self.index)
+        except IndexError:
+            raise MalformedByteCodeError("unexpected end of bytecode")
+        return value
+
+    # Reads several fixed width values at once.
+    def expect_packed(self, packed):
+        try:
+            values = packed.unpack_from(self.bc, self.index)
+        except struct.error:
+            raise MalformedByteCodeError("unexpected end of bytecode")
+        self.index += packed.size
+        return values
+
+    def expect_bytes(self, length):
+        end = self.index + length
+        if end > len(self.bc):
+            raise MalformedByteCodeError("unexpected end of bytecode")
+        data = self.bc[self.index : end]
+        self.index = end
+        return data
@@ -0,0 +1,62 @@
+from compiler import encoding
+from .bytecode_reader import ByteCodeReader, MalformedByteCodeError
+from .ops import OPS
+
+# How many lines to build up before writing them out.
+BUFFERED_LINES = 4096
+
+
+def _disassemble_elements(reader, name, element_encoding, chars, length, lines):
+    if element_encoding == encoding.U8:
+        elements = reader.expect_bytes(length)
+    else:
+        elements = [reader.expect_value(element_encoding) for _ in range(length)]
+    if chars:
+        text = bytes(elements).decode("latin-1")
+        for i, c in enumerate(text):
+            lines.append("    {}_{}: {}".format(name, i, c))
+        # Show the whole string too since it's hard to read a character at a time.
+        lines.append("  {}: {}".format(name, repr(text)))
+    else:
+        for i, element in enumerate(elements):
+            lines.append("    {}_{}: {}".format(name, i, element))
+
+
+def _disassemble_op(reader, op, offset, lines):
+    if op >= len(OPS):
+        raise MalformedByteCodeError("unknown op {} at offset {}".format(op, offset))
+    op_name, packed, operands = OPS[op]
+    lines.append("{} ({})".format(op_name, offset))
+    if packed is not None:
+        for operand, value in zip(operands, reader.expect_packed(packed)):
+            lines.append("  {}: {}".format(operand[0], value))
+        return
+    for name, operand_encoding, enumerated, chars in operands:
+        if not enumerated:
+            lines.append("  {}: {}".format(name, reader.expect_value(operand_encoding)))
+            continue
+        length = reader.expect_varint()
+        lines.append("  {}_len: {}".format(name, length))
+        _disassemble_elements(reader, name, operand_encoding, chars, length, lines)
+
+
+# Writes a human readable listing of the bytecode to out. Anything disassembled before malformed
+# bytecode is found is still written out.
+def disassemble(bc, out):
+    reader = ByteCodeReader(bc)
+    lines = list()
+    try:
+        while True:
+            offset = reader.index
+            op = reader.read_op()
+            if op is None:
+                break
+            _disassemble_op(reader, op, offset, lines)
+            if len(lines) >= BUFFERED_LINES:
+                out.write("\n".join(lines))
+                out.write("\n")
+                lines.clear()
+    finally:
+        if lines:
+            out.write("\n".join(lines))
+            out.write("\n")
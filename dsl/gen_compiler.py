@@ -3,6 +3,8 @@ from dsl.source_writer import SourceWriter
 
 HEADER = "# Generated by glacierdsl - DO NOT EDIT."
 IMPORTS = """
+import struct
+from compiler import encoding
 from enum import Enum
 """
 
@@ -22,12 +24,99 @@ def _convert_snake_to_pascal(snake_str):
     return convert_str
 
 
+# Ops whose args are all a fixed width are packed with a precompiled struct and can be patched in
+# place once they've been written.
+def _packed(op):
+    return not isinstance(op, ops.GlacierVMHeaderOp) and ops.struct_format(op) is not None
+
+
+def _struct_name(op):
+    return "_{}".format(op.name.upper())
+
+
+def _arg_names(op):
+    return [arg.name for arg in op.args]
+
+
 def _gen_bc(writer, op, value):
     hex_string = hex(value)
     uc_name = op.name.upper()
     writer.write_line("{} = {}".format(uc_name, hex_string))
 
 
+def _gen_struct(writer, op):
+    # The opcode is packed along with the args.
+    struct_format = ops.struct_format(op, "B")
+    writer.write_line('{} = struct.Struct("{}")'.format(_struct_name(op), struct_format))
+
+
+def _gen_emit_arg(writer, arg):
+    if isinstance(arg, ops.GlacierVMArg):
+        if arg.size == ops.GlacierVMArgType.VARINT:
+            # Most values fit in a single byte so skip the general encoder for those.
+            writer.write_line("if 0 <= {} < 0x80:".format(arg.name))
+            writer.indent()
+            writer.write_line("buf.append({})".format(arg.name))
+            writer.unindent()
+            writer.write_line("else:")
+            writer.indent()
+            writer.write_line("encoding.encode(encoding.VARINT, {}, buf)".format(arg.name))
+            writer.unindent()
+        else:
+            arg_encoding = "encoding.{}".format(ops.ENCODINGS[arg.size])
+            writer.write_line("encoding.encode({}, {}, buf)".format(arg_encoding, arg.name))
+        return
+    assert isinstance(arg, ops.GlacierVMEnumeratedArg)
+    if arg.size == ops.GlacierVMArgType.CHAR:
+        writer.write_line('elements = {}.encode("utf-8")'.format(arg.name))
+    else:
+        writer.write_line("elements = {}".format(arg.name))
+    writer.write_line("encoding.encode(encoding.VARINT, len(elements), buf)")
+    if ops.ENCODINGS[arg.size] == "U8":
+        writer.write_line("buf.extend(elements)")
+    else:
+        arg_encoding = "encoding.{}".format(ops.ENCODINGS[arg.size])
+        writer.write_line("for element in elements:")
+        writer.indent()
+        writer.write_line("encoding.encode({}, element, buf)".format(arg_encoding))
+        writer.unindent()
+
+
+# Generate the functions that write an op straight into the bytecode buffer.
+def _gen_emit(writer, op):
+    header_op = isinstance(op, ops.GlacierVMHeaderOp)
+    buf_name = "bc.header" if header_op else "bc.buf"
+    writer.write_line("def emit_{}({}):".format(op.name, ", ".join(["bc"] + _arg_names(op))))
+    writer.indent()
+    if _packed(op):
+        writer.write_line(
+            "{} += {}.pack({})".format(
+                buf_name, _struct_name(op), ", ".join(["OP_" + op.name.upper()] + _arg_names(op))
+            )
+        )
+    elif not op.args:
+        writer.write_line("{}.append(OP_{})".format(buf_name, op.name.upper()))
+    else:
+        writer.write_line("buf = {}".format(buf_name))
+        writer.write_line("buf.append(OP_{})".format(op.name.upper()))
+        for arg in op.args:
+            _gen_emit_arg(writer, arg)
+    writer.unindent()
+
+    if _packed(op):
+        writer.write_line(
+            "def patch_{}({}):".format(op.name, ", ".join(["bc", "at"] + _arg_names(op)))
+        )
+        writer.indent()
+        writer.write_line(
+            "{}.pack_into({})".format(
+                _struct_name(op),
+                ", ".join(["bc.buf", "at", "OP_" + op.name.upper()] + _arg_names(op)),
+            )
+        )
+        writer.unindent()
+
+
 def _gen_op(writer, op):
     writer.write_line("class {}:".format(_convert_snake_to_pascal(op.name)))
     writer.indent()
@@ -48,57 +137,32 @@ def _gen_op(writer, op):
         writer.write_line("pass")
     writer.unindent()
 
-    header_op = isinstance(op, ops.GlacierVMHeaderOp)
-
     # Generate serialise function.
     writer.write_line("def serialise(self, bc):")
     writer.indent()
-    writer.write_line("args = list()")
-
-    # Now supply arguments.
-    for arg in op.args:
-        if isinstance(arg, ops.GlacierVMArg):
-            writer.write_line("args.append(self.{})".format(arg.name))
-        else:
-            assert isinstance(arg, ops.GlacierVMEnumeratedArg)
-            writer.write_line("args.append(len(self.{}))".format(arg.name))
-            if arg.size == ops.GlacierVMArgType.CHAR:
-                writer.write_line("args.extend(bytes(self.{}, 'utf-8'))".format(arg.name))
-            else:
-                writer.write_line("args.extend(self.{})".format(arg.name))
-    # Write the actual opcode.
-    if op.args and not header_op:
+    emit_args = ", ".join(["bc"] + ["self." + name for name in _arg_names(op)])
+    if _packed(op):
         writer.write_line("if self._offset is not None:")
         writer.indent()
-        writer.write_line("bc.edit_op(self._offset, OpCode.{}, args)".format(op.name.upper()))
+        patch_args = ", ".join(["bc", "self._offset"] + ["self." + name for name in _arg_names(op)])
+        writer.write_line("patch_{}({})".format(op.name, patch_args))
         writer.unindent()
         writer.write_line("else:")
         writer.indent()
-        writer.write_line("bc.write_op(OpCode.{}, args)".format(op.name.upper()))
+        writer.write_line("emit_{}({})".format(op.name, emit_args))
         writer.unindent()
     else:
-        if not header_op:
-            writer.write_line("bc.write_op(OpCode.{}, args)".format(op.name.upper()))
-        else:
-            writer.write_line("bc.write_header(OpCode.{}, args)".format(op.name.upper()))
+        writer.write_line("emit_{}({})".format(op.name, emit_args))
     writer.write_line("return self")
     writer.unindent()
 
-    # Generate reserve and assign function if we have arguments.
-    reserve_source = str()
-    assign_source = str()
-    if op.args and not header_op:
+    # Generate reserve and assign function if we have arguments. The op is edited in place once it's
+    # assigned so this only works when the args are a fixed width.
+    if _packed(op):
         writer.write_line("def reserve(self, bc):")
         writer.indent()
         writer.write_line("self._offset = bc.current_offset()")
-        array_source = "args = ["
-        for arg in op.args:
-            if arg != op.args[0]:
-                array_source += ", "
-            array_source += "0xFF"
-        array_source += "]"
-        writer.write_line(array_source)
-        writer.write_line("bc.write_op(OpCode.{}, args)".format(op.name.upper()))
+        writer.write_line("emit_{}({})".format(op.name, ", ".join(["bc"] + ["0" for _ in op.args])))
         writer.write_line("return self")
         writer.unindent()
 
@@ -126,6 +190,18 @@ def gen_compiler(op_list):
         _gen_bc(writer, op, i)
         i += 1
     writer.unindent()
+    # The emit functions use plain ints rather than looking the opcode up in the enum every time.
+    i = 0
+    for op in op_list:
+        writer.write_line("OP_{} = {}".format(op.name.upper(), hex(i)))
+        i += 1
+    for op in op_list:
+        if _packed(op):
+            _gen_struct(writer, op)
+    # Generate emit functions.
+    for op in op_list:
+        _gen_emit(writer, op)
+        writer.reset_indent()
     # Generate operation classes.
     for op in op_list:
         _gen_op(writer, op)
@@ -2,42 +2,45 @@ from dsl import ops
 
 HEADER = "# Generated by glacierdsl - DO NOT EDIT.\n"
 IMPORTS = """
-from compiler.ops import OpCode
+import struct
+from compiler import encoding
 """
 INDENT = " " * 4
-READ_OP = "op = reader.expect_op()\n"
+TABLE_COMMENT = """
+# The name of each op and the layout of its operands, indexed by the op's value.
+#
+# Each operand is a tuple of its name, its encoding, whether it's a count followed by that many
+# elements and whether those elements are characters. Ops whose operands are all a fixed width have a
+# struct to unpack them with in one go.
+"""
+
+
+def _gen_packed(op):
+    struct_format = ops.struct_format(op)
+    if struct_format is None:
+        return "None"
+    return 'struct.Struct("{}")'.format(struct_format)
+
+
+def _gen_operand(a):
+    enumerated = isinstance(a, ops.GlacierVMEnumeratedArg)
+    chars = enumerated and a.size == ops.GlacierVMArgType.CHAR
+    return '("{}", encoding.{}, {}, {}),'.format(a.name, ops.ENCODINGS[a.size], enumerated, chars)
 
 
 def _gen_op(op):
-    op_source = "def _disassemble_{}(reader):\n".format(op.name)
-    op_source += INDENT + 'print("{} ({{}})".format(reader.index - 1))\n'.format(op.name.upper())
-    for a in op.args:
-        op_source += INDENT + READ_OP
-        if isinstance(a, ops.GlacierVMArg):
-            op_source += INDENT + 'print("  {}: {{}}".format(op))\n'.format(a.name)
-        else:
-            assert isinstance(a, ops.GlacierVMEnumeratedArg)
-            op_source += INDENT + 'print("  {}_len: {{}}".format(op))\n'.format(a.name)
-            op_source += INDENT + "for i in range(0, op):\n"
-            op_source += INDENT * 2 + READ_OP
-            if a.size == ops.GlacierVMArgType.CHAR:
-                op_source += INDENT * 2 + 'print("    {}_{{}}: {{}}".format(i, chr(op)))\n'.format(
-                    a.name
-                )
-            else:
-                op_source += INDENT * 2 + 'print("    {}_{{}}: {{}}".format(i, op))\n'.format(
-                    a.name
-                )
-    op_source += "\n"
+    op_source = INDENT + "(\n"
+    op_source += INDENT * 2 + '"{}",\n'.format(op.name.upper())
+    op_source += INDENT * 2 + "{},\n".format(_gen_packed(op))
+    op_source += INDENT * 2 + "(" + "".join(_gen_operand(a) for a in op.args) + "),\n"
+    op_source += INDENT + "),\n"
     return op_source
 
 
 def gen_disassembler(op_list):
-    source = HEADER + IMPORTS
+    source = HEADER + IMPORTS + TABLE_COMMENT
+    source += "OPS = (\n"
     for op in op_list:
         source += _gen_op(op)
-    source += "def disassemble_op(reader, op):\n"
-    for op in op_list:
-        source += INDENT + "if op == OpCode.{}.value:\n".format(op.name.upper())
-        source += INDENT * 2 + "_disassemble_{}(reader)\n".format(op.name)
+    source += ")\n"
     return source
@@ -0,0 +1,99 @@
+from dsl import ops
+from dsl.source_writer import SourceWriter
+
+HEADER = "# Generated by glacierdsl - DO NOT EDIT."
+IMPORTS = """
+from compiler import encoding
+from compiler.ops import OpCode
+from enum import Enum
+"""
+COUNT_COMMENT = """
+# How many values each op pops off the stack and pushes onto it, keyed on the op's value. A count is
+# either a number, a tuple of the index of the operand holding the count and how many values there are
+# for each one of it, or None when it depends on something that isn't part of the op such as how many
+# args the function being called takes.
+"""
+STACK_EFFECT = """
+# How many values an op pops and pushes given its operands. Either count is None when it can't be
+# worked out from the op alone.
+def stack_effect(op, operands):
+    return _count(POPS[op], operands), _count(PUSHES[op], operands)
+
+
+def _count(count, operands):
+    if isinstance(count, tuple):
+        index, scale = count
+        return operands[index] * scale
+    return count
+"""
+
+
+def _gen_operand(arg):
+    arg_encoding = "encoding.{}".format(ops.ENCODINGS[arg.size])
+    if isinstance(arg, ops.GlacierVMOffsetArg):
+        return "encoding.Operand({}, offset=True)".format(arg_encoding)
+    elif isinstance(arg, ops.GlacierVMArg):
+        return "encoding.Operand({})".format(arg_encoding)
+    else:
+        assert isinstance(arg, ops.GlacierVMEnumeratedArg)
+        return "encoding.Operand({}, enumerated=True)".format(arg_encoding)
+
+
+def _gen_operands(writer, op):
+    operands = [_gen_operand(arg) for arg in op.args]
+    if len(operands) == 1:
+        operands_source = "({},)".format(operands[0])
+    else:
+        operands_source = "({})".format(", ".join(operands))
+    writer.write_line("OpCode.{}.value: {},".format(op.name.upper(), operands_source))
+
+
+def _gen_count(op, count):
+    if isinstance(count, ops.GlacierVMArgCount):
+        index = [arg.name for arg in op.args].index(count.name)
+        return "({}, {})".format(index, count.scale)
+    return str(count)
+
+
+def _gen_counts(writer, name, op_list, get_count):
+    writer.write_line("{} = {{".format(name))
+    writer.indent()
+    for op in op_list:
+        writer.write_line(
+            "OpCode.{}.value: {},".format(op.name.upper(), _gen_count(op, get_count(op)))
+        )
+    writer.unindent()
+    writer.write_line("}")
+
+
+def gen_op_info(op_list):
+    writer = SourceWriter()
+    writer.write_line(HEADER)
+    writer.write_line(IMPORTS)
+    writer.write_line("# The operands that follow each op, keyed on the op's value.")
+    writer.write_line("OPERANDS = {")
+    writer.indent()
+    for op in op_list:
+        _gen_operands(writer, op)
+    writer.unindent()
+    writer.write_line("}")
+
+    writer.write_line("# Where execution goes after an op.")
+    writer.write_line("class Flow(Enum):")
+    writer.indent()
+    for i, flow in enumerate(ops.GlacierVMFlow):
+        writer.write_line("{} = {}".format(flow.name, hex(i)))
+    writer.unindent()
+    writer.write_line("# Where execution goes after each op, keyed on the op's value.")
+    writer.write_line("FLOW = {")
+    writer.indent()
+    for op in op_list:
+        writer.write_line("OpCode.{}.value: Flow.{},".format(op.name.upper(), op.flow.name))
+    writer.unindent()
+    writer.write_line("}")
+
+    writer.write_line(COUNT_COMMENT)
+    _gen_counts(writer, "POPS", op_list, lambda op: op.pops)
+    _gen_counts(writer, "PUSHES", op_list, lambda op: op.pushes)
+    writer.write_line(STACK_EFFECT)
+    return writer.get_source()
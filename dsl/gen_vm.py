@@ -1,3 +1,5 @@
+from dsl import ops
+
 HEADER = "// Generated by glacierdsl - DO NOT EDIT.\n"
 
 
@@ -16,3 +18,136 @@ def gen_vm(op_list):
         source += _gen_op(op, i)
         i += 1
     return source
+
+
+C_ENCODINGS = {
+    "U8": "GLC_ENCODING_U8",
+    "U16": "GLC_ENCODING_U16",
+    "U32": "GLC_ENCODING_U32",
+    "U64": "GLC_ENCODING_U64",
+    "VARINT": "GLC_ENCODING_VARINT",
+}
+
+OP_INFO_HEADER = """#ifndef GLACIERVM_OPINFO_H
+#define GLACIERVM_OPINFO_H
+
+#include <stdbool.h>
+#include <stddef.h>
+#include <stdint.h>
+
+#define GLC_NUM_OPS {num_ops}
+#define GLC_MAX_OPERANDS {max_operands}
+
+// Where execution goes after an op.
+typedef enum {{
+{flows}
+}} GlacierFlow;
+
+typedef enum {{
+  GLC_ENCODING_U8,
+  GLC_ENCODING_U16,
+  GLC_ENCODING_U32,
+  GLC_ENCODING_U64,
+  GLC_ENCODING_VARINT,
+}} GlacierEncoding;
+
+typedef struct {{
+  GlacierEncoding encoding;
+  // An offset into the bytecode, such as a jump target.
+  bool offset;
+  // A varint count followed by that many values.
+  bool enumerated;
+}} GlacierOperand;
+
+// A number of stack values: count plus scale for each one of the operand at
+// index operand, if operand isn't -1. The count is -1 when it depends on
+// something that isn't part of the op, like the function being called.
+typedef struct {{
+  int count;
+  int operand;
+  int scale;
+}} GlacierStackCount;
+
+typedef struct {{
+  const char *name;
+  bool header;
+  GlacierStackCount pops;
+  GlacierStackCount pushes;
+  GlacierFlow flow;
+  size_t numOperands;
+  GlacierOperand operands[GLC_MAX_OPERANDS];
+}} GlacierOpInfo;
+
+extern const GlacierOpInfo glacierOpInfo[GLC_NUM_OPS];
+
+// Returns NULL if the op doesn't exist.
+const GlacierOpInfo *glacierOpInfoGet(uint8_t op);
+
+#endif
+"""
+
+OP_INFO_SOURCE = """#include "OpInfo.h"
+
+#include "Ops.h"
+
+const GlacierOpInfo glacierOpInfo[GLC_NUM_OPS] = {{
+{ops}
+}};
+
+const GlacierOpInfo *glacierOpInfoGet(uint8_t op) {{
+  if (op >= GLC_NUM_OPS)
+    return NULL;
+  return &glacierOpInfo[op];
+}}
+"""
+
+
+def _gen_flow(flow):
+    return "GLC_FLOW_{}".format(flow.name)
+
+
+def _gen_stack_count(op, count):
+    if count is None:
+        return "{-1, -1, 0}"
+    if isinstance(count, ops.GlacierVMArgCount):
+        index = [arg.name for arg in op.args].index(count.name)
+        return "{{0, {}, {}}}".format(index, count.scale)
+    return "{{{}, -1, 0}}".format(count)
+
+
+def _gen_operand(arg):
+    offset = isinstance(arg, ops.GlacierVMOffsetArg)
+    enumerated = isinstance(arg, ops.GlacierVMEnumeratedArg)
+    return "{{{}, {}, {}}}".format(
+        C_ENCODINGS[ops.ENCODINGS[arg.size]], str(offset).lower(), str(enumerated).lower()
+    )
+
+
+def _gen_op_info(op):
+    source = "  [GLC_BYTECODE_{}] = {{\n".format(op.name.upper())
+    source += '    .name = "{}",\n'.format(op.name.upper())
+    source += "    .header = {},\n".format(str(isinstance(op, ops.GlacierVMHeaderOp)).lower())
+    source += "    .pops = {},\n".format(_gen_stack_count(op, op.pops))
+    source += "    .pushes = {},\n".format(_gen_stack_count(op, op.pushes))
+    source += "    .flow = {},\n".format(_gen_flow(op.flow))
+    source += "    .numOperands = {},\n".format(len(op.args))
+    if op.args:
+        source += "    .operands = {{{}}},\n".format(
+            ", ".join(_gen_operand(arg) for arg in op.args)
+        )
+    source += "  },"
+    return source
+
+
+# Generate a header declaring a table of facts about each op, indexed by opcode.
+def gen_vm_op_info_header(op_list):
+    flows = "\n".join("  {},".format(_gen_flow(flow)) for flow in ops.GlacierVMFlow)
+    return HEADER + OP_INFO_HEADER.format(
+        num_ops=len(op_list),
+        max_operands=max(len(op.args) for op in op_list),
+        flows=flows,
+    )
+
+
+def gen_vm_op_info_source(op_list):
+    return HEADER + OP_INFO_SOURCE.format(ops="\n".join(_gen_op_info(op) for op in op_list))
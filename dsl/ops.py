@@ -1,25 +1,85 @@
 import enum
 
 
-# FIXME: Use this in the DSL generation.
 class GlacierVMArgType(enum.Enum):
     CHAR = enum.auto()
     BIT_8 = enum.auto()
     BIT_16 = enum.auto()
     BIT_32 = enum.auto()
     BIT_64 = enum.auto()
+    # An unsigned LEB128 integer.
+    VARINT = enum.auto()
 
 
+# The compiler.encoding constant that each arg type is encoded with.
+ENCODINGS = {
+    GlacierVMArgType.CHAR: "U8",
+    GlacierVMArgType.BIT_8: "U8",
+    GlacierVMArgType.BIT_16: "U16",
+    GlacierVMArgType.BIT_32: "U32",
+    GlacierVMArgType.BIT_64: "U64",
+    GlacierVMArgType.VARINT: "VARINT",
+}
+
+# The struct module format that each fixed width arg type is packed with. Anything else has to be
+# encoded an arg at a time.
+STRUCT_FORMATS = {
+    GlacierVMArgType.BIT_8: "B",
+    GlacierVMArgType.BIT_16: "H",
+    GlacierVMArgType.BIT_32: "I",
+    GlacierVMArgType.BIT_64: "Q",
+}
+
+
+# The little endian struct format that packs all of an op's args in one go, after whatever the
+# prefix formats. This is None if the op has no args or any of them aren't a fixed width.
+def struct_format(op, prefix=""):
+    if not op.args:
+        return None
+    for arg in op.args:
+        if not isinstance(arg, GlacierVMArg) or arg.size not in STRUCT_FORMATS:
+            return None
+    return "<" + prefix + "".join(STRUCT_FORMATS[arg.size] for arg in op.args)
+
+
+# Where execution goes after an op.
+class GlacierVMFlow(enum.Enum):
+    # Carries on with the next op.
+    NEXT = enum.auto()
+    # Either jumps to its offset or carries on with the next op.
+    BRANCH = enum.auto()
+    # Always jumps to its offset.
+    JUMP = enum.auto()
+    # Leaves the function.
+    RETURN = enum.auto()
+
+
+# A number of stack values that is given by one of the op's args, such as the elements of a vector.
+class GlacierVMArgCount:
+    def __init__(self, name, scale=1):
+        self.name = name
+        self.scale = scale
+
+
+# How many values an op pops and pushes can be a number, a GlacierVMArgCount or None when it depends on
+# something that isn't part of the op, like how many args the function being called takes.
 class GlacierVMOp:
-    def __init__(self, name, args):
+    def __init__(self, name, args, pops=0, pushes=0, flow=GlacierVMFlow.NEXT):
         self.name = name
         self.args = args
+        self.pops = pops
+        self.pushes = pushes
+        self.flow = flow
 
 
 class GlacierVMHeaderOp:
     def __init__(self, name, args):
         self.name = name
         self.args = args
+        # Header ops are read before anything runs so they never touch the stack.
+        self.pops = 0
+        self.pushes = 0
+        self.flow = GlacierVMFlow.NEXT
 
 
 class GlacierVMArg:
@@ -28,6 +88,11 @@ class GlacierVMArg:
         self.size = size
 
 
+# An arg holding an offset into the bytecode buffer, such as a jump target.
+class GlacierVMOffsetArg(GlacierVMArg):
+    pass
+
+
 class GlacierVMEnumeratedArg:
     def __init__(self, name, size):
         self.name = name
@@ -0,0 +1,97 @@
+import compiler.ast as ast
+import unittest
+from compiler.arena import ASTArena
+from compiler.bytecode import ByteCode
+from compiler.lexer import RegexLexer
+from compiler.parser import Parser
+from compiler.passes.pass_manager import PassManager, standard_passes
+
+PROGRAM = """
+struct Person {
+  string name = "Alex";
+  int age;
+  fn birthday() -> int {
+    this.age = this.age + 1;
+    return this.age;
+  }
+};
+
+fn total(vector<int> v) -> int {
+  let sum = 0;
+  let i = 0;
+  while (i < len(v)) {
+    let x = v[i];
+    sum = sum + x;
+    i = i + 1;
+  }
+  return sum;
+}
+
+fn main() -> void {
+  let person = new Person("Michelle", 26);
+  let ages = { "Michelle": person.birthday() }<string, int>;
+  if (total([1, 2, 3]<int>) == 6) {
+    print(ages["Michelle"]);
+  } else {
+    return;
+  }
+}
+"""
+
+
+class ArenaTestCase(unittest.TestCase):
+    def _parse(self, buf, nodes):
+        parser = Parser(RegexLexer(buf).tokens(), nodes)
+        exprs = list()
+        while True:
+            expr = parser.parse_top_level_expr()
+            if expr is None:
+                break
+            exprs.append(expr)
+        return exprs
+
+    def _compile(self, exprs):
+        bc = ByteCode()
+        PassManager(standard_passes(bc)).run(exprs)
+        return bc.construct()
+
+    def test_parse(self):
+        arena = ASTArena()
+        exprs = self._parse(PROGRAM, arena)
+        self.assertEqual(exprs, self._parse(PROGRAM, ast))
+        self.assertEqual([str(e) for e in exprs], [str(e) for e in self._parse(PROGRAM, ast)])
+        self.assertGreater(len(arena), len(exprs))
+
+    def test_compile(self):
+        self.assertEqual(
+            self._compile(self._parse(PROGRAM, ASTArena())),
+            self._compile(self._parse(PROGRAM, ast)),
+        )
+
+    def test_annotations(self):
+        arena = ASTArena()
+        exprs = self._parse(PROGRAM, arena)
+        self._compile(exprs)
+        total = exprs[1]
+        # Views are created on demand so annotations have to be stored in the arena.
+        self.assertIsNotNone(total.function_id)
+        self.assertIsNotNone(total.offset)
+        loop = total.statements[2]
+        self.assertIsInstance(loop, ast.WhileLoop)
+        self.assertIs(loop.cond.ret_type, ast.Type(ast.TypeKind.INT))
+        index = loop.loop_body[0].rhs
+        self.assertIsInstance(index, ast.Index)
+        self.assertEqual(index.index, ast.VariableRef("i"))
+        self.assertIs(index.ret_type, ast.Type(ast.TypeKind.INT))
+        self.assertEqual(index.index.symbol, ast.VariableRef("i").symbol)
+
+    def test_literals_are_shared(self):
+        arena = ASTArena()
+        self._parse(PROGRAM, arena)
+        self.assertEqual(arena.literals.count("Michelle"), 1)
+        # Identifiers are stored as symbol ids rather than going into the literal pool.
+        self.assertNotIn("age", arena.literals)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import unittest
+from compiler import ops
+from compiler.bytecode import ByteCode
+from disassembler.bytecode_reader import MalformedByteCodeError
+from disassembler.disassemble import disassemble
+
+
+class DisassemblerTestCase(unittest.TestCase):
+    def _disassemble(self, buf):
+        out = io.StringIO()
+        disassemble(buf, out)
+        return out.getvalue().splitlines()
+
+    def test_disassemble(self):
+        bc = ByteCode()
+        ops.emit_struct_def(bc, 0, [1, 2])
+        bc.string_constant("hi")
+        ops.emit_function_def(bc, 0, 1)
+        ops.emit_int(bc, 300)
+        ops.emit_jump(bc, 70000)
+        ops.emit_print(bc)
+        self.assertEqual(
+            self._disassemble(bc.construct()),
+            [
+                "STRUCT_DEF (0)",
+                "  type_id: 0",
+                "  member_id_len: 2",
+                "    member_id_0: 1",
+                "    member_id_1: 2",
+                "STRING_CONST (5)",
+                "  const_id: 0",
+                "  bytes_len: 2",
+                "    bytes_0: h",
+                "    bytes_1: i",
+                "  bytes: 'hi'",
+                "HEADER_END (10)",
+                "FUNCTION_DEF (11)",
+                "  function_id: 0",
+                "  num_args: 1",
+                "INT (14)",
+                "  value: 300",
+                "JUMP (17)",
+                "  offset: 70000",
+                "PRINT (22)",
+            ],
+        )
+
+    def test_buffered_output(self):
+        bc = ByteCode()
+        for i in range(10000):
+            ops.emit_get_var(bc, i)
+        lines = self._disassemble(bc.buf)
+        self.assertEqual(len(lines), 20000)
+        self.assertEqual(lines[-2:], ["GET_VAR (29869)", "  variable_id: 9999"])
+
+    def test_malformed(self):
+        bc = ByteCode()
+        ops.emit_jump(bc, 70000)
+        for buf in [bc.buf[:-1], bytes([0xFF])]:
+            with self.subTest(buf=buf):
+                out = io.StringIO()
+                with self.assertRaises(MalformedByteCodeError):
+                    disassemble(buf, out)
+        # Everything read before the bytecode turned out to be malformed is still written out.
+        out = io.StringIO()
+        with self.assertRaises(MalformedByteCodeError):
+            disassemble(bytes([ops.OP_PRINT, ops.OP_INT, 0x80]), out)
+        self.assertEqual(out.getvalue(), "PRINT (0)\nINT (1)\n")
@@ -1,5 +1,14 @@
+import os
+import tempfile
 import unittest
-from compiler.lexer import Lexer, TokenType, Token
+from compiler import symbols
+from compiler.lexer import Lexer, LexerError, RegexLexer, TokenType, Token, map_source
+
+LEXERS = [
+    ("char", Lexer),
+    ("regex", RegexLexer),
+    ("bytes", lambda buf: RegexLexer(buf.encode())),
+]
 
 
 class LexerTestCase(unittest.TestCase):
@@ -8,15 +17,27 @@ class LexerTestCase(unittest.TestCase):
         self.tokens = list()
 
     def _test_lex_impl(self, buf, expected_tokens):
-        self.lexer = Lexer(buf)
-        while True:
-            tok = self.lexer.lex_token()
-            self.tokens.append(tok)
-            if tok.type == TokenType.EOF:
-                break
-        self.assertEqual(len(self.tokens), len(expected_tokens))
-        for t, exp in zip(self.tokens, expected_tokens):
-            self.assertEqual(t, exp, msg="Got=({0}), Expected=({1})".format(t, exp))
+        # Every lexer should produce exactly the same token stream.
+        for name, lexer_type in LEXERS:
+            with self.subTest(lexer=name):
+                self.lexer = lexer_type(buf)
+                self.tokens = list()
+                while True:
+                    tok = self.lexer.lex_token()
+                    self.tokens.append(tok)
+                    if tok.type == TokenType.EOF:
+                        break
+                self.assertEqual(len(self.tokens), len(expected_tokens))
+                for t, exp in zip(self.tokens, expected_tokens):
+                    self.assertEqual(t, exp, msg="Got=({0}), Expected=({1})".format(t, exp))
+
+    def _test_lex_error_impl(self, buf):
+        for name, lexer_type in LEXERS:
+            with self.subTest(lexer=name):
+                self.lexer = lexer_type(buf)
+                with self.assertRaises(LexerError):
+                    while self.lexer.lex_token().type != TokenType.EOF:
+                        pass
 
     def test_function(self):
         buf = """
@@ -152,6 +173,85 @@ class LexerTestCase(unittest.TestCase):
         ]
         self._test_lex_impl(buf, tokens)
 
+    def test_comments(self):
+        buf = """
+        // let x = 1;
+        let y = 2 / 1; // trailing
+        // no newline at the end"""
+        tokens = [
+            Token(TokenType.LET, "let"),
+            Token(TokenType.IDENTIFIER, "y"),
+            Token(TokenType.ASSIGN, "="),
+            Token(TokenType.NUMBER_LITERAL, "2"),
+            Token(TokenType.DIVIDE, "/"),
+            Token(TokenType.NUMBER_LITERAL, "1"),
+            Token(TokenType.SEMICOLON, ";"),
+            Token(TokenType.EOF, str()),
+        ]
+        self._test_lex_impl(buf, tokens)
+
+    def test_compound_symbols(self):
+        buf = "a<=b>=c!=d==e->f<g"
+        tokens = [
+            Token(TokenType.IDENTIFIER, "a"),
+            Token(TokenType.LESS_THAN_EQ, "<="),
+            Token(TokenType.IDENTIFIER, "b"),
+            Token(TokenType.GREATER_THAN_EQ, ">="),
+            Token(TokenType.IDENTIFIER, "c"),
+            Token(TokenType.NOT_EQUALS, "!="),
+            Token(TokenType.IDENTIFIER, "d"),
+            Token(TokenType.EQUALS, "=="),
+            Token(TokenType.IDENTIFIER, "e"),
+            Token(TokenType.ARROW, "->"),
+            Token(TokenType.IDENTIFIER, "f"),
+            Token(TokenType.LESS_THAN, "<"),
+            Token(TokenType.IDENTIFIER, "g"),
+            Token(TokenType.EOF, str()),
+        ]
+        self._test_lex_impl(buf, tokens)
+
+    def test_source_locations(self):
+        buf = 'fn foo() -> void {\n  print("blah");\n}'
+        for name, lexer_type in LEXERS:
+            with self.subTest(lexer=name):
+                tokens = list(lexer_type(buf).tokens())
+                string_tok = tokens[9]
+                self.assertEqual(string_tok, Token(TokenType.STRING_LITERAL, "blah"))
+                self.assertEqual((string_tok.line, string_tok.column), (2, 9))
+                self.assertEqual(buf[string_tok.start : string_tok.end], '"blah"')
+                self.assertEqual((tokens[-2].line, tokens[-2].column), (3, 1))
+                self.assertEqual(tokens[-1].start, len(buf))
+
+    def test_mapped_source(self):
+        buf = 'fn main() -> void {\n  print("h\u00e9llo");\n}\n'
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "mapped.glc")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(buf)
+            tokens = list(RegexLexer(map_source(path)).tokens())
+        expected = list(RegexLexer(buf).tokens())
+        self.assertEqual(len(tokens), len(expected))
+        for t, exp in zip(tokens, expected):
+            self.assertEqual(t, exp, msg="Got=({0}), Expected=({1})".format(t, exp))
+
+    def test_symbols(self):
+        buf = "let foo = bar + foo;"
+        for name, lexer_type in LEXERS:
+            with self.subTest(lexer=name):
+                tokens = list(lexer_type(buf).tokens())
+                # Only identifiers are interned.
+                self.assertIsNone(tokens[0].symbol)
+                self.assertIsNone(tokens[2].symbol)
+                self.assertEqual(symbols.name(tokens[1].symbol), "foo")
+                self.assertEqual(symbols.name(tokens[3].symbol), "bar")
+                self.assertEqual(tokens[5].symbol, tokens[1].symbol)
+
+    def test_unterminated_string(self):
+        self._test_lex_error_impl('print("blah);')
+
+    def test_unknown_symbol(self):
+        self._test_lex_error_impl("let x = !y;")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,6 @@
 import compiler.ast as ast
 import unittest
-from compiler.lexer import Lexer, TokenType, Token
+from compiler.lexer import RegexLexer, TokenType, Token
 from compiler.parser import Parser
 
 
@@ -10,14 +10,7 @@ class ParserTestCase(unittest.TestCase):
         self.exprs = list()
 
     def _test_parse_impl(self, buf, expected_exprs):
-        lexer = Lexer(buf)
-        tokens = list()
-        while True:
-            tok = lexer.lex_token()
-            tokens.append(tok)
-            if tok.type == TokenType.EOF:
-                break
-        self.parser = Parser(tokens)
+        self.parser = Parser(RegexLexer(buf).tokens())
         while True:
             expr = self.parser.parse_top_level_expr()
             if expr is None:
@@ -158,6 +151,72 @@ class ParserTestCase(unittest.TestCase):
         ]
         self._test_parse_impl(buf, exprs)
 
+    def test_operator_precedence(self):
+        buf = """
+        fn prec() -> int {
+          x = 1 - 2 < 3 == y * z.age;
+        }
+        """
+        exprs = [
+            ast.Function(
+                "prec",
+                [],
+                [
+                    ast.ExprStatement(
+                        ast.BinaryOp(
+                            ast.VariableRef("x"),
+                            ast.BinaryOp(
+                                ast.BinaryOp(
+                                    ast.BinaryOp(
+                                        ast.Number(1),
+                                        ast.Number(2),
+                                        Token(TokenType.SUBTRACT, "-"),
+                                    ),
+                                    ast.Number(3),
+                                    Token(TokenType.LESS_THAN, "<"),
+                                ),
+                                ast.BinaryOp(
+                                    ast.VariableRef("y"),
+                                    ast.MemberAccess(ast.VariableRef("z"), "age"),
+                                    Token(TokenType.MULTIPLY, "*"),
+                                ),
+                                Token(TokenType.EQUALS, "=="),
+                            ),
+                            Token(TokenType.ASSIGN, "="),
+                        )
+                    )
+                ],
+                ast.Type(ast.TypeKind.INT),
+            )
+        ]
+        self._test_parse_impl(buf, exprs)
+
+    def test_left_associativity(self):
+        buf = """
+        fn assoc() -> int {
+          8 - 4 - 2;
+        }
+        """
+        exprs = [
+            ast.Function(
+                "assoc",
+                [],
+                [
+                    ast.ExprStatement(
+                        ast.BinaryOp(
+                            ast.BinaryOp(
+                                ast.Number(8), ast.Number(4), Token(TokenType.SUBTRACT, "-")
+                            ),
+                            ast.Number(2),
+                            Token(TokenType.SUBTRACT, "-"),
+                        )
+                    )
+                ],
+                ast.Type(ast.TypeKind.INT),
+            )
+        ]
+        self._test_parse_impl(buf, exprs)
+
     def test_string_literals(self):
         buf = """
         fn fooString() -> string {
@@ -266,6 +325,30 @@ class ParserTestCase(unittest.TestCase):
         ]
         self._test_parse_impl(buf, exprs)
 
+    def test_streaming(self):
+        buf = """
+        fn first() -> int {
+          return 1;
+        }
+        fn second() -> int {
+          return 2;
+        }
+        """
+        consumed = list()
+
+        def token_stream():
+            for tok in RegexLexer(buf).tokens():
+                consumed.append(tok)
+                yield tok
+
+        self.parser = Parser(token_stream())
+        self.parser.parse_top_level_expr()
+        # Only the first function and a single token of lookahead should have been lexed.
+        self.assertEqual(consumed[-1], Token(TokenType.FUNCTION, "fn"))
+        self.parser.parse_top_level_expr()
+        self.assertIsNone(self.parser.parse_top_level_expr())
+        self.assertEqual(consumed[-1], Token(TokenType.EOF, str()))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,707 @@
+import compiler.ast as ast
+import compiler.encoding as encoding
+import compiler.op_info as op_info
+import compiler.ops as ops
+import unittest
+from compiler.bytecode import ByteCode
+from compiler.lexer import RegexLexer
+from compiler.ops import OpCode
+from compiler.parser import Parser
+from compiler.passes.codegen import CodeGenerator
+from compiler.passes.function_table import FunctionTable
+from compiler.passes.inline import DEFAULT_INLINE_BUDGET
+from compiler.passes.intrinsics import Intrinsics
+from compiler.passes.pass_manager import PassManager, standard_passes
+from compiler.passes.peephole import _decode
+from compiler.passes.struct_defs import StructureDefinitions
+from compiler.passes.type_check import TypeChecker, TypeError
+
+OPT_LEVELS = [0, 1]
+
+
+class PassesTestCase(unittest.TestCase):
+    def _parse(self, buf):
+        parser = Parser(RegexLexer(buf).tokens())
+        exprs = list()
+        while True:
+            expr = parser.parse_top_level_expr()
+            if expr is None:
+                break
+            exprs.append(expr)
+        return exprs
+
+    def _compile(self, buf, opt_level=1, inline_budget=DEFAULT_INLINE_BUDGET):
+        return self._compile_exprs(self._parse(buf), opt_level, inline_budget)
+
+    def _compile_exprs(self, exprs, opt_level=1, inline_budget=DEFAULT_INLINE_BUDGET):
+        bc = ByteCode()
+        PassManager(standard_passes(bc, opt_level, inline_budget)).run(exprs)
+        return bc
+
+    def _ops(self, bc):
+        code, _ = _decode(bc.buf)
+        return [instruction.op for instruction in code]
+
+    def test_deeply_nested_expression(self):
+        # Deep enough that walking the AST recursively would blow the Python call stack.
+        depth = 5000
+        buf = """
+        fn main() -> void {{
+          let x = 1;
+          print(x{});
+        }}
+        """.format(" + x" * depth)
+        for opt_level in OPT_LEVELS:
+            with self.subTest(opt_level=opt_level):
+                bc = self._compile(buf, opt_level)
+                self.assertEqual(bc.buf.count(OpCode.ADD.value), depth)
+
+    def test_fused_codegen(self):
+        buf = """
+        struct Counter {
+          string name = "counter";
+          int count = 0;
+          fn increment(int by) -> int {
+            this.count = this.count + by;
+            return this.count;
+          }
+        };
+
+        fn total(vector<int> v) -> int {
+          let sum = 0;
+          let i = 0;
+          while (len(v) > i) {
+            let x = v[i];
+            sum = sum + x;
+            i = i + 1;
+          }
+          return sum;
+        }
+
+        fn main() -> void {
+          let c = new Counter();
+          let m = {"a": 1, "b": 2}<string, int>;
+          insert(m, "c", c.increment(3));
+          let v = [m["a"], m["b"], m["c"]]<int>;
+          push(v, readInt());
+          if (total(v) == 6) {
+            print(c.name);
+          } else {
+            pop(v);
+          }
+        }
+        """
+        # Fusing type checking into codegen shouldn't change the output.
+        unfused = ByteCode()
+        structs = dict()
+        intrinsics = Intrinsics()
+        passes = [
+            StructureDefinitions(unfused, structs),
+            TypeChecker(unfused, structs, intrinsics),
+            CodeGenerator(unfused, structs, intrinsics),
+            FunctionTable(unfused),
+        ]
+        PassManager(passes).run(self._parse(buf))
+        self.assertEqual(self._compile(buf, 0).construct(), unfused.construct())
+
+    def test_fused_type_errors(self):
+        bufs = [
+            """
+            fn main() -> void {
+              let v = [1, "two"]<int>;
+            }
+            """,
+            """
+            fn foo(int x) -> int {
+              return "foo";
+            }
+            """,
+            # Codegen only walks one arg for each member so extra args have to be caught up front.
+            """
+            struct Foo {
+              int a;
+            };
+
+            fn main() -> void {
+              let f = new Foo(1, 2);
+              print(f.a);
+            }
+            """,
+        ]
+        for buf in bufs:
+            errors = list()
+            for opt_level in OPT_LEVELS:
+                with self.assertRaises(TypeError) as context:
+                    self._compile(buf, opt_level)
+                errors.append(str(context.exception))
+            self.assertEqual(errors[0], errors[1])
+
+    def test_struct_member_lookup(self):
+        # Both structs have a member "x" but at different indices.
+        buf = """
+        struct A {
+          int x;
+          int y;
+        };
+        struct B {
+          int y;
+          int x;
+        };
+        fn main() -> void {
+          let b = new B(1, 2);
+          b.x = b.y + b.x;
+          print(b.x);
+        }
+        """
+        for opt_level in OPT_LEVELS:
+            with self.subTest(opt_level=opt_level):
+                buf_bytes = bytes(self._compile(buf, opt_level).buf)
+                get_member = OpCode.GET_STRUCT_MEMBER.value
+                set_member = OpCode.SET_STRUCT_MEMBER.value
+                self.assertIn(bytes([get_member, 0]), buf_bytes)
+                self.assertIn(bytes([get_member, 1]), buf_bytes)
+                self.assertIn(bytes([set_member, 1]), buf_bytes)
+                self.assertEqual(buf_bytes.count(bytes([get_member, 1])), 2)
+
+    def test_unknown_struct_member(self):
+        bufs = [
+            """
+            struct A {
+              int x;
+            };
+            fn main() -> void {
+              let a = new A(1);
+              print(a.y);
+            }
+            """,
+            """
+            struct A {
+              int x;
+            };
+            fn main() -> void {
+              let a = new A(1);
+              a.y = 5;
+            }
+            """,
+            """
+            fn main() -> void {
+              let a = 1;
+              a.x = 2;
+            }
+            """,
+        ]
+        for buf in bufs:
+            for opt_level in OPT_LEVELS:
+                with self.subTest(buf=buf, opt_level=opt_level):
+                    with self.assertRaises(TypeError):
+                        self._compile(buf, opt_level)
+
+    def test_constant_folding(self):
+        buf = """
+        fn main() -> void {
+          let x = 2 * 3 + 4;
+          print(1 - 2 + 3);
+          print(200 + 100 - 250 > 49);
+          print(200 + 100);
+          print(x / 0);
+        }
+        """
+        # Unsigned arithmetic wraps around. Division by zero is still computed at runtime.
+        folded = """
+        fn main() -> void {
+          let x = 10;
+          print(2);
+          print(1);
+          print(300);
+          print(x / 0);
+        }
+        """
+        self.assertEqual(self._compile(buf).construct(), self._compile(folded).construct())
+        # Constants aren't folded at -O0.
+        self.assertEqual(self._compile(buf, 0).buf.count(OpCode.MULTIPLY.value), 1)
+
+    def test_dead_code_elimination(self):
+        buf = """
+        fn f(int x) -> int {
+          if (x == 1) {
+            return 1;
+          } else {
+            return 2;
+          }
+          print(3);
+        }
+
+        fn main() -> void {
+          if (1 == 1) {
+            print(f(1));
+          } else {
+            print(4);
+          }
+          while (2 < 1) {
+            print(5);
+          }
+          if (0) {
+            print(6);
+          }
+          return;
+          print(7);
+        }
+        """
+        live = """
+        fn f(int x) -> int {
+          if (x == 1) {
+            return 1;
+          } else {
+            return 2;
+          }
+        }
+
+        fn main() -> void {
+          print(f(1));
+          return;
+        }
+        """
+        self.assertEqual(self._compile(buf).construct(), self._compile(live).construct())
+        # Everything is still emitted at -O0.
+        self.assertEqual(self._ops(self._compile(buf, 0)).count(OpCode.PRINT.value), 6)
+
+    def test_infinite_loop(self):
+        buf = """
+        fn main() -> void {
+          let i = 0;
+          while (1) {
+            i = i + 1;
+            if (i == 10) {
+              return;
+            }
+          }
+          print(i);
+        }
+        """
+        ops = self._ops(self._compile(buf))
+        # The loop condition isn't checked and nothing after the loop is reachable.
+        self.assertEqual(ops.count(OpCode.JUMP_IF_FALSE.value), 1)
+        self.assertNotIn(OpCode.PRINT.value, ops)
+
+    def test_dead_let_statements(self):
+        # Lets are function scoped so variables declared in code that never runs can still be used.
+        buf = """
+        fn main() -> void {
+          if (1 == 0) {
+            let x = 5;
+          }
+          while (0) {
+            if (1) {
+              let z = 6;
+            }
+          }
+          let y = 3;
+          x = 7;
+          z = x;
+          print(y);
+          return;
+          let w = 1;
+        }
+        """
+        for opt_level in OPT_LEVELS:
+            with self.subTest(opt_level=opt_level):
+                ops = self._ops(self._compile(buf, opt_level))
+                self.assertEqual(ops.count(OpCode.PRINT.value), 1)
+        ops = self._ops(self._compile(buf))
+        self.assertNotIn(OpCode.JUMP_IF_FALSE.value, ops)
+
+    def test_tree_shaking(self):
+        buf = """
+        fn origin() -> int {
+          return 0;
+        }
+
+        fn helper() -> int {
+          return 1;
+        }
+
+        struct Unused {
+          int x;
+          fn get() -> int {
+            return this.x;
+          }
+        };
+
+        struct Point {
+          int x = origin();
+          fn norm() -> int {
+            return this.x;
+          }
+          fn unused() -> int {
+            return helper();
+          }
+        };
+
+        fn helperCaller() -> int {
+          let u = new Unused(helper());
+          return u.get();
+        }
+
+        fn main() -> void {
+          let p = new Point();
+          print(p.norm());
+        }
+        """
+        bc = self._compile(buf, inline_budget=0)
+        header, _ = _decode(bc.header)
+        # Only Point and main, origin and norm are left.
+        self.assertEqual(
+            [instruction.op for instruction in header],
+            [OpCode.STRUCT_DEF.value] + [OpCode.FUNCTION_JMP.value] * 3,
+        )
+        self.assertEqual(self._ops(bc).count(OpCode.FUNCTION_DEF.value), 3)
+        # Everything is still type checked.
+        with self.assertRaises(TypeError):
+            self._compile(buf.replace("return helper();", 'return "helper";'))
+        # Nothing is shaken out at -O0.
+        self.assertEqual(self._ops(self._compile(buf, 0)).count(OpCode.FUNCTION_DEF.value), 7)
+
+    def test_peephole(self):
+        buf = """
+        fn f() -> int {
+          let y = 2;
+          return y;
+        }
+
+        fn main() -> void {
+          let x = 1;
+          if (x == 1) {
+            if (x == 2) {
+              print(1);
+            } else {
+              print(2);
+            }
+          } else {
+            print(3);
+          }
+          x = x;
+          print(f());
+        }
+        """
+        bc = self._compile(buf)
+        unoptimised = ByteCode()
+        PassManager(standard_passes(unoptimised)[:-1]).run(self._parse(buf))
+        self.assertLess(len(bc.buf), len(unoptimised.buf))
+        code, offsets = _decode(bc.buf)
+        by_offset = dict(zip(offsets, code))
+        for instruction in code:
+            # Jumps never land on another jump or the instruction straight after them.
+            if instruction.op in (OpCode.JUMP.value, OpCode.JUMP_IF_FALSE.value):
+                target = by_offset[instruction.operands[0]]
+                self.assertNotEqual(target.op, OpCode.JUMP.value)
+                self.assertIsNot(target, code[code.index(instruction) + 1])
+        # Neither x = x nor storing y just to return it do anything.
+        get_var, set_var = OpCode.GET_VAR.value, OpCode.SET_VAR.value
+        self.assertNotIn(bytes([get_var, 0, set_var, 0]), bytes(bc.buf))
+        self.assertEqual(
+            [instruction.op for instruction in code[:3]],
+            [OpCode.FUNCTION_DEF.value, OpCode.INT.value, OpCode.RETURN_VAL.value],
+        )
+        # The function table has been patched to point at the functions' new offsets.
+        header, _ = _decode(bc.header)
+        self.assertEqual(len(header), 2)
+        for instruction in header:
+            self.assertEqual(bc.buf[instruction.operands[1]], OpCode.FUNCTION_DEF.value)
+
+    def test_op_metadata(self):
+        # Only ops that have somewhere to jump to can branch.
+        for op in OpCode:
+            with self.subTest(op=op):
+                offsets = [operand.offset for operand in op_info.OPERANDS[op.value]]
+                branches = op_info.FLOW[op.value] in (op_info.Flow.BRANCH, op_info.Flow.JUMP)
+                self.assertEqual(branches, any(offsets) and op != OpCode.FUNCTION_JMP)
+        # Straight line code with no calls can have its stack depth tracked from the metadata alone.
+        buf = """
+        fn main() -> void {
+          let v = [1, 2, 3]<int>;
+          let m = {"a": 1, "b": 2}<string, int>;
+          let x = 1 + 2 * 3;
+          print(x);
+          print(v[0] + m["a"]);
+        }
+        """
+        code, _ = _decode(self._compile(buf, 0).buf)
+        depth = 0
+        for instruction in code:
+            pops, pushes = op_info.stack_effect(instruction.op, instruction.operands)
+            depth -= pops
+            self.assertGreaterEqual(depth, 0)
+            depth += pushes
+        self.assertEqual(code[-1].op, OpCode.RETURN.value)
+        self.assertEqual(depth, 0)
+        # Counts that depend on the function being called can't be known from the op.
+        self.assertEqual(op_info.stack_effect(OpCode.CALL_FUNC.value, [1]), (None, None))
+        self.assertEqual(op_info.stack_effect(OpCode.MAP.value, [3]), (6, 1))
+
+    def test_types_are_interned(self):
+        int_type = ast.Type(ast.TypeKind.INT)
+        self.assertIs(ast.Type(ast.TypeKind.INT), int_type)
+        self.assertIs(
+            ast.Type(ast.TypeKind.MAP, None, (int_type, ast.Type(ast.TypeKind.STRING))),
+            ast.Type(ast.TypeKind.MAP, None, (int_type, ast.Type(ast.TypeKind.STRING))),
+        )
+        self.assertIsNot(ast.Type(ast.TypeKind.USER, "Foo"), ast.Type(ast.TypeKind.USER, "Bar"))
+
+    def test_type_annotations(self):
+        buf = """
+        fn add(int x) -> int {
+          return x + 1;
+        }
+        fn main() -> void {
+          let v = [1, 2]<int>;
+          print(add(v[0]));
+        }
+        """
+        exprs = self._parse(buf)
+        # Keep add around rather than inlining it.
+        self._compile_exprs(exprs, inline_budget=0)
+        add, main = exprs
+        self.assertIsNotNone(add.function_id)
+        self.assertIsNotNone(add.offset)
+        int_type = ast.Type(ast.TypeKind.INT)
+        self.assertIs(add.statements[0].expr.ret_type, int_type)
+        let = main.statements[0]
+        self.assertIs(let.ret_type, ast.Type(ast.TypeKind.VECTOR, None, int_type))
+        self.assertIs(let.rhs.elements[0].ret_type, int_type)
+
+    def test_inlining(self):
+        buf = """
+        struct Point {
+          int x;
+          fn getX() -> int {
+            return this.x;
+          }
+        };
+
+        fn double(int x) -> int {
+          return x + x;
+        }
+
+        fn quad(int x) -> int {
+          return double(double(x));
+        }
+
+        fn forever(int x) -> int {
+          return forever(x);
+        }
+
+        fn main() -> void {
+          let x = 1;
+          let p = new Point(2);
+          print(quad(x));
+          print(p.getX());
+          print(forever(x));
+        }
+        """
+        ops = self._ops(self._compile(buf))
+        # Only the recursive function is left to call.
+        self.assertEqual(ops.count(OpCode.FUNCTION_DEF.value), 2)
+        self.assertEqual(ops.count(OpCode.CALL_FUNC.value), 1)
+        self.assertEqual(ops.count(OpCode.ADD.value), 2)
+        # Nothing is inlined without a budget or when the function is too big for it.
+        for inline_budget in [0, 1]:
+            ops = self._ops(self._compile(buf, inline_budget=inline_budget))
+            self.assertEqual(ops.count(OpCode.FUNCTION_DEF.value), 5)
+
+    def test_tail_call(self):
+        buf = """
+        fn sum(int n, int total) -> int {
+          if (n == 0) {
+            return total;
+          }
+          return sum(n - 1, total + n);
+        }
+
+        fn main() -> void {
+          print(sum(10, 0));
+        }
+        """
+        for opt_level in OPT_LEVELS:
+            with self.subTest(opt_level=opt_level):
+                ops = self._ops(self._compile(buf, opt_level))
+                self.assertEqual(ops.count(OpCode.TAIL_CALL.value), 1)
+                self.assertEqual(ops.count(OpCode.CALL_FUNC.value), 1)
+        # Calls that aren't returned straight away need their own frame.
+        ops = self._ops(self._compile(buf.replace("return sum(", "return 1 + sum(")))
+        self.assertEqual(ops.count(OpCode.TAIL_CALL.value), 0)
+        self.assertEqual(ops.count(OpCode.CALL_FUNC.value), 2)
+
+    def test_slot_allocation(self):
+        buf = """
+        fn main() -> void {
+          let i = 0;
+          while (i < 3) {
+            let x = i + 1;
+            i = x;
+          }
+          let y = i;
+          if (y == 3) {
+            let z = y;
+            print(z);
+          }
+          print(x);
+        }
+        """
+        exprs = self._parse(buf)
+        self._compile_exprs(exprs)
+        (main,) = exprs
+        # x is read after the loop that declares it so it needs its own slot. y and z can share with i.
+        self.assertEqual(main.frame_size, 2)
+        exprs = self._parse(buf)
+        self._compile_exprs(exprs, 0)
+        self.assertEqual(exprs[0].frame_size, 4)
+
+        # More variables than fit in a variable id, as long as they aren't all live at once.
+        lets = "".join("let v{0} = {1};\nprint(v{0});\n".format(i, i % 256) for i in range(300))
+        exprs = self._parse("fn main() -> void {{\n{}}}".format(lets))
+        self._compile_exprs(exprs)
+        self.assertEqual(exprs[0].frame_size, 1)
+        # Without slot allocation they don't fit in a frame.
+        with self.assertRaisesRegex(RuntimeError, "300 variable slots"):
+            self._compile_exprs(self._parse("fn main() -> void {{\n{}}}".format(lets)), 0)
+        # Neither do more variables than the VM has room for that are all live at once.
+        lets = "".join("let v{} = 1;\n".format(i) for i in range(101))
+        prints = "".join("print(v{});\n".format(i) for i in range(101))
+        buf = "fn main() -> void {{\n{}{}}}".format(lets, prints)
+        for opt_level in OPT_LEVELS:
+            with self.subTest(opt_level=opt_level):
+                with self.assertRaisesRegex(RuntimeError, "101 variable slots"):
+                    self._compile(buf, opt_level)
+
+    def test_string_constants(self):
+        buf = """
+        fn greet() -> void {
+          print("hello");
+        }
+
+        fn main() -> void {
+          greet();
+          print("hello");
+          print("world");
+        }
+        """
+        for opt_level in OPT_LEVELS:
+            with self.subTest(opt_level=opt_level):
+                bc = self._compile(buf, opt_level)
+                header, _ = _decode(bc.header)
+                # Each string is only stored once.
+                self.assertEqual(
+                    [instruction.op for instruction in header].count(OpCode.STRING_CONST.value), 2
+                )
+                ops = self._ops(bc)
+                self.assertEqual(ops.count(OpCode.LOAD_CONST.value), 3)
+                self.assertEqual(ops.count(OpCode.STRING.value), 0)
+        # There's no limit on how many strings go in the pool.
+        prints = "".join('print("{}");\n'.format(i) for i in range(300))
+        bc = self._compile("fn main() -> void {{\n{}}}".format(prints))
+        self.assertEqual(len(bc.constants), 300)
+        self.assertEqual(self._ops(bc).count(OpCode.LOAD_CONST.value), 300)
+
+    def test_operand_encoding(self):
+        # Small ints take up a single byte and larger ones only as many bytes as they need.
+        buf = """
+        fn main() -> void {
+          print(5);
+          print(300);
+          print(18446744073709551615);
+        }
+        """
+        bc = self._compile(buf)
+        code, _ = _decode(bc.buf)
+        ints = [instruction for instruction in code if instruction.op == OpCode.INT.value]
+        self.assertEqual([instruction.operands for instruction in ints], [[5], [300], [2**64 - 1]])
+        self.assertEqual([instruction.size for instruction in ints], [2, 3, 11])
+        for value in [0, 127, 128, 16383, 16384, 2**64 - 1]:
+            with self.subTest(value=value):
+                buf = bytearray()
+                encoding.encode(encoding.VARINT, value, buf)
+                self.assertEqual(encoding.decode(encoding.VARINT, buf, 0), (value, len(buf)))
+
+    def test_emit_functions(self):
+        # The emit functions write the same bytes as the op classes.
+        emitted = ByteCode()
+        ops.emit_function_def(emitted, 1, 2)
+        ops.emit_int(emitted, 300)
+        ops.emit_get_var(emitted, 0)
+        ops.emit_add(emitted)
+        jump = emitted.current_offset()
+        ops.emit_jump_if_false(emitted, 0)
+        ops.patch_jump_if_false(emitted, jump, 70000)
+        ops.emit_struct_def(emitted, 0, [1, 2])
+        ops.emit_string_const(emitted, 200, "hello")
+        serialised = ByteCode()
+        ops.FunctionDef(1, 2).serialise(serialised)
+        ops.Int(300).serialise(serialised)
+        ops.GetVar(0).serialise(serialised)
+        ops.Add().serialise(serialised)
+        ops.JumpIfFalse().reserve(serialised).assign(70000).serialise(serialised)
+        ops.StructDef(0, [1, 2]).serialise(serialised)
+        ops.StringConst(200, "hello").serialise(serialised)
+        self.assertEqual(emitted.construct(), serialised.construct())
+        code, _ = _decode(emitted.buf)
+        self.assertEqual(code[-1].op, OpCode.JUMP_IF_FALSE.value)
+        self.assertEqual(code[-1].operands, [70000])
+
+    def test_pass_statistics(self):
+        buf = """
+        fn main() -> void {
+          let x = 1 + 2;
+          print(x);
+        }
+        """
+        pass_manager = PassManager(standard_passes(ByteCode()), instrument=True)
+        pass_manager.run(self._parse(buf))
+        report = pass_manager.to_json()
+        self.assertEqual(
+            [p["name"] for p in report["passes"]],
+            [
+                "TreeShaker",
+                "StructureDefinitions",
+                "TypeChecker",
+                "ConstantFolder",
+                "DeadCodeEliminator",
+                "Inliner",
+                "SlotAllocator",
+                "CodeGenerator",
+                "FunctionTable",
+                "PeepholeOptimiser",
+            ],
+        )
+        # Function, let statement, binary op and its operands, expression statement, call and arg.
+        self.assertEqual(report["passes"][2]["nodes"], 8)
+        for p in report["passes"]:
+            self.assertGreaterEqual(p["seconds"], 0)
+            self.assertGreaterEqual(p["allocated_bytes"], p["retained_bytes"])
+        # x is only read straight after it's stored.
+        self.assertEqual(report["passes"][-1]["counters"], {"ops_removed": 2, "bytes_saved": 4})
+        self.assertAlmostEqual(report["total_seconds"], sum(p["seconds"] for p in report["passes"]))
+
+    def test_walk_ast_node_subclass(self):
+        # Node types that the walker doesn't know about are dispatched by their closest base class.
+        class Hex(ast.Number):
+            pass
+
+        class NumberCollector(ast.ASTWalker):
+            def __init__(self):
+                super().__init__()
+                self.numbers = list()
+
+            def _walk_number(self, expr):
+                self.numbers.append(expr.value)
+
+        collector = NumberCollector()
+        collector.walk_ast([ast.Number(1), Hex(2), Hex(3)])
+        self.assertEqual(collector.numbers, [1, 2, 3])
+
+    def test_walk_ast_unexpected_node(self):
+        with self.assertRaises(RuntimeError):
+            ast.ASTWalker().walk_ast([ast.Member("name", ast.Type(ast.TypeKind.INT))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,27 +16,49 @@ int glacierByteCodeRead8(GlacierByteCode *bc, uint8_t *val) {
   return GLC_OK;
 }
 
-int glacierByteCodeRead16(GlacierByteCode *bc, uint16_t *val) {
-  if (bc->offset + sizeof(uint16_t) > bc->len)
+// Multi-byte values are little endian.
+static int glacierByteCodeReadLE(GlacierByteCode *bc, size_t width,
+                                 uint64_t *val) {
+  if (bc->offset + width > bc->len)
     return GLC_OUT_OF_BUFFER;
-  *val = *((uint16_t *)&bc->buf[bc->offset]);
-  bc->offset += sizeof(uint16_t);
+  *val = 0;
+  for (size_t i = 0; i < width; ++i)
+    *val |= (uint64_t)(uint8_t)bc->buf[bc->offset + i] << (i * 8);
+  bc->offset += width;
+  return GLC_OK;
+}
+
+int glacierByteCodeRead16(GlacierByteCode *bc, uint16_t *val) {
+  uint64_t wide;
+  GLC_RET(glacierByteCodeReadLE(bc, sizeof(uint16_t), &wide));
+  *val = (uint16_t)wide;
   return GLC_OK;
 }
 
 int glacierByteCodeRead32(GlacierByteCode *bc, uint32_t *val) {
-  if (bc->offset + sizeof(uint32_t) > bc->len)
-    return GLC_OUT_OF_BUFFER;
-  *val = *((uint32_t *)&bc->buf[bc->offset]);
-  bc->offset += sizeof(uint32_t);
+  uint64_t wide;
+  GLC_RET(glacierByteCodeReadLE(bc, sizeof(uint32_t), &wide));
+  *val = (uint32_t)wide;
   return GLC_OK;
 }
 
 int glacierByteCodeRead64(GlacierByteCode *bc, uint64_t *val) {
-  if (bc->offset + sizeof(uint64_t) >= bc->len)
-    return GLC_OUT_OF_BUFFER;
-  *val = *((uint64_t *)&bc->buf[bc->offset]);
-  bc->offset += sizeof(uint64_t);
+  return glacierByteCodeReadLE(bc, sizeof(uint64_t), val);
+}
+
+// Unsigned LEB128: seven bits at a time, lowest first, with the top bit set on
+// every byte except the last.
+int glacierByteCodeReadVarint(GlacierByteCode *bc, uint64_t *val) {
+  uint8_t byte;
+  unsigned int shift = 0;
+  *val = 0;
+  do {
+    if (shift >= 64)
+      return GLC_ERROR;
+    GLC_RET(glacierByteCodeRead8(bc, &byte));
+    *val |= (uint64_t)(byte & 0x7f) << shift;
+    shift += 7;
+  } while (byte & 0x80);
   return GLC_OK;
 }
 
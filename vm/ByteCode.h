@@ -24,6 +24,7 @@ int glacierByteCodeRead8(GlacierByteCode *bc, uint8_t *val);
 int glacierByteCodeRead16(GlacierByteCode *bc, uint16_t *val);
 int glacierByteCodeRead32(GlacierByteCode *bc, uint32_t *val);
 int glacierByteCodeRead64(GlacierByteCode *bc, uint64_t *val);
+int glacierByteCodeReadVarint(GlacierByteCode *bc, uint64_t *val);
 int glacierByteCodeJump(GlacierByteCode *bc, size_t offset);
 bool glacierByteCodeEnd(GlacierByteCode *bc);
 int glacierByteCodeTrim(GlacierByteCode *bc);
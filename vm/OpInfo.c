@@ -0,0 +1,328 @@
+// Generated by glacierdsl - DO NOT EDIT.
+#include "OpInfo.h"
+
+#include "Ops.h"
+
+const GlacierOpInfo glacierOpInfo[GLC_NUM_OPS] = {
+  [GLC_BYTECODE_STRUCT_DEF] = {
+    .name = "STRUCT_DEF",
+    .header = true,
+    .pops = {0, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 2,
+    .operands = {{GLC_ENCODING_VARINT, false, false}, {GLC_ENCODING_U8, false, true}},
+  },
+  [GLC_BYTECODE_FUNCTION_DEF] = {
+    .name = "FUNCTION_DEF",
+    .header = false,
+    .pops = {0, 1, 1},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 2,
+    .operands = {{GLC_ENCODING_VARINT, false, false}, {GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_SET_VAR] = {
+    .name = "SET_VAR",
+    .header = false,
+    .pops = {1, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_GET_VAR] = {
+    .name = "GET_VAR",
+    .header = false,
+    .pops = {0, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_CALL_FUNC] = {
+    .name = "CALL_FUNC",
+    .header = false,
+    .pops = {-1, -1, 0},
+    .pushes = {-1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_RETURN] = {
+    .name = "RETURN",
+    .header = false,
+    .pops = {0, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_RETURN,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_RETURN_VAL] = {
+    .name = "RETURN_VAL",
+    .header = false,
+    .pops = {1, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_RETURN,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_ADD] = {
+    .name = "ADD",
+    .header = false,
+    .pops = {2, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_INT] = {
+    .name = "INT",
+    .header = false,
+    .pops = {0, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_STRING] = {
+    .name = "STRING",
+    .header = false,
+    .pops = {0, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_U8, false, true}},
+  },
+  [GLC_BYTECODE_SUBTRACT] = {
+    .name = "SUBTRACT",
+    .header = false,
+    .pops = {2, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_MULTIPLY] = {
+    .name = "MULTIPLY",
+    .header = false,
+    .pops = {2, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_DIVIDE] = {
+    .name = "DIVIDE",
+    .header = false,
+    .pops = {2, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_FUNCTION_JMP] = {
+    .name = "FUNCTION_JMP",
+    .header = true,
+    .pops = {0, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 2,
+    .operands = {{GLC_ENCODING_VARINT, false, false}, {GLC_ENCODING_VARINT, true, false}},
+  },
+  [GLC_BYTECODE_HEADER_END] = {
+    .name = "HEADER_END",
+    .header = false,
+    .pops = {0, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_PRINT] = {
+    .name = "PRINT",
+    .header = false,
+    .pops = {1, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_EQ] = {
+    .name = "EQ",
+    .header = false,
+    .pops = {2, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_JUMP_IF_TRUE] = {
+    .name = "JUMP_IF_TRUE",
+    .header = false,
+    .pops = {1, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_BRANCH,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_U32, true, false}},
+  },
+  [GLC_BYTECODE_JUMP_IF_FALSE] = {
+    .name = "JUMP_IF_FALSE",
+    .header = false,
+    .pops = {1, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_BRANCH,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_U32, true, false}},
+  },
+  [GLC_BYTECODE_JUMP] = {
+    .name = "JUMP",
+    .header = false,
+    .pops = {0, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_JUMP,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_U32, true, false}},
+  },
+  [GLC_BYTECODE_STRUCT] = {
+    .name = "STRUCT",
+    .header = false,
+    .pops = {-1, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_GET_STRUCT_MEMBER] = {
+    .name = "GET_STRUCT_MEMBER",
+    .header = false,
+    .pops = {1, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_SET_STRUCT_MEMBER] = {
+    .name = "SET_STRUCT_MEMBER",
+    .header = false,
+    .pops = {2, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_LT] = {
+    .name = "LT",
+    .header = false,
+    .pops = {2, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_VEC] = {
+    .name = "VEC",
+    .header = false,
+    .pops = {0, 0, 1},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_VEC_ACCESS] = {
+    .name = "VEC_ACCESS",
+    .header = false,
+    .pops = {2, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_MAP] = {
+    .name = "MAP",
+    .header = false,
+    .pops = {0, 0, 2},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_MAP_ACCESS] = {
+    .name = "MAP_ACCESS",
+    .header = false,
+    .pops = {2, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_VEC_PUSH] = {
+    .name = "VEC_PUSH",
+    .header = false,
+    .pops = {2, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_VEC_LEN] = {
+    .name = "VEC_LEN",
+    .header = false,
+    .pops = {1, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_VEC_POP] = {
+    .name = "VEC_POP",
+    .header = false,
+    .pops = {1, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_MAP_INSERT] = {
+    .name = "MAP_INSERT",
+    .header = false,
+    .pops = {3, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_READ_STR] = {
+    .name = "READ_STR",
+    .header = false,
+    .pops = {0, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_READ_INT] = {
+    .name = "READ_INT",
+    .header = false,
+    .pops = {0, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 0,
+  },
+  [GLC_BYTECODE_TAIL_CALL] = {
+    .name = "TAIL_CALL",
+    .header = false,
+    .pops = {-1, -1, 0},
+    .pushes = {-1, -1, 0},
+    .flow = GLC_FLOW_RETURN,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+  [GLC_BYTECODE_STRING_CONST] = {
+    .name = "STRING_CONST",
+    .header = true,
+    .pops = {0, -1, 0},
+    .pushes = {0, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 2,
+    .operands = {{GLC_ENCODING_VARINT, false, false}, {GLC_ENCODING_U8, false, true}},
+  },
+  [GLC_BYTECODE_LOAD_CONST] = {
+    .name = "LOAD_CONST",
+    .header = false,
+    .pops = {0, -1, 0},
+    .pushes = {1, -1, 0},
+    .flow = GLC_FLOW_NEXT,
+    .numOperands = 1,
+    .operands = {{GLC_ENCODING_VARINT, false, false}},
+  },
+};
+
+const GlacierOpInfo *glacierOpInfoGet(uint8_t op) {
+  if (op >= GLC_NUM_OPS)
+    return NULL;
+  return &glacierOpInfo[op];
+}
@@ -0,0 +1,60 @@
+// Generated by glacierdsl - DO NOT EDIT.
+#ifndef GLACIERVM_OPINFO_H
+#define GLACIERVM_OPINFO_H
+
+#include <stdbool.h>
+#include <stddef.h>
+#include <stdint.h>
+
+#define GLC_NUM_OPS 37
+#define GLC_MAX_OPERANDS 2
+
+// Where execution goes after an op.
+typedef enum {
+  GLC_FLOW_NEXT,
+  GLC_FLOW_BRANCH,
+  GLC_FLOW_JUMP,
+  GLC_FLOW_RETURN,
+} GlacierFlow;
+
+typedef enum {
+  GLC_ENCODING_U8,
+  GLC_ENCODING_U16,
+  GLC_ENCODING_U32,
+  GLC_ENCODING_U64,
+  GLC_ENCODING_VARINT,
+} GlacierEncoding;
+
+typedef struct {
+  GlacierEncoding encoding;
+  // An offset into the bytecode, such as a jump target.
+  bool offset;
+  // A varint count followed by that many values.
+  bool enumerated;
+} GlacierOperand;
+
+// A number of stack values: count plus scale for each one of the operand at
+// index operand, if operand isn't -1. The count is -1 when it depends on
+// something that isn't part of the op, like the function being called.
+typedef struct {
+  int count;
+  int operand;
+  int scale;
+} GlacierStackCount;
+
+typedef struct {
+  const char *name;
+  bool header;
+  GlacierStackCount pops;
+  GlacierStackCount pushes;
+  GlacierFlow flow;
+  size_t numOperands;
+  GlacierOperand operands[GLC_MAX_OPERANDS];
+} GlacierOpInfo;
+
+extern const GlacierOpInfo glacierOpInfo[GLC_NUM_OPS];
+
+// Returns NULL if the op doesn't exist.
+const GlacierOpInfo *glacierOpInfoGet(uint8_t op);
+
+#endif
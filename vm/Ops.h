@@ -33,3 +33,6 @@
 #define GLC_BYTECODE_MAP_INSERT 0x1f
 #define GLC_BYTECODE_READ_STR 0x20
 #define GLC_BYTECODE_READ_INT 0x21
+#define GLC_BYTECODE_TAIL_CALL 0x22
+#define GLC_BYTECODE_STRING_CONST 0x23
+#define GLC_BYTECODE_LOAD_CONST 0x24
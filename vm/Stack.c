@@ -115,6 +115,16 @@ int glacierCallStackGetByteCodeOffset(GlacierCallStack *stack, int *bcOffset) {
   return GLC_OK;
 }
 
+// Clears the bindings of the top frame but keeps where it returns to.
+int glacierCallStackReset(GlacierCallStack *stack) {
+  int headPointer = stack->stackPointer - 1;
+  if (!glacierStackIsValidPointer(headPointer))
+    return GLC_STACK_OVERFLOW;
+  GlacierCallStackFrame *frame = &stack->frames[headPointer];
+  glacierCallStackFrameInit(frame, frame->bcOffset);
+  return GLC_OK;
+}
+
 int glacierCallStackSet(GlacierCallStack *stack, int id, GlacierValue value) {
   int headPointer = stack->stackPointer - 1;
   if (!glacierStackIsValidPointer(headPointer))
@@ -72,6 +72,7 @@ int glacierCallStackPop(GlacierCallStack *stack);
 int glacierCallStackGet(GlacierCallStack *stack, int id, GlacierValue *value);
 int glacierCallStackSet(GlacierCallStack *stack, int id, GlacierValue value);
 int glacierCallStackGetByteCodeOffset(GlacierCallStack *stack, int *bcOffset);
+int glacierCallStackReset(GlacierCallStack *stack);
 void glacierCallStackFrameInit(GlacierCallStackFrame *frame, int bcOffset);
 
 #endif // GLACIERVM_STACK_H
@@ -1,16 +1,20 @@
 #include "VM.h"
 
 #include "GC.h"
+#include "OpInfo.h"
 #include "Util.h"
 
 #include <assert.h>
+#include <inttypes.h>
 #include <stdio.h>
 #include <string.h>
 #include <sys/errno.h>
 
 static int glacierVMStructDef(GlacierVM *vm);
 static int glacierVMFunctionDef(GlacierVM *vm);
+static int glacierVMEnterFunction(GlacierVM *vm);
 static int glacierVMInt(GlacierVM *vm);
+static int glacierVMReadString(GlacierVM *vm, char **stringVal);
 static int glacierVMString(GlacierVM *vm);
 static int glacierVMAdd(GlacierVM *vm);
 static int glacierVMSubtract(GlacierVM *vm);
@@ -21,9 +25,12 @@ static int glacierVMLt(GlacierVM *vm);
 static int glacierVMReturnVal(GlacierVM *vm);
 static int glacierVMHeader(GlacierVM *vm);
 static int glacierVMFunctionJmp(GlacierVM *vm);
+static int glacierVMStringConst(GlacierVM *vm);
+static int glacierVMLoadConst(GlacierVM *vm);
 static int glacierVMSetVar(GlacierVM *vm);
 static int glacierVMGetVar(GlacierVM *vm);
 static int glacierVMCallFunc(GlacierVM *vm);
+static int glacierVMTailCall(GlacierVM *vm);
 static int glacierVMPrint(GlacierVM *vm);
 static int glacierVMJumpIfFalse(GlacierVM *vm);
 static int glacierVMJump(GlacierVM *vm);
@@ -44,12 +51,13 @@ static int glacierVMReadInt(GlacierVM *vm);
 
 void glacierVMInit(GlacierVM *vm, GlacierByteCode *bc, GlacierStack *stack,
                    GlacierTable *functionTable, GlacierCallStack *cs,
-                   GlacierTable *symbolTable) {
+                   GlacierTable *symbolTable, GlacierVector *constants) {
   vm->bc = bc;
   vm->stack = stack;
   vm->functionTable = functionTable;
   vm->cs = cs;
   vm->symbolTable = symbolTable;
+  vm->constants = constants;
 }
 
 int glacierVMRun(GlacierVM *vm) {
@@ -74,13 +82,14 @@ int glacierVMRun(GlacierVM *vm) {
 }
 
 static int glacierVMStructDef(GlacierVM *vm) {
-  uint8_t numMembers, structId;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &structId));
-  GLC_RET(glacierByteCodeRead8(vm->bc, &numMembers));
-  GLC_LOG_DBG("VM: Parsing struct def with id %d and %d members.\n", structId,
-              numMembers);
+  uint64_t numMembers, structId;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &structId));
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &numMembers));
+  GLC_LOG_DBG("VM: Parsing struct def with id %" PRIu64 " and %" PRIu64
+              " members.\n",
+              structId, numMembers);
   GLC_RET(glacierTableSet(vm->symbolTable, structId, numMembers));
-  for (int i = 0; i < numMembers; ++i) {
+  for (uint64_t i = 0; i < numMembers; ++i) {
     uint8_t typeId;
     GLC_RET(glacierByteCodeRead8(vm->bc, &typeId));
     switch (typeId) {
@@ -98,19 +107,32 @@ static int glacierVMStructDef(GlacierVM *vm) {
   return GLC_OK;
 }
 
-static int glacierVMFunctionDef(GlacierVM *vm) {
-  uint8_t op, functionId, numArgs;
+static int glacierVMEnterFunction(GlacierVM *vm) {
+  uint8_t op;
+  uint64_t functionId, numArgs;
   GLC_RET(glacierByteCodeRead8(vm->bc, &op));
   if (op != GLC_BYTECODE_FUNCTION_DEF)
     return GLC_ERROR;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &functionId));
-  GLC_RET(glacierByteCodeRead8(vm->bc, &numArgs));
-  GLC_LOG_DBG("VM: Executing function with id %d and %d args.\n", functionId,
-              numArgs);
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &functionId));
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &numArgs));
+  GLC_LOG_DBG("VM: Executing function with id %" PRIu64 " and %" PRIu64
+              " args.\n",
+              functionId, numArgs);
   GLC_RET(glacierVMSetArgs(vm, numArgs));
+  return GLC_OK;
+}
+
+static int glacierVMFunctionDef(GlacierVM *vm) {
+  GLC_RET(glacierVMEnterFunction(vm));
   while (!glacierByteCodeEnd(vm->bc)) {
     uint8_t opCode;
     GLC_RET(glacierByteCodeRead8(vm->bc, &opCode));
+    const GlacierOpInfo *info = glacierOpInfoGet(opCode);
+    if (!info || info->header) {
+      GLC_LOG_ERR("VM: Parsed unrecognised instruction %d.\n", opCode);
+      return GLC_INVALID_OP;
+    }
+    GLC_LOG_DBG("VM: Executing %s.\n", info->name);
     switch (opCode) {
     case GLC_BYTECODE_INT:
       GLC_RET(glacierVMInt(vm));
@@ -118,6 +140,9 @@ static int glacierVMFunctionDef(GlacierVM *vm) {
     case GLC_BYTECODE_STRING:
       GLC_RET(glacierVMString(vm));
       break;
+    case GLC_BYTECODE_LOAD_CONST:
+      GLC_RET(glacierVMLoadConst(vm));
+      break;
     case GLC_BYTECODE_ADD:
       GLC_RET(glacierVMAdd(vm));
       break;
@@ -158,6 +183,9 @@ static int glacierVMFunctionDef(GlacierVM *vm) {
     case GLC_BYTECODE_CALL_FUNC:
       GLC_RET(glacierVMCallFunc(vm));
       break;
+    case GLC_BYTECODE_TAIL_CALL:
+      GLC_RET(glacierVMTailCall(vm));
+      break;
     case GLC_BYTECODE_PRINT:
       GLC_RET(glacierVMPrint(vm));
       break;
@@ -207,7 +235,7 @@ static int glacierVMFunctionDef(GlacierVM *vm) {
       GLC_RET(glacierVMReadInt(vm));
       break;
     default:
-      GLC_LOG_ERR("VM: Parsed unrecognised instruction %d.\n", opCode);
+      GLC_LOG_ERR("VM: No handler for instruction %s.\n", info->name);
       return GLC_INVALID_OP;
     }
   }
@@ -218,25 +246,35 @@ static int glacierVMFunctionDef(GlacierVM *vm) {
 }
 
 static int glacierVMInt(GlacierVM *vm) {
-  uint8_t value;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &value));
+  uint64_t value;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &value));
   GLC_RET(glacierStackPush(vm->stack, glacierValueFromInt(value)));
-  GLC_LOG_DBG("VM: Pushing an int of %d.\n", value);
+  GLC_LOG_DBG("VM: Pushing an int of %" PRIu64 ".\n", value);
   return GLC_OK;
 }
 
-static int glacierVMString(GlacierVM *vm) {
+static int glacierVMReadString(GlacierVM *vm, char **stringVal) {
   GLC_DECL_RET;
-  uint8_t length;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &length));
-  char *stringVal;
-  GLC_RET(glacierGCAlloc(sizeof(char) * (length + 1), &stringVal));
-  for (int i = 0; i < length; ++i) {
+  uint64_t length;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &length));
+  GLC_RET(glacierGCAlloc(sizeof(char) * (length + 1), stringVal));
+  for (uint64_t i = 0; i < length; ++i) {
     uint8_t val;
     GLC_ERR(glacierByteCodeRead8(vm->bc, &val));
-    stringVal[i] = val;
+    (*stringVal)[i] = val;
   }
-  stringVal[length] = '\0';
+  (*stringVal)[length] = '\0';
+  return GLC_OK;
+
+err:
+  glacierGCFree(stringVal);
+  return ret;
+}
+
+static int glacierVMString(GlacierVM *vm) {
+  GLC_DECL_RET;
+  char *stringVal;
+  GLC_RET(glacierVMReadString(vm, &stringVal));
   GLC_ERR(glacierStackPush(vm->stack, glacierValueFromString(stringVal)));
   GLC_LOG_DBG("VM: Pushing a string of \"%s\".\n", stringVal);
   return GLC_OK;
@@ -347,6 +385,9 @@ static int glacierVMHeader(GlacierVM *vm) {
     case GLC_BYTECODE_STRUCT_DEF:
       GLC_RET(glacierVMStructDef(vm));
       break;
+    case GLC_BYTECODE_STRING_CONST:
+      GLC_RET(glacierVMStringConst(vm));
+      break;
     default:
       GLC_LOG_ERR("VM: Unrecognised header op %d.\n", val);
       return GLC_INVALID_OP;
@@ -355,44 +396,72 @@ static int glacierVMHeader(GlacierVM *vm) {
 }
 
 static int glacierVMFunctionJmp(GlacierVM *vm) {
-  uint8_t functionId, offset;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &functionId));
-  GLC_RET(glacierByteCodeRead8(vm->bc, &offset));
+  uint64_t functionId, offset;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &functionId));
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &offset));
   GLC_RET(glacierTableSet(vm->functionTable, functionId, offset));
-  GLC_LOG_DBG("VM: Jump func for id %d at offset %d.\n", functionId, offset);
+  GLC_LOG_DBG("VM: Jump func for id %" PRIu64 " at offset %" PRIu64 ".\n",
+              functionId, offset);
+  return GLC_OK;
+}
+
+static int glacierVMStringConst(GlacierVM *vm) {
+  uint64_t constId;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &constId));
+  // Constants are defined in order so each one goes on the end of the pool.
+  if (constId != vm->constants->len) {
+    GLC_LOG_ERR("VM: Constant %" PRIu64 " defined out of order.\n", constId);
+    return GLC_INVALID_OP;
+  }
+  char *stringVal;
+  GLC_RET(glacierVMReadString(vm, &stringVal));
+  GLC_RET(
+      glacierVectorPush(vm->constants, glacierValueFromString(stringVal)));
+  GLC_LOG_DBG("VM: Constant %" PRIu64 " is \"%s\".\n", constId, stringVal);
+  return GLC_OK;
+}
+
+static int glacierVMLoadConst(GlacierVM *vm) {
+  uint64_t constId;
+  GlacierValue value;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &constId));
+  GLC_RET(glacierVectorGet(vm->constants, constId, &value));
+  // Strings are never modified so everything can share the pool's copy.
+  GLC_RET(glacierStackPush(vm->stack, value));
+  GLC_LOG_DBG("VM: Loaded constant %" PRIu64 ".\n", constId);
   return GLC_OK;
 }
 
 static int glacierVMSetVar(GlacierVM *vm) {
-  uint8_t varId;
+  uint64_t varId;
   GlacierValue val;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &varId));
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &varId));
   GLC_RET(glacierStackPop(vm->stack, &val));
   GLC_RET(glacierCallStackSet(vm->cs, varId, val));
 
-  GLC_LOG_DBG("VM: Just set %d to ", varId);
+  GLC_LOG_DBG("VM: Just set %" PRIu64 " to ", varId);
   glacierValueLog(&val);
   GLC_LOG_DBG("\n");
   return GLC_OK;
 }
 
 static int glacierVMGetVar(GlacierVM *vm) {
-  uint8_t varId;
+  uint64_t varId;
   GlacierValue val;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &varId));
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &varId));
   GLC_RET(glacierCallStackGet(vm->cs, varId, &val));
   GLC_RET(glacierStackPush(vm->stack, val));
 
-  GLC_LOG_DBG("VM: Got %d and got ", varId);
+  GLC_LOG_DBG("VM: Got %" PRIu64 " and got ", varId);
   glacierValueLog(&val);
   GLC_LOG_DBG("\n");
   return GLC_OK;
 }
 
 static int glacierVMCallFunc(GlacierVM *vm) {
-  uint8_t functionId;
+  uint64_t functionId;
   int functionOffset;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &functionId));
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &functionId));
   GLC_RET(glacierTableGet(vm->functionTable, functionId, &functionOffset));
 
   // We need to jump back here after the function call is done.
@@ -402,6 +471,20 @@ static int glacierVMCallFunc(GlacierVM *vm) {
   return GLC_OK;
 }
 
+static int glacierVMTailCall(GlacierVM *vm) {
+  uint64_t functionId;
+  int functionOffset;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &functionId));
+  GLC_RET(glacierTableGet(vm->functionTable, functionId, &functionOffset));
+
+  // The called function returns straight to our caller so it can have our
+  // frame and carry on in this loop instead of recursing.
+  GLC_RET(glacierCallStackReset(vm->cs));
+  GLC_RET(glacierByteCodeJump(vm->bc, functionOffset));
+  GLC_RET(glacierVMEnterFunction(vm));
+  return GLC_OK;
+}
+
 static int glacierVMPrint(GlacierVM *vm) {
   GlacierValue value;
   GLC_RET(glacierStackPop(vm->stack, &value));
@@ -420,8 +503,8 @@ static int glacierVMPrint(GlacierVM *vm) {
 }
 
 static int glacierVMJumpIfFalse(GlacierVM *vm) {
-  uint8_t offset;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &offset));
+  uint32_t offset;
+  GLC_RET(glacierByteCodeRead32(vm->bc, &offset));
   GlacierValue value;
   GLC_RET(glacierStackPop(vm->stack, &value));
   assert(value.typeId == GLC_TYPEID_INT);
@@ -432,16 +515,16 @@ static int glacierVMJumpIfFalse(GlacierVM *vm) {
 }
 
 static int glacierVMJump(GlacierVM *vm) {
-  uint8_t offset;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &offset));
+  uint32_t offset;
+  GLC_RET(glacierByteCodeRead32(vm->bc, &offset));
   GLC_RET(glacierByteCodeJump(vm->bc, offset));
   return GLC_OK;
 }
 
 static int glacierVMStructAlloc(GlacierVM *vm) {
   GLC_DECL_RET;
-  uint8_t structId;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &structId));
+  uint64_t structId;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &structId));
   int numMembers;
   GLC_RET(glacierTableGet(vm->symbolTable, structId, &numMembers));
   GlacierValue *structVal;
@@ -454,7 +537,7 @@ static int glacierVMStructAlloc(GlacierVM *vm) {
   }
   GLC_ERR(
       glacierStackPush(vm->stack, glacierValueFromStruct(structVal, structId)));
-  GLC_LOG_DBG("VM: Pushing a struct of type id %d.\n", structId);
+  GLC_LOG_DBG("VM: Pushing a struct of type id %" PRIu64 ".\n", structId);
   return GLC_OK;
 
 err:
@@ -463,8 +546,8 @@ err:
 }
 
 static int glacierVMStructGetMember(GlacierVM *vm) {
-  uint8_t memberNumber;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &memberNumber));
+  uint64_t memberNumber;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &memberNumber));
   GlacierValue structVal;
   GLC_RET(glacierStackPop(vm->stack, &structVal));
   assert(structVal.typeId != GLC_TYPEID_INT &&
@@ -480,8 +563,8 @@ static int glacierVMStructGetMember(GlacierVM *vm) {
 }
 
 static int glacierVMStructSetMember(GlacierVM *vm) {
-  uint8_t memberNumber;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &memberNumber));
+  uint64_t memberNumber;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &memberNumber));
   GlacierValue structVal, setVal;
   // Nobody knows what type this is.
   GLC_RET(glacierStackPop(vm->stack, &structVal));
@@ -509,12 +592,12 @@ static int glacierVMSetArgs(GlacierVM *vm, int numArgs) {
 
 static int glacierVMVector(GlacierVM *vm) {
   int ret;
-  uint8_t numElements;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &numElements));
+  uint64_t numElements;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &numElements));
   GlacierVector *vector;
   GLC_RET(glacierGCAlloc(sizeof(GlacierVector), (char **)&vector));
   GLC_ERR(glacierVectorInit(vector));
-  for (int i = 0; i < numElements; ++i) {
+  for (uint64_t i = 0; i < numElements; ++i) {
     GlacierValue element;
     GLC_ERR(glacierStackPop(vm->stack, &element));
     GLC_ERR(glacierVectorPush(vector, element));
@@ -542,8 +625,8 @@ static int glacierVMVectorAccess(GlacierVM *vm) {
 }
 
 static int glacierVMMap(GlacierVM *vm) {
-  uint8_t numElements;
-  GLC_RET(glacierByteCodeRead8(vm->bc, &numElements));
+  uint64_t numElements;
+  GLC_RET(glacierByteCodeReadVarint(vm->bc, &numElements));
   GlacierMap *map;
   GLC_RET(glacierGCAlloc(sizeof(GlacierMap), (char **)&map));
   int ret = GLC_OK;
@@ -4,6 +4,7 @@
 #include "ByteCode.h"
 #include "Stack.h"
 #include "Table.h"
+#include "ds/Vector.h"
 
 typedef struct {
   GlacierByteCode *bc;
@@ -11,11 +12,12 @@ typedef struct {
   GlacierTable *functionTable;
   GlacierCallStack *cs;
   GlacierTable *symbolTable;
+  GlacierVector *constants;
 } GlacierVM;
 
 void glacierVMInit(GlacierVM *vm, GlacierByteCode *bc, GlacierStack *stack,
                    GlacierTable *functionTable, GlacierCallStack *cs,
-                   GlacierTable *symbolTable);
+                   GlacierTable *symbolTable, GlacierVector *constants);
 int glacierVMRun(GlacierVM *vm);
 
 #endif // GLACIERVM_VM_H
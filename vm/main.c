@@ -5,7 +5,32 @@
 #include <stdio.h>
 #include <string.h>
 
-#define GLC_BYTECODE_BUF_LEN 1024
+#define GLC_BYTECODE_CHUNK_LEN 1024
+
+// Reads the whole file since programs can be any size.
+static int glacierReadFile(FILE *inputFile, char **buf, size_t *len) {
+  size_t capacity = GLC_BYTECODE_CHUNK_LEN;
+  *len = 0;
+  *buf = malloc(capacity);
+  if (!*buf)
+    return GLC_ERROR;
+  while (true) {
+    *len += fread(*buf + *len, sizeof(char), capacity - *len, inputFile);
+    if (ferror(inputFile)) {
+      free(*buf);
+      return GLC_ERROR;
+    }
+    if (*len < capacity)
+      return GLC_OK;
+    capacity *= 2;
+    char *grown = realloc(*buf, capacity);
+    if (!grown) {
+      free(*buf);
+      return GLC_ERROR;
+    }
+    *buf = grown;
+  }
+}
 
 int main(int argc, char **argv) {
   if (argc != 2) {
@@ -13,10 +38,14 @@ int main(int argc, char **argv) {
     return -1;
   }
 
-  char buf[GLC_BYTECODE_BUF_LEN];
   FILE *inputFile = fopen(argv[1], "r");
-  int len = fread(buf, sizeof(char), GLC_BYTECODE_BUF_LEN, inputFile);
-  if (ferror(inputFile))
+  if (!inputFile)
+    return -1;
+  char *buf;
+  size_t len;
+  int readRet = glacierReadFile(inputFile, &buf, &len);
+  fclose(inputFile);
+  if (readRet != GLC_OK)
     return -1;
 
   GlacierByteCode bc;
@@ -34,8 +63,12 @@ int main(int argc, char **argv) {
   GlacierTable symbolTable;
   glacierTableInit(&symbolTable);
 
+  GlacierVector constants;
+  glacierVectorInit(&constants);
+
   GlacierVM vm;
-  glacierVMInit(&vm, &bc, &stack, &functionTable, &cs, &symbolTable);
+  glacierVMInit(&vm, &bc, &stack, &functionTable, &cs, &symbolTable,
+                &constants);
   int ret = glacierVMRun(&vm);
   if (ret != 0) {
     GLC_LOG_ERR("glaciervm: Terminated unsuccessfully with %s.\n",
@@ -44,5 +77,7 @@ int main(int argc, char **argv) {
   }
   glacierTableDestroy(&functionTable);
   glacierTableDestroy(&symbolTable);
+  glacierVectorDestroy(&constants);
+  free(buf);
   return ret;
 }